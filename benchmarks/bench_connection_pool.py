@@ -0,0 +1,81 @@
+"""
+Benchmark: module-level requests.get (new connection per call) vs pooled PetStoreClient session.
+
+Starts a tiny local HTTP/1.1 server that counts accepted TCP connections,
+then makes the same number of calls both ways and prints connections opened and wall time.
+
+Run from the project root:
+    python -m benchmarks.bench_connection_pool --calls 500
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils.api_client import PetStoreClient
+
+
+class _CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _InventoryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # required for keep-alive
+    disable_nagle_algorithm = True  # otherwise delayed ACKs dominate keep-alive timings
+
+    def do_GET(self):
+        body = json.dumps({"available": 1, "pending": 2, "sold": 3}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(server, calls, do_call):
+    server.connections = 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        assert do_call().status_code == 200
+    return server.connections, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    args = parser.parse_args()
+
+    server = _CountingServer(("127.0.0.1", 0), _InventoryHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+    try:
+        before = _run(server, args.calls, lambda: requests.get(f"{base_url}/store/inventory"))
+        with PetStoreClient(base_url=base_url) as client:
+            after = _run(server, args.calls, client.get_inventory)
+    finally:
+        server.shutdown()
+
+    print(f"{'mode':<22}{'calls':>8}{'connections':>14}{'wall, s':>10}{'per call, ms':>15}")
+    for mode, (conns, wall) in (("requests.get", before), ("PetStoreClient (pool)", after)):
+        print(f"{mode:<22}{args.calls:>8}{conns:>14}{wall:>10.3f}{wall / args.calls * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: find_by_status(...).json() vs streaming find_pet_in_status on a synthetic 100k-pet response.
+
+A local server returns a large findByStatus body; each mode runs in a fresh subprocess
+so peak RSS is measured independently. Reported: time to first match and peak RSS growth.
+
+Run from the project root:
+    python -m benchmarks.bench_find_by_status_stream --pets 100000 --match-at 0.5
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.api_client import PetStoreClient
+from utils.payloads import pet_payload
+
+
+def _make_body(pets):
+    return json.dumps([pet_payload(1_000_000 + i, status="available", name=f"pet{i}") for i in range(pets)]).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = b"[]"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        try:
+            self.wfile.write(self.body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # streaming client stopped early and closed the connection
+
+    def log_message(self, *args):
+        pass
+
+
+def _peak_rss_mb():
+    # VmHWM is reset on exec, unlike ru_maxrss which a child inherits from its parent
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+
+def _measure(mode, base_url, pet_id):
+    """Runs in the child process, prints one JSON line"""
+    client = PetStoreClient(base_url=base_url)
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "full":
+        pets = client.find_by_status("available").json()
+        found = next((p for p in pets if p.get("id") == pet_id), None)
+    else:
+        found = client.find_pet_in_status("available", pet_id)
+    elapsed = time.perf_counter() - started
+    client.close()
+    print(json.dumps({"mode": mode, "found": found is not None, "time_to_match_s": round(elapsed, 3),
+                      "peak_rss_mb": round(_peak_rss_mb(), 1),
+                      "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pets", type=int, default=100_000)
+    parser.add_argument("--match-at", type=float, default=0.5, help="position of the wanted pet, 0..1")
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "BASE_URL", "PET_ID"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, base_url, pet_id = args.child
+        return _measure(mode, base_url, int(pet_id))
+
+    _Handler.body = _make_body(args.pets)
+    pet_id = 1_000_000 + min(args.pets - 1, int(args.pets * args.match_at))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v2"
+    print(f"body: {len(_Handler.body) / 1024 / 1024:.1f} MB, {args.pets} pets, match at {args.match_at:.0%}")
+
+    try:
+        print(f"{'mode':<8}{'found':>7}{'time to match, s':>18}{'peak RSS, MB':>14}{'RSS growth, MB':>16}")
+        for mode in ("full", "stream"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_find_by_status_stream", "--child", mode, base_url,
+                 str(pet_id)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['mode']:<8}{str(r['found']):>7}{r['time_to_match_s']:>18.3f}{r['peak_rss_mb']:>14.1f}"
+                  f"{r['rss_growth_mb']:>16.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
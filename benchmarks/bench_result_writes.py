@@ -0,0 +1,76 @@
+"""
+Benchmark: per-test cost of writing logs and Allure results on the test thread vs queued writers.
+
+Every simulated test logs --log-lines lines (to a pipe drained by a child process, like stderr
+collected by CI) and writes --attachments JSON attachments plus its result file into a temporary
+allure-results directory, i.e. what a test of this suite does. Reported per mode: time spent on
+the test thread per test, and wall time including the final flush.
+
+Run from the project root:
+    python -m benchmarks.bench_result_writes --tests 500
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from allure_commons.logger import AllureFileLogger
+from allure_commons.model2 import Label, Status, TestResult
+
+from utils.background_io import QueuedAllureWriter, QueuedLogging
+
+
+def _result(index):
+    return TestResult(uuid=str(uuid.uuid4()), name=f"test_{index}", fullName=f"tests.test_bench#test_{index}",
+                      status=Status.PASSED, start=0, stop=1, labels=[Label(name="suite", value="bench")])
+
+
+def _run(sync, tests, log_lines, attachments, stream):
+    with tempfile.TemporaryDirectory() as directory:
+        logs = QueuedLogging(stream=stream, sync=sync).start()
+        allure = QueuedAllureWriter(AllureFileLogger(directory), sync=sync)
+        body = json.dumps({"id": 1, "name": "doggie", "status": "available", "tags": [{"id": 1, "name": "t"}] * 20})
+        started = time.perf_counter()
+        hot = 0.0
+        for index in range(tests):
+            test_started = time.perf_counter()
+            for line in range(log_lines):
+                logging.info(f"test {index}: step {line} pet_id={index * 100 + line}")
+            for attachment in range(attachments):
+                allure.report_attached_data(body, f"{uuid.uuid4()}-attachment.json")
+            allure.report_result(_result(index))
+            hot += time.perf_counter() - test_started
+        allure.flush()
+        logs.stop()
+        wall = time.perf_counter() - started
+        if allure.writer is not None:
+            allure.writer.close()
+        return hot, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tests", type=int, default=500)
+    parser.add_argument("--log-lines", type=int, default=6)
+    parser.add_argument("--attachments", type=int, default=4)
+    args = parser.parse_args()
+
+    drain = subprocess.Popen([sys.executable, "-c", "import sys\nfor _ in sys.stdin: pass"],
+                             stdin=subprocess.PIPE, text=True)
+    try:
+        print(f"{args.tests} tests, {args.log_lines} log lines + {args.attachments} attachments + 1 result each")
+        print(f"{'mode':<8}{'test thread, ms/test':>22}{'wall, s':>9}")
+        for mode in ("sync", "queued"):
+            hot, wall = _run(mode == "sync", args.tests, args.log_lines, args.attachments, drain.stdin)
+            print(f"{mode:<8}{hot / args.tests * 1000:>22.3f}{wall:>9.3f}")
+    finally:
+        drain.stdin.close()
+        drain.wait()
+
+
+if __name__ == "__main__":
+    main()
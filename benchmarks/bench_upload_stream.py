@@ -0,0 +1,156 @@
+"""
+Benchmark: concurrent image uploads, old buffered multipart (requests `files=`) vs streamed MultipartBody.
+
+A local sink server reads and discards the uploads. For every size, each mode runs in a fresh
+subprocess that uploads the same file from `--concurrency` threads at once. Reported: throughput,
+peak RSS growth and the peak of anonymous (heap) memory, sampled every 5 ms. Mapped file pages
+show up in RSS but not in anonymous memory; buffered bodies show up in both.
+
+Run from the project root:
+    python -m benchmarks.bench_upload_stream --sizes 1,10,100 --concurrency 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.api_client import PetStoreClient
+
+
+class _SinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        received = 0
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while size := int(self.rfile.readline().split(b";")[0], 16):
+                received += len(self.rfile.read(size))
+                self.rfile.readline()
+            while self.rfile.readline().strip():
+                pass
+        else:
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                received += len(chunk)
+                remaining -= len(chunk)
+        body = json.dumps({"code": 200, "type": "unknown", "message": f"{received} bytes"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _status_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class _AnonSampler(threading.Thread):
+    """Peak RssAnon: the kernel keeps no high-water mark for it"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = _status_mb("RssAnon")
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(0.005):
+            self.peak = max(self.peak, _status_mb("RssAnon"))
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+
+def _measure(mode, base_url, path, concurrency):
+    """Runs in the child process, prints one JSON line"""
+    client = PetStoreClient(base_url=base_url, pool_maxsize=concurrency)
+
+    def upload(_):
+        if mode == "stream":
+            return client.upload_pet_image(1, path)
+        with open(path, "rb") as f:  # the old upload_pet_image: requests builds the whole body in memory
+            files = {"file": (os.path.basename(path), f, "image/jpeg")}
+            return client._request("POST", "/pet/{petId}/uploadImage", path={"petId": 1}, files=files)
+
+    rss_before, anon_before = _status_mb("VmHWM"), _status_mb("RssAnon")
+    sampler = _AnonSampler()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        responses = list(pool.map(upload, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    anon_peak = sampler.stop()
+    client.close()
+    size = os.path.getsize(path)
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    print(json.dumps({"mode": mode, "wall_s": round(elapsed, 3),
+                      "mb_per_s": round(size * concurrency / elapsed / 1024 / 1024, 1),
+                      "rss_growth_mb": round(_status_mb("VmHWM") - rss_before, 1),
+                      "anon_growth_mb": round(anon_peak - anon_before, 1)}))
+
+
+def _make_file(directory, mb):
+    path = os.path.join(directory, f"image_{mb}mb.jpg")
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(mb):
+            f.write(block)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,100", help="comma-separated file sizes, MB")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--child", nargs=4, metavar=("MODE", "BASE_URL", "PATH", "CONCURRENCY"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, base_url, path, concurrency = args.child
+        return _measure(mode, base_url, path, int(concurrency))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SinkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v2"
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"{args.concurrency} concurrent uploads per size")
+            print(f"{'size, MB':>9}{'mode':>9}{'wall, s':>9}{'MB/s':>9}{'RSS growth, MB':>16}{'heap growth, MB':>17}")
+            for mb in (int(s) for s in args.sizes.split(",")):
+                path = _make_file(directory, mb)
+                for mode in ("files", "stream"):
+                    out = subprocess.run(
+                        [sys.executable, "-m", "benchmarks.bench_upload_stream", "--child", mode, base_url, path,
+                         str(args.concurrency)],
+                        capture_output=True, text=True, check=True,
+                    ).stdout
+                    r = json.loads(out.strip().splitlines()[-1])
+                    print(f"{mb:>9}{r['mode']:>9}{r['wall_s']:>9.2f}{r['mb_per_s']:>9.1f}{r['rss_growth_mb']:>16.1f}"
+                          f"{r['anon_growth_mb']:>17.1f}")
+                os.remove(path)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: users created via POST /user/createWithList at different batch sizes.
+
+For every batch size the same number of users is created with UserBatcher (batches sent
+concurrently) and awaited together; reported are the createWithList latency per batch and
+the wall time per user including the readability wait. Size 1 approximates make_user.
+
+Run from the project root:
+    python -m benchmarks.bench_user_batches --users 200 --sizes 1,10,50,100            # BASE_URL from .env
+    python -m benchmarks.bench_user_batches --local --delay 0.2 --users 200
+"""
+import argparse
+import time
+
+from utils.api_client import PetStoreClient
+from utils.cleanup import CleanupSweeper
+from utils.id_allocator import IdAllocator, new_run_nonce
+from utils.user_batcher import BatchLog, UserBatcher, summarize_batches
+from utils.waiting import wait_all
+
+
+def _run(client, allocator, users, batch_size):
+    log = BatchLog()
+
+    def wait_readable(usernames):
+        responses = wait_all((client.get_user, username, lambda r: r.status_code == 200) for username in usernames)
+        assert all(r.status_code == 200 for r in responses), "some users never became readable"
+
+    batcher = UserBatcher(client, batch_size, wait_readable=wait_readable, log=log)
+    for user_id in allocator.next_ids(users):
+        batcher.add(user_id, allocator.next_username("bench"))
+    started = time.perf_counter()
+    usernames = batcher.flush()
+    wall = time.perf_counter() - started
+    return usernames, wall, summarize_batches([log.export()])[batch_size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sizes", default="1,10,50,100", help="comma-separated batch sizes")
+    parser.add_argument("--base-url", default=None, help="defaults to BASE_URL from .env")
+    parser.add_argument("--local", action="store_true", help="run against the in-process PetStore stand-in")
+    parser.add_argument("--delay", type=float, default=0.0, help="--local: consistency delay, seconds")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if args.local:
+        from utils.local_petstore import LocalPetStore
+        server = LocalPetStore(consistency_delay=args.delay).start()
+        base_url = server.base_url
+
+    client = PetStoreClient(base_url=base_url)
+    allocator = IdAllocator(new_run_nonce(), 0)
+    sweeper = CleanupSweeper(client)
+    try:
+        print(f"{args.users} users per batch size")
+        print(f"{'batch size':>10}{'batches':>9}{'errors':>8}{'batch p50, ms':>15}{'batch p95, ms':>15}"
+              f"{'wall, s':>9}{'per user, ms':>14}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            usernames, wall, b = _run(client, allocator, args.users, size)
+            print(f"{size:>10}{b['calls']:>9}{b['errors']:>8}{b['p50_s'] * 1000:>15.1f}{b['p95_s'] * 1000:>15.1f}"
+                  f"{wall:>9.2f}{wall / args.users * 1000:>14.2f}")
+            sweeper.submit({"user": usernames})
+    finally:
+        sweeper.close()
+        client.close()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,788 @@
+from utils import startup_profile
+
+startup_profile.install_if_requested()  # --startup-profile: time the imports below
+
 import logging
-import time
-import random
-import string
+import os
 import pytest
 import allure
+import contextvars
 import json
-from datetime import datetime, timezone
-from utils.api_client import PetStoreClient
+import requests
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.api_client import BASE_URL, PetStoreClient, POOL_MAXSIZE, parse_timeouts
+from utils.attachments import ATTACH_MODES, ATTACHMENTS
+from utils import background_io
+from utils.circuit_breaker import CircuitBreaker
+from utils.budget import Budget
+from utils import cassette as cassettes
+from utils import durations
+from utils.cleanup import CLEANUP_MODES, CleanupSweeper, merge_summaries
+from utils.entity_pool import EntityPool, EntityPools, merge_stats
+from utils.id_allocator import IdAllocator, new_run_nonce, worker_index
+from utils.instrumentation import REQUEST_METRICS, summarize
+from utils.payloads import order_payload, pet_payload, user_payload
+from utils.phase_profile import MIN_SPAN_S, PHASES, PROFILER, merge_exports
+from utils.read_cache import ReadCache
+from utils.user_batcher import BATCH_LOG, UserBatcher, summarize_batches
+from utils import perf_gate, rate_limit
+from utils.waiting import WAIT_STATS, WaitPolicy, merge_snapshots, wait_all, wait_until, wait_until_async
+
+startup_profile.PROFILE.stop("conftest imports")
+
+_TEST_DURATIONS = {}  # nodeid -> call duration of passed tests (filled on the controller via logreport)
+_WALL_DURATIONS = {}  # nodeid -> setup + call + teardown of every test, for the duration history
+_SKIPPED = set()
+_FIRST_SETUP_SEEN = set()  # workers whose first test setup (session fixtures: server, probe, ...) was seen
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("petstore")
+    group.addoption("--local-petstore", action="store_true", default=False,
+                    help="run against an in-process PetStore stand-in instead of BASE_URL (offline)")
+    group.addoption("--petstore-delay", type=float, default=0.0,
+                    help="local PetStore: seconds before a write becomes visible to reads")
+    group.addoption("--petstore-jitter", type=float, default=0.0,
+                    help="local PetStore: extra random visibility delay, 0..N seconds")
+    group.addoption("--startup-profile", action="store_true", default=False,
+                    help="report interpreter/conftest/collection time and import time per module "
+                         "in the controller and every xdist worker")
+    group.addoption("--phase-profile", action="store_true", default=False,
+                    help="break every test's wall time down into fixture setup, make_* calls, body, cleanup, "
+                         "HTTP and sleeping in waits; ranked report plus an Allure attachment per test")
+    group.addoption("--cleanup-mode", choices=CLEANUP_MODES, default="test",
+                    help="when entities from the cleanup fixture are deleted: after each test (concurrently), "
+                         "in one batch at session end, or by a background thread during the run")
+    group.addoption("--read-cache", action="store_true", default=False,
+                    help="cache GET /store/inventory and /pet/findByStatus in api_client (TTL + ETag revalidation)")
+    group.addoption("--http-timings", metavar="PATH", default=None,
+                    help="write per-endpoint latency summary (p50/p95/p99, DNS/connect/TTFB) as JSON to PATH")
+    group.addoption("--user-batch-size", type=int, default=50, metavar="N",
+                    help="users per POST /user/createWithList call in make_users / user_batch")
+    group.addoption("--rate-limit", metavar="SPEC", default=None,
+                    help="limits shared by all xdist workers per endpoint class write/read/poll: "
+                         "CLASS=RATE[/s][:MAX_IN_FLIGHT],... e.g. 'write=10/s:4,poll=20/s'")
+    group.addoption("--rate-limit-dir", metavar="DIR", default=None,
+                    help="state of --rate-limit (default: a temp dir per run); "
+                         "point several runs at one DIR to share the limits between them")
+    group.addoption("--breaker-threshold", type=int, default=5, metavar="N",
+                    help="open the client circuit breaker after N consecutive connection errors / 5xx (0 = off)")
+    group.addoption("--breaker-reset", type=float, default=30.0, metavar="SECONDS",
+                    help="how long the breaker stays open before a trial request (half-open)")
+    group.addoption("--health-timeout", type=float, default=5.0, metavar="SECONDS",
+                    help="timeout of the session-start health probe (GET /store/inventory)")
+    group.addoption("--on-dead-backend", choices=("fail", "skip"), default="fail",
+                    help="what happens to tests while the breaker is open (fail: a dead backend never "
+                         "passes as a green run)")
+    group.addoption("--pool-size", type=int, default=4, metavar="N",
+                    help="shared entities per kind leased to read-only tests (per xdist worker); "
+                         "0 = a fresh entity for every lease")
+    group.addoption("--cassette", metavar="DIR", default=None,
+                    help="record the HTTP traffic into DIR, or replay it from there without a server")
+    group.addoption("--cassette-mode", choices=cassettes.CASSETTE_MODES, default="replay",
+                    help="record: send for real and store; replay: serve recorded responses, send the rest; "
+                         "strict: replay and fail on unrecorded requests")
+
+    perf = parser.getgroup("perf", "performance regression gate")
+    perf.addoption("--perf-results", metavar="PATH", default=".perf/last_run.json",
+                   help="where per-endpoint latency and per-test durations of this run are stored")
+    perf.addoption("--perf-baseline", metavar="PATH", default=".perf/baseline.json",
+                   help="baseline to compare against (ignored if the file does not exist)")
+    perf.addoption("--perf-update-baseline", action="store_true", default=False,
+                   help="store this run as the new baseline instead of comparing")
+    perf.addoption("--perf-tolerance", type=float, default=0.3,
+                   help="allowed relative slowdown, e.g. 0.3 = +30%% (default)")
+    perf.addoption("--perf-gate", choices=("off", "warn", "fail"), default="warn",
+                   help="what to do on regressions: nothing, report them, or fail the run")
+    perf.addoption("--durations-db", metavar="PATH", default=".perf/durations.json",
+                   help="per-test duration history, updated after every unsharded run")
+    perf.addoption("--schedule", choices=("auto", "longest-first", "collection"), default="auto",
+                   help="test order: longest-first by duration history (auto: with xdist or --shard), "
+                        "or as collected")
+    perf.addoption("--shard", metavar="K/N", default=None,
+                   help="run only shard K of N, balanced by duration history (e.g. 2/4 on the 2nd CI machine); "
+                        "the history file must be identical on every machine")
+
+    parser.addini("request_timeouts", type="linelist", default=[],
+                  help="per-endpoint request timeouts, one 'ENDPOINT = CONNECT[:READ]' per line ('default' for the rest)")
+    parser.addini("test_budget", default="",
+                  help="time budget of every test in seconds (setup + call); @pytest.mark.budget(s) overrides it")
+
+    attachments = parser.getgroup("attachments")
+    attachments.addoption("--attach-mode", choices=ATTACH_MODES, default="always",
+                          help="attach JSON bodies for every test, or only for failed ones "
+                               "(plus the last request/response pairs of the test)")
+    attachments.addoption("--attach-inline-limit", type=int, default=64 * 1024, metavar="BYTES",
+                          help="bodies up to this size are attached as pretty JSON, larger ones compactly")
+    attachments.addoption("--attach-max-bytes", type=int, default=2 * 1024 * 1024, metavar="BYTES",
+                          help="larger attachments are truncated")
+    attachments.addoption("--attach-gzip", action="store_true", default=False,
+                          help="gzip attachments above the inline limit")
+    attachments.addoption("--attach-ring-size", type=int, default=20, metavar="N",
+                          help="--attach-mode=failed: how many recent request/response pairs are kept per test")
+    attachments.addoption("--sync-writes", action="store_true", default=False,
+                          help="write log lines and Allure results on the test thread instead of a background "
+                               "writer per worker (to compare the per-test overhead)")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_setup(item):
+    """Start the test's time budget: it covers fixture setup (make_* in fixtures) and the test body"""
+    marker = item.get_closest_marker("budget")
+    seconds = marker.args[0] if marker else item.config.test_budget
+    item._budget = Budget(seconds)
+    item._budget_token = item._budget.activate()
+    PROFILER.start_test()
+    if item.config.cassette is not None:
+        item.config.cassette.begin(item.nodeid)
+    yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    """End the budget before fixture teardown (cleanup must always run) and report its events"""
+    budget = getattr(item, "_budget", None)
+    if budget is not None:
+        Budget.deactivate(item._budget_token)
+        if budget.events:
+            kinds = sorted({event["kind"] for event in budget.events})
+            for kind in kinds:
+                allure.dynamic.tag({"budget": "budget-exhausted", "timeout": "request-timeout"}[kind])
+            attach_json({"budget_s": budget.seconds, "elapsed_s": round(budget.elapsed(), 3),
+                         "events": budget.events}, "Time budget")
+            logging.warning(f"{item.nodeid}: {', '.join(kinds)} events: {budget.events}")
+        item._budget = None
+    yield
+    if item.config.cassette is not None:
+        item.config.cassette.end()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+    if report.when == "teardown":
+        _phase_breakdown(item)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    """--phase-profile: setup time of every fixture (up to its yield)"""
+    if not PROFILER.enabled:
+        yield
+        return
+    started = time.perf_counter()
+    yield
+    PROFILER.add(f"fixture:{fixturedef.argname}", time.perf_counter() - started)
+
+
+def _phase_breakdown(item):
+    """--phase-profile: close the test's breakdown once all three phases are known and attach it"""
+    reports = {when: getattr(item, f"rep_{when}", None) for when in PHASES}
+    breakdown = PROFILER.finish_test(item.nodeid, {when: r.duration for when, r in reports.items() if r is not None})
+    if breakdown is None:
+        return
+    attach_json(breakdown, "Time breakdown")
+    if ATTACHMENTS.mode == "failed":
+        # the buffer of this test was already flushed by _attachments_buffer: write it if the test failed
+        ATTACHMENTS.finish_test(any(r is not None and r.failed for r in reports.values()))
+
+
+@pytest.fixture(autouse=True)
+def _attachments_buffer(request):
+    """--attach-mode=failed: write the attachments buffered during the test only if it failed"""
+    ATTACHMENTS.start_test()
+    yield
+    failed = any(getattr(request.node, f"rep_{when}", None) is not None and
+                 getattr(request.node, f"rep_{when}").failed for when in ("setup", "call"))
+    ATTACHMENTS.finish_test(failed)
+
+
+@pytest.fixture(autouse=True)
+def _circuit_breaker_guard(request):
+    """Skip (or fail) tests right away while the backend is known to be down"""
+    if "api_client" not in request.fixturenames:
+        return
+    breaker = request.getfixturevalue("api_client").breaker
+    if breaker is None or breaker.state == "closed" or breaker.retry_in() == 0:
+        return  # closed, or due for a trial request: let the test run
+    message = f"Backend is down ({breaker.reason}); circuit breaker {breaker.state}"
+    if request.config.getoption("--on-dead-backend") == "fail":
+        pytest.fail(message, pytrace=False)
+    pytest.skip(message)
+
+
+@pytest.fixture(autouse=True)
+def _wait_stats_attachment():
+    """Attach the consistency waits made by the test to its Allure report"""
+    WAIT_STATS.drain_events()
+    yield
+    events = WAIT_STATS.drain_events()
+    PROFILER.add("sleep", sum(e["slept_s"] for e in events))
+    if events:
+        summary = {
+            "waits": len(events),
+            "slept_s": round(sum(e["slept_s"] for e in events), 3),
+            "elapsed_s": round(sum(e["elapsed_s"] for e in events), 3),
+            "events": events,
+        }
+        attach_json(summary, "Consistency waits")
+
+
+@pytest.fixture(autouse=True)
+def _read_cache_bypass(request):
+    """Tests marked no_cache always read from the server"""
+    if not request.node.get_closest_marker("no_cache") or not request.config.getoption("--read-cache"):
+        yield
+        return
+    with request.getfixturevalue("api_client").read_cache.bypass():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _http_timings_attachment():
+    """Attach method/endpoint/status/bytes and DNS/connect/TTFB/total of every HTTP call of the test"""
+    REQUEST_METRICS.drain_test_records()
+    yield
+    records = REQUEST_METRICS.drain_test_records()
+    PROFILER.add("http", sum(r["total_s"] for r in records))
+    if records:
+        attach_json({
+            "calls": len(records),
+            "http_s": round(sum(r["total_s"] for r in records), 4),
+            "records": records,
+        }, "HTTP timings")
+
+
+def pytest_sessionstart(session):
+    session.config._allure_writer = background_io.QueuedAllureWriter.install(
+        sync=session.config.getoption("--sync-writes"))
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    allure_writer = getattr(config, "_allure_writer", None)
+    if allure_writer is not None:
+        allure_writer.flush()  # results and attachments of every test are on disk before the workers report
+    reports = {
+        "wait_stats": WAIT_STATS.snapshot(),
+        "cleanup": getattr(config, "_cleanup_summary", None),
+        "http": REQUEST_METRICS.export(),
+        "read_cache": getattr(config, "_read_cache_stats", None),
+        "entity_pool": getattr(config, "_entity_pool_stats", None),
+        "user_batches": BATCH_LOG.export(),
+        "rate_limit": getattr(config, "_rate_limit_stats", None),
+        "breaker": getattr(config, "_breaker_state", None),
+        "cassette": getattr(config, "_cassette_stats", None),
+        "startup": startup_profile.PROFILE.export(_worker_id(config)) if config.getoption("--startup-profile") else None,
+        "phases": PROFILER.export() if PROFILER.enabled else None,
+        "writes": {"logging": config._logging.counter.snapshot(),
+                   "allure": allure_writer.counter.snapshot() if allure_writer is not None else None},
+    }
+    workeroutput = getattr(config, "workeroutput", None)
+    if workeroutput is not None:
+        # xdist worker: hand the stats over to the controller
+        workeroutput["petstore_reports"] = json.dumps(reports)
+        return
+    _collect_worker_reports(config, reports)
+    stats = merge_snapshots(config._worker_reports["wait_stats"])
+    if stats:
+        _write_allure_environment(config, {
+            "Waiting.total_s": round(sum(e["elapsed_s"] for e in stats.values()), 3),
+            "Waiting.slept_s": round(sum(e["slept_s"] for e in stats.values()), 3),
+            "Waiting.timeouts": sum(e["timeouts"] for e in stats.values()),
+        })
+    http_summary = summarize(config._worker_reports["http"])
+    timings_path = config.getoption("--http-timings")
+    if timings_path and http_summary:
+        os.makedirs(os.path.dirname(timings_path) or ".", exist_ok=True)
+        with open(timings_path, "w", encoding="utf-8") as f:
+            json.dump(http_summary, f, indent=2)
+    if config.cassette is not None and config.cassette.replaying:
+        return  # replayed timings say nothing about the server: keep the duration history and baselines clean
+    _update_duration_db(config)
+    _check_performance(session, http_summary)
+
+
+def _check_performance(session, http_summary):
+    config = session.config
+    if config.getoption("--perf-gate") == "off" or not (http_summary or _TEST_DURATIONS):
+        return
+    results = perf_gate.build_results(http_summary, _TEST_DURATIONS)
+    perf_gate.save(config.getoption("--perf-results"), results)
+
+    baseline_path = config.getoption("--perf-baseline")
+    if config.getoption("--perf-update-baseline"):
+        perf_gate.save(baseline_path, results)
+        return
+    if not os.path.exists(baseline_path):
+        return
+
+    tolerance = config.getoption("--perf-tolerance")
+    failed = config.getoption("--perf-gate") == "fail"
+    config._perf_regressions = perf_gate.compare(perf_gate.load(baseline_path), results, tolerance)
+    alluredir = config.getoption("allure_report_dir", None)
+    if alluredir:
+        perf_gate.write_allure_result(alluredir, config._perf_regressions, tolerance, failed)
+    if failed and config._perf_regressions and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_collection(session):
+    profiling = session.config.getoption("--startup-profile")
+    if profiling:
+        startup_profile.PROFILE.start("collection")
+    yield
+    if profiling:
+        startup_profile.PROFILE.stop("collection")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_make_collect_report(collector):
+    """--startup-profile: time per test module, i.e. importing it and building its items"""
+    if not isinstance(collector, pytest.Module) or not collector.config.getoption("--startup-profile"):
+        yield
+        return
+    started = time.perf_counter()
+    yield
+    startup_profile.PROFILE.add_collection(collector.nodeid, time.perf_counter() - started)
+
+
+def pytest_runtest_logreport(report):
+    if report.when == "call" and report.passed:
+        _TEST_DURATIONS[report.nodeid] = report.duration
+    duration = report.duration
+    if report.when == "setup":
+        worker = getattr(getattr(report, "node", None), "gateway", None)
+        worker = getattr(worker, "id", "master")
+        if worker not in _FIRST_SETUP_SEEN:
+            # one-off session setup is not a property of this particular test
+            _FIRST_SETUP_SEEN.add(worker)
+            duration = 0.0
+    _WALL_DURATIONS[report.nodeid] = _WALL_DURATIONS.get(report.nodeid, 0.0) + duration
+    if report.skipped:
+        _SKIPPED.add(report.nodeid)
+
+
+def pytest_collection_modifyitems(config, items):
+    """--shard K/N keeps a duration-balanced part of the suite; slow tests go first under xdist"""
+    db = config.duration_db
+    if config.shard is not None:
+        index, total = config.shard
+        shards = durations.pack([item.nodeid for item in items], total, db.estimate)
+        keep = set(shards[index - 1][1])
+        deselected = [item for item in items if item.nodeid not in keep]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = [item for item in items if item.nodeid in keep]
+        logging.info(f"Shard {index}/{total}: {len(items)} tests, ~{shards[index - 1][0]:.1f}s estimated")
+
+    schedule = config.getoption("--schedule")
+    if schedule == "auto":
+        schedule = "longest-first" if hasattr(config, "workerinput") or config.shard else "collection"
+    if schedule == "longest-first":
+        order = {nodeid: i for i, nodeid in enumerate(durations.longest_first([i.nodeid for i in items],
+                                                                                db.estimate))}
+        items.sort(key=lambda item: order[item.nodeid])
+
+
+def pytest_report_header(config):
+    if config.shard is not None:
+        return (f"shard {config.shard[0]}/{config.shard[1]} (balanced by {config.getoption('--durations-db')}, "
+                f"history {config.duration_db.fingerprint()})")
+
+
+def _update_duration_db(config):
+    if config.shard is not None:
+        return  # every machine must split by the same history: only unsharded runs may change it
+    measured = {nodeid: seconds for nodeid, seconds in _WALL_DURATIONS.items() if nodeid not in _SKIPPED}
+    if measured:
+        config.duration_db.update(measured)
+        config.duration_db.save()
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    datefmt="%H:%M:%S"
-)
+def pytest_configure(config):
+    config._worker_reports = {"wait_stats": [], "cleanup": [], "http": [], "read_cache": [], "entity_pool": [],
+                              "user_batches": [], "rate_limit": [], "breaker": [], "cassette": [], "writes": [],
+                              "startup": [], "phases": []}
+    PROFILER.enabled = config.getoption("--phase-profile")
+    config._logging = background_io.QueuedLogging(sync=config.getoption("--sync-writes")).start()
+    config._perf_regressions = None
+    # one nonce per run: generated by the controller (or a plain run) and passed to xdist workers
+    workerinput = getattr(config, "workerinput", None)
+    config.run_nonce = workerinput["run_nonce"] if workerinput else new_run_nonce()
+    worker = _worker_id(config)
+    if config.getoption("--startup-profile"):
+        os.environ[startup_profile.ENV_FLAG] = "1"  # xdist workers are spawned later and inherit it
+    config.id_allocator = IdAllocator(config.run_nonce, worker_index(worker))
+    try:
+        config.rate_limits = rate_limit.parse_limits(config.getoption("--rate-limit"))
+        config.request_timeouts = parse_timeouts(config.getini("request_timeouts"))
+        config.test_budget = float(config.getini("test_budget") or 0) or None
+        config.shard = durations.parse_shard(config.getoption("--shard")) if config.getoption("--shard") else None
+    except ValueError as e:
+        raise pytest.UsageError(str(e))
+    config.duration_db = durations.DurationDB(config.getoption("--durations-db"))
+    config.cassette = None
+    if config.getoption("--cassette"):
+        directory, mode = config.getoption("--cassette"), config.getoption("--cassette-mode")
+        if mode == "record" and not workerinput:
+            cassettes.erase(directory)  # the controller starts a fresh recording before any worker runs
+        config.cassette = cassettes.Cassette(directory, mode, config.id_allocator, worker)
+    config.rate_limit_dir = (config.getoption("--rate-limit-dir") or
+                             os.path.join(tempfile.gettempdir(), f"petstore-rate-{config.run_nonce}"))
+    ATTACHMENTS.configure(
+        enabled=bool(config.getoption("allure_report_dir", None)),
+        mode=config.getoption("--attach-mode"),
+        inline_limit=config.getoption("--attach-inline-limit"),
+        max_bytes=config.getoption("--attach-max-bytes"),
+        compress=config.getoption("--attach-gzip"),
+        ring_size=config.getoption("--attach-ring-size"),
+    )
+
+
+def _worker_id(config):
+    workerinput = getattr(config, "workerinput", None)
+    return workerinput["workerid"] if workerinput else "master"
+
+
+def pytest_unconfigure(config):
+    allure_writer = getattr(config, "_allure_writer", None)
+    if allure_writer is not None:
+        allure_writer.uninstall()
+    config._logging.stop()
+    startup_profile.PROFILE.uninstall()
+    rate_limit_dir = getattr(config, "rate_limit_dir", None)
+    if rate_limit_dir and not hasattr(config, "workerinput") and not config.getoption("--rate-limit-dir"):
+        shutil.rmtree(rate_limit_dir, ignore_errors=True)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput["run_nonce"] = node.config.run_nonce
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    data = getattr(node, "workeroutput", {}).get("petstore_reports")
+    if data:
+        _collect_worker_reports(node.config, json.loads(data))
+
+
+def _collect_worker_reports(config, reports):
+    for key, value in reports.items():
+        if value:
+            config._worker_reports[key].append(value)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    stats = merge_snapshots(config._worker_reports["wait_stats"])
+    if stats:
+        terminalreporter.section("consistency waits")
+        terminalreporter.write_line(
+            f"{'endpoint':<28}{'waits':>7}{'polls':>7}{'timeouts':>10}{'slept, s':>10}{'total, s':>10}{'ttc':>9}"
+        )
+        for endpoint, e in sorted(stats.items(), key=lambda item: -item[1]["elapsed_s"]):
+            ttc = "-" if e["ttc_s"] is None else f"{e['ttc_s']:.3f}"
+            terminalreporter.write_line(
+                f"{endpoint:<28}{e['waits']:>7}{e['polls']:>7}{e['timeouts']:>10}"
+                f"{e['slept_s']:>10.3f}{e['elapsed_s']:>10.3f}{ttc:>9}"
+            )
+
+    if config._worker_reports["http"]:
+        timings = summarize(config._worker_reports["http"])
+        terminalreporter.section("http timings")
+        terminalreporter.write_line(
+            f"{'endpoint':<34}{'calls':>7}{'errors':>8}{'p50, ms':>9}{'p95, ms':>9}{'p99, ms':>9}"
+            f"{'ttfb p50':>10}{'new conns':>11}{'connect, ms':>13}"
+        )
+        for endpoint, t in sorted(timings.items(), key=lambda item: -item[1]["p95_s"]):
+            terminalreporter.write_line(
+                f"{endpoint:<34}{t['count']:>7}{t['errors']:>8}{t['p50_s'] * 1000:>9.1f}{t['p95_s'] * 1000:>9.1f}"
+                f"{t['p99_s'] * 1000:>9.1f}{t['ttfb_p50_s'] * 1000:>10.1f}{t['new_connections']:>11}"
+                f"{(t['dns_total_s'] + t['connect_total_s']) * 1000:>13.1f}"
+            )
+
+    if config._worker_reports["read_cache"]:
+        totals = {}
+        for stats in config._worker_reports["read_cache"]:
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        terminalreporter.section("read cache")
+        terminalreporter.write_line(" ".join(f"{k}={v}" for k, v in totals.items()))
+
+    if config._worker_reports["user_batches"]:
+        terminalreporter.section("user batches (createWithList)")
+        terminalreporter.write_line(f"{'batch size':>10}{'calls':>7}{'errors':>8}{'p50, ms':>9}{'p95, ms':>9}"
+                                    f"{'per user, ms':>14}")
+        for size, b in summarize_batches(config._worker_reports["user_batches"]).items():
+            terminalreporter.write_line(f"{size:>10}{b['calls']:>7}{b['errors']:>8}{b['p50_s'] * 1000:>9.1f}"
+                                        f"{b['p95_s'] * 1000:>9.1f}{b['per_user_ms']:>14.2f}")
+
+    if config._worker_reports["rate_limit"]:
+        terminalreporter.section("rate limiter")
+        terminalreporter.write_line(f"{'class':<7}{'requests':>10}{'throttled':>11}{'throttled, s':>14}{'max wait, s':>13}")
+        for name, r in sorted(rate_limit.merge_stats(config._worker_reports["rate_limit"]).items()):
+            terminalreporter.write_line(f"{name:<7}{r['requests']:>10}{r['throttled']:>11}{r['throttled_s']:>14.3f}"
+                                        f"{r['max_wait_s']:>13.3f}")
+
+    if config._worker_reports["breaker"]:
+        terminalreporter.section("circuit breaker")
+        breakers = config._worker_reports["breaker"]
+        if all(b["state"] == "closed" and not b["trips"] for b in breakers):
+            terminalreporter.write_line(f"closed on all {len(breakers)} client(s), never tripped")
+        for index, b in enumerate(breakers):
+            if b["state"] == "closed" and not b["trips"]:
+                continue
+            terminalreporter.write_line(
+                f"client {index}: state={b['state']} trips={b['trips']} rejected={b['rejected']} "
+                f"recoveries={b['recoveries']} last failure: {b['reason']}",
+                red=b["state"] != "closed",
+            )
+
+    if config._worker_reports["cassette"]:
+        stats = cassettes.merge_stats(config._worker_reports["cassette"])
+        terminalreporter.section("cassette")
+        terminalreporter.write_line(f"{config.getoption('--cassette')} ({stats.pop('mode')}): "
+                                    + " ".join(f"{k}={v}" for k, v in stats.items()),
+                                    red=bool(stats["missed"]) and config.getoption("--cassette-mode") == "strict")
+
+    if config._worker_reports["entity_pool"]:
+        terminalreporter.section("entity pool")
+        for kind, stats in sorted(merge_stats(config._worker_reports["entity_pool"]).items()):
+            terminalreporter.write_line(
+                f"{kind:<7}provisioned={stats['provisioned']} leases={stats['leases']} reused={stats['reused']}"
+            )
+
+    if config._perf_regressions is not None:
+        terminalreporter.section("performance regressions")
+        if not config._perf_regressions:
+            terminalreporter.write_line(f"no regressions against {config.getoption('--perf-baseline')}")
+        for regression in config._perf_regressions:
+            terminalreporter.write_line(perf_gate.format_regression(regression), red=True)
+
+    if config._worker_reports["writes"]:
+        tests = len(_WALL_DURATIONS) or 1
+        terminalreporter.section(f"log & result writes ({'sync' if config.getoption('--sync-writes') else 'queued'})")
+        terminalreporter.write_line(f"{'channel':<9}{'items':>7}{'on test thread, s':>19}{'per test, ms':>14}"
+                                    f"{'background, s':>15}{'errors':>8}")
+        for channel, w in sorted(background_io.summarize(config._worker_reports["writes"]).items()):
+            terminalreporter.write_line(f"{channel:<9}{w['items']:>7}{w['hot_s']:>19.4f}"
+                                        f"{w['hot_s'] / tests * 1000:>14.3f}{w['background_s']:>15.4f}"
+                                        f"{w['errors']:>8}")
+
+    if config._worker_reports["phases"]:
+        _phase_profile_summary(terminalreporter, merge_exports(config._worker_reports["phases"]))
+
+    if config._worker_reports["startup"]:
+        _startup_profile_summary(terminalreporter, startup_profile.summarize(config._worker_reports["startup"]))
+
+    if config._worker_reports["cleanup"]:
+        cleanup = merge_summaries(config._worker_reports["cleanup"])
+        terminalreporter.section("cleanup")
+        terminalreporter.write_line(
+            f"mode={cleanup['mode']} deleted={cleanup['deleted']} failed={cleanup['failed']} "
+            f"teardown={cleanup['seconds']:.3f}s"
+        )
+        for failure in cleanup["failures"][:10]:
+            terminalreporter.write_line(f"  failed: {failure}")
+
+
+def _phase_profile_summary(terminalreporter, profile):
+    wall = profile["wall_s"] or 1.0
+    terminalreporter.section(f"time breakdown ({profile['tests']} tests, {profile['wall_s']:.2f}s wall in total)")
+    terminalreporter.write_line(f"{'span':<30}{'total, s':>10}{'of wall':>9}{'tests':>7}{'mean, ms':>10}{'max, ms':>10}"
+                                f"  slowest test")
+    shown = {name: t for name, t in profile["totals"].items() if t["max_s"] >= MIN_SPAN_S}
+    for name, t in shown.items():
+        terminalreporter.write_line(f"{name:<30}{t['total_s']:>10.3f}{t['total_s'] / wall:>9.1%}{t['tests']:>7}"
+                                    f"{t['total_s'] / t['tests'] * 1000:>10.1f}{t['max_s'] * 1000:>10.1f}"
+                                    f"  {t['max_test']}")
+    if len(shown) < len(profile["totals"]):
+        terminalreporter.write_line(f"({len(profile['totals']) - len(shown)} spans never reached "
+                                    f"{MIN_SPAN_S * 1000:.0f} ms in any test)")
+    terminalreporter.write_line("spans overlap (make_* contains http and sleep) and concurrent calls add up, "
+                                "so shares may exceed 100%")
+    terminalreporter.write_line("")
+    terminalreporter.write_line("slowest tests (top spans):")
+    for test in profile["slowest"]:
+        top = ", ".join(f"{name} {seconds:.3f}" for name, seconds in list(test["spans"].items())[:5])
+        terminalreporter.write_line(f"{test['wall_s']:>8.3f}s  {test['nodeid']}  [{top}]")
+
+
+def _startup_profile_summary(terminalreporter, profile):
+    terminalreporter.section("startup profile")
+    phases = list(dict.fromkeys(phase for p in profile["phases"].values() for phase in p))
+    terminalreporter.write_line(f"{'process':<9}" + "".join(f"{phase + ', s':>34}" for phase in phases))
+    for worker, p in sorted(profile["phases"].items()):
+        terminalreporter.write_line(f"{worker:<9}" + "".join(
+            f"{p[phase]:>34.3f}" if phase in p else f"{'-':>34}" for phase in phases))
+    if not profile["imports_profiled"]:
+        terminalreporter.write_line("imports not profiled: pass --startup-profile on the command line")
+    elif profile["imports"]:
+        terminalreporter.write_line("")
+        terminalreporter.write_line(f"{'slowest imports (mean per process)':<44}{'processes':>10}{'self, ms':>10}"
+                                    f"{'cumulative, ms':>16}")
+        for name, i in profile["imports"].items():
+            terminalreporter.write_line(f"{name:<44}{i['processes']:>10}{i['self_s'] * 1000:>10.1f}"
+                                        f"{i['cumulative_s'] * 1000:>16.1f}")
+    if profile["collection"]:
+        terminalreporter.write_line("")
+        terminalreporter.write_line(f"{'collection (mean per process)':<44}{'processes':>10}{'ms':>10}")
+        for nodeid, c in profile["collection"].items():
+            terminalreporter.write_line(f"{nodeid:<44}{c['processes']:>10}{c['seconds'] * 1000:>10.1f}")
+
+
+def _write_allure_environment(config, props):
+    """Merge key=value pairs into allure-results/environment.properties (shown on the report overview)"""
+    alluredir = config.getoption("allure_report_dir", None)
+    if not alluredir:
+        return
+    path = os.path.join(alluredir, "environment.properties")
+    existing = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            existing = dict(line.rstrip("\n").split("=", 1) for line in f if "=" in line)
+    existing.update({k: str(v) for k, v in props.items()})
+    os.makedirs(alluredir, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{k}={v}\n" for k, v in existing.items())
 
 
 @pytest.fixture(scope="session")
-def api_client():
-    return PetStoreClient()
+def petstore_base_url(request):
+    """
+    Base URL for api_client. With --local-petstore every xdist worker starts its own
+    stand-in server on a free port; otherwise BASE_URL from .env is used (None).
+    """
+    if not request.config.getoption("--local-petstore"):
+        yield None
+        return
+    from utils.local_petstore import LocalPetStore  # deferred: http.server/email, only for offline runs
+
+    server = LocalPetStore(
+        consistency_delay=request.config.getoption("--petstore-delay"),
+        consistency_jitter=request.config.getoption("--petstore-jitter"),
+    ).start()
+    logging.info(f"Local PetStore started at {server.base_url}")
+    yield server.base_url
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def api_client(petstore_base_url, request):
+    # one pooled keep-alive session per xdist worker
+    cassette = request.config.cassette
+    replaying = cassette is not None and cassette.replaying
+    base_url = petstore_base_url or BASE_URL or (cassette.base_url if replaying else None)
+    read_cache = ReadCache() if request.config.getoption("--read-cache") else None
+    limits = request.config.rate_limits
+    # replayed responses cost the server nothing, so they are not throttled
+    limiter = rate_limit.RateLimiter(limits, request.config.rate_limit_dir) if limits and not replaying else None
+    threshold = request.config.getoption("--breaker-threshold")
+    breaker = CircuitBreaker(threshold, request.config.getoption("--breaker-reset")) if threshold > 0 else None
+    client = PetStoreClient(base_url=base_url, read_cache=read_cache, limiter=limiter, breaker=breaker,
+                            timeouts=request.config.request_timeouts, cassette=cassette)
+    if cassette is not None and not replaying:
+        cassette.base_url = client.base_url
+    _health_probe(client, request.config.getoption("--health-timeout"))
+    client.add_listener(REQUEST_METRICS)
+    if request.config.getoption("--attach-mode") == "failed":
+        client.session.hooks["response"].append(ATTACHMENTS.record_response)
+    yield client
+    if read_cache is not None:
+        request.config._read_cache_stats = read_cache.stats()
+    if breaker is not None:
+        request.config._breaker_state = breaker.snapshot()
+    if limiter is not None:
+        request.config._rate_limit_stats = limiter.stats()
+        limiter.close()
+    client.close()
+    if cassette is not None:
+        request.config._cassette_stats = cassette.close()
+
+
+def _health_probe(client, timeout):
+    """One cheap GET at session start: a dead backend opens the breaker before any test runs"""
+    try:
+        resp = client.health_check(timeout)
+        problem = f"health probe: HTTP {resp.status_code}" if resp.status_code >= 500 else None
+    except requests.RequestException as e:
+        problem = f"health probe: {type(e).__name__}"
+    if problem is None:
+        return
+    logging.error(f"{client.base_url} is not healthy ({problem})")
+    if client.breaker is not None:
+        client.breaker.trip(problem)
+
+
+@pytest.fixture(scope="session")
+def async_api_client(api_client):
+    """Async twin of api_client; shares the same pooled session. Opt-in per test."""
+    from utils.async_api_client import AsyncPetStoreClient  # deferred: only async tests need it
+
+    client = AsyncPetStoreClient(api_client)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def id_allocator(request):
+    """
+    Hands out IDs/usernames from a range owned by this xdist worker in this run (see utils/id_allocator.py).
+    Use id_allocator.next_ids(n) when a test needs several IDs.
+    """
+    return request.config.id_allocator
 
 
 @pytest.fixture
-def unique_pet_id():
+def unique_pet_id(id_allocator):
     """
     This prevents conflicts with pets created by other users on the public environment.
     """
-    return 100000 + int(time.time() * 1000) % 900000  # for example: 123456
+    return id_allocator.next_id()  # for example: 281494050046
 
 
 @pytest.fixture
-def unique_order_id():
+def unique_order_id(id_allocator):
     """
     Used in store tests to ensure each order gets a unique number.
     """
-    return 10000 + int(time.time() * 1000) % 90000  # for example: 12345
+    return id_allocator.next_id()
 
 
 @pytest.fixture
-def unique_username():
+def unique_username(id_allocator):
     """
-    A random suffix is added to avoid collisions with other users' accounts.
+    Run nonce + worker + counter: unique across workers and runs.
     """
-    letters = ''.join(random.choice(string.ascii_lowercase) for _ in range(3))
-    return f"user_{letters}"  # for example: user_qwe
+    return id_allocator.next_username()  # for example: user_5bx3w2n1a
 
 
 @pytest.fixture
-def unique_user_id():
+def unique_user_id(id_allocator):
     """
     Used in user tests to ensure each user gets a unique numeric ID.
     """
-    return 10000 + int(time.time() * 1000) % 90000  # for example: 12345
+    return id_allocator.next_id()
+
+
+@pytest.fixture(scope="session")
+def stub_image():
+    """In-memory stub JPEG (not a real photo, but the API will accept it); upload it as bytes, no file needed"""
+    return b"\xff\xd8\xff\xe0" + b"\x00" * 100
 
 
 @pytest.fixture
-def temp_image_file(tmp_path):
+def temp_image_file(tmp_path, stub_image):
+    """The stub image written to disk, for uploads from a path"""
     path = tmp_path / "test_image.jpg"
-    # stub (not a real photo, but the API will accept it)
-    with open(path, "wb") as f:
-        f.write(b"\xff\xd8\xff\xe0" + b"\x00" * 100)
+    path.write_bytes(stub_image)
     return str(path)
 
 
@@ -73,15 +797,9 @@ def pet_id(api_client, unique_pet_id, make_pet):
 def make_pet(api_client):
     """Creates a pet, waits until it is available via GET, and returns pet_id"""
 
+    @PROFILER.timed("make_pet")
     def _create(pet_id, status="available", name="Chupa"):
-        payload = {
-            "id": pet_id,
-            "category": {"id": 1, "name": "cats"},
-            "name": name,
-            "photoUrls": ["https://example.com/cat.jpg"],
-            "tags": [{"id": 1, "name": "cute"}],
-            "status": status,
-        }
+        payload = pet_payload(pet_id, status, name)
         resp = api_client.add_pet(payload)
         # Petstore returns 200 on create; accept 201 as a canonical alternative
         assert resp.status_code in (200, 201), f"Failed to create pet: {resp.status_code}"
@@ -97,15 +815,9 @@ def make_pet(api_client):
 def make_order(api_client):
     """Creates an order, waits until it is available via GET, and returns order_id. READ on the public environment may be unstable"""
 
+    @PROFILER.timed("make_order")
     def _create(order_id, pet_id, status="placed", complete=True, quantity=1):
-        payload = {
-            "id": order_id,
-            "petId": pet_id,
-            "quantity": quantity,
-            "shipDate": _now_iso(),
-            "status": status,
-            "complete": complete,
-        }
+        payload = order_payload(order_id, pet_id, status, complete, quantity)
         resp = api_client.create_order(payload)
         assert resp.status_code in (200, 201), f"Failed to create order: {resp.status_code}"
         # Wait for read consistency (GET /store/order/{id} -> 200)
@@ -120,17 +832,9 @@ def make_order(api_client):
 def make_user(api_client):
     """Creates a user, waits until it is available via GET, and returns username"""
 
+    @PROFILER.timed("make_user")
     def _create(id: int, username: str, userStatus: int = 0):
-        payload = {
-            "id": id,
-            "username": username,
-            "firstName": "Test",
-            "lastName": "User",
-            "email": f"{username}@example.com",
-            "password": "p@ssw0rd!",
-            "phone": "+1000000000",
-            "userStatus": userStatus,
-        }
+        payload = user_payload(id, username, userStatus)
         resp = api_client.create_user(payload)
         assert resp.status_code in (200, 201), f"Failed to create user: {resp.status_code}"
         # wait until GET /user/{username} returns the user
@@ -142,67 +846,312 @@ def make_user(api_client):
 
 
 @pytest.fixture
-def cleanup(api_client):
+def make_pets(api_client):
+    """
+    Bulk make_pet: creates all pets concurrently, then waits for all of them in one batch.
+    make_pets([id1, id2, ...], status=..., name=...) -> list of pet_ids
+    """
+
+    @PROFILER.timed("make_pets")
+    def _create(pet_ids, status="available", name="Chupa"):
+        payloads = [pet_payload(pet_id, status, name) for pet_id in pet_ids]
+        _create_all(api_client.add_pet, payloads, "pet")
+        _wait_all_readable(api_client.get_pet, pet_ids, "Pet")
+        return list(pet_ids)
+
+    return _create
+
+
+@pytest.fixture
+def make_orders(api_client):
+    """
+    Bulk make_order: make_orders([(order_id, pet_id), ...], status=..., complete=..., quantity=...) -> order_ids
+    """
+
+    @PROFILER.timed("make_orders")
+    def _create(order_and_pet_ids, status="placed", complete=True, quantity=1):
+        payloads = [order_payload(order_id, pet_id, status, complete, quantity)
+                    for order_id, pet_id in order_and_pet_ids]
+        order_ids = [order_id for order_id, _ in order_and_pet_ids]
+        _create_all(api_client.create_order, payloads, "order")
+        _wait_all_readable(api_client.get_order, order_ids, "Order")
+        return order_ids
+
+    return _create
+
+
+@pytest.fixture
+def make_users(api_client, request):
+    """
+    Bulk make_user: make_users([(id, username), ...], userStatus=...) -> usernames
+    Users are sent in POST /user/createWithList batches of --user-batch-size, then awaited together.
+    """
+
+    @PROFILER.timed("make_users")
+    def _create(ids_and_usernames, userStatus=0):
+        batcher = _user_batcher(api_client, request)
+        for id, username in ids_and_usernames:
+            batcher.add(id, username, userStatus)
+        return batcher.flush()
+
+    return _create
+
+
+@pytest.fixture
+def user_batch(api_client, request):
+    """
+    Buffering user factory: user_batch.add(id, username, userStatus) for each user, then
+    user_batch.flush() creates them in createWithList batches and waits once -> usernames.
+    Per-batch latency is attached to Allure.
+    """
+    batcher = _user_batcher(api_client, request)
+    yield batcher
+    if len(batcher):
+        logging.warning(f"user_batch: {len(batcher)} buffered users were never flushed")
+    if batcher.batches:
+        attach_json(batcher.batches, "createWithList batches")
+
+
+def _user_batcher(api_client, request):
+    return UserBatcher(api_client, request.config.getoption("--user-batch-size"),
+                       wait_readable=lambda usernames: _wait_all_readable(api_client.get_user, usernames, "User"))
+
+
+def _create_all(create, payloads, entity):
+    with ThreadPoolExecutor(max_workers=max(1, min(len(payloads), POOL_MAXSIZE))) as pool:
+        # carry context variables (the test's budget) over to the worker threads
+        futures = [pool.submit(contextvars.copy_context().run, create, payload) for payload in payloads]
+        for resp in (future.result() for future in futures):
+            assert resp.status_code in (200, 201), f"Failed to create {entity}: {resp.status_code}"
+
+
+def _wait_all_readable(getter, entity_ids, entity):
+    responses = wait_all((getter, entity_id, _is_settled) for entity_id in entity_ids)
+    missing = [entity_id for entity_id, resp in zip(entity_ids, responses) if resp.status_code != 200]
+    assert not missing, f"{entity}s not available after creation: {missing}"
+
+
+@pytest.fixture
+def make_pet_async(async_api_client):
+    """Async version of make_pet: await make_pet_async(pet_id, ...) -> pet_id"""
+
+    @PROFILER.timed("make_pet_async")
+    async def _create(pet_id, status="available", name="Chupa"):
+        resp = await async_api_client.add_pet(pet_payload(pet_id, status, name))
+        assert resp.status_code in (200, 201), f"Failed to create pet: {resp.status_code}"
+        resp_get = await get_with_retry_async(async_api_client, pet_id, getter=async_api_client.get_pet)
+        assert resp_get.status_code == 200, "Pet not available after creation"
+        return pet_id
+
+    return _create
+
+
+@pytest.fixture
+def make_order_async(async_api_client):
+    """Async version of make_order: await make_order_async(order_id, pet_id, ...) -> order_id"""
+
+    @PROFILER.timed("make_order_async")
+    async def _create(order_id, pet_id, status="placed", complete=True, quantity=1):
+        resp = await async_api_client.create_order(order_payload(order_id, pet_id, status, complete, quantity))
+        assert resp.status_code in (200, 201), f"Failed to create order: {resp.status_code}"
+        resp_get = await get_with_retry_async(async_api_client, order_id, getter=async_api_client.get_order)
+        assert resp_get.status_code == 200, "Order not available after creation"
+        return order_id
+
+    return _create
+
+
+@pytest.fixture
+def make_user_async(async_api_client):
+    """Async version of make_user: await make_user_async(id, username, ...) -> username"""
+
+    @PROFILER.timed("make_user_async")
+    async def _create(id: int, username: str, userStatus: int = 0):
+        resp = await async_api_client.create_user(user_payload(id, username, userStatus))
+        assert resp.status_code in (200, 201), f"Failed to create user: {resp.status_code}"
+        resp_get = await get_with_retry_async(async_api_client, username, getter=async_api_client.get_user)
+        assert resp_get.status_code == 200, "User not available after creation"
+        return username
+
+    return _create
+
+
+@pytest.fixture(scope="session")
+def cleanup_sweeper(api_client, request):
+    """Deletes what tests put into `cleanup` — per test or deferred, see --cleanup-mode"""
+    sweeper = CleanupSweeper(api_client, mode=request.config.getoption("--cleanup-mode"))
+    yield sweeper
+    sweeper.close()
+    summary = sweeper.summary()
+    request.config._cleanup_summary = summary
+    logging.info(f"Cleanup summary: mode={summary['mode']} deleted={summary['deleted']} "
+                 f"failed={summary['failed']} teardown={summary['seconds']}s")
+
+
+@pytest.fixture(scope="session")
+def entity_pool(api_client, id_allocator, cleanup_sweeper, request):
+    """
+    Ready-made pets/orders/users shared by read-only tests of this worker (see utils/entity_pool.py).
+    Provisioned in bulk on first lease, deleted at session end.
+    """
+
+    def provision_pets(n):
+        payloads = [pet_payload(pet_id) for pet_id in id_allocator.next_ids(n)]
+        _create_all(api_client.add_pet, payloads, "pet")
+        _wait_all_readable(api_client.get_pet, [p["id"] for p in payloads], "Pet")
+        return payloads
+
+    def provision_orders(n):
+        payloads = [order_payload(order_id, pet_id) for order_id, pet_id in zip(id_allocator.next_ids(n),
+                                                                                id_allocator.next_ids(n))]
+        _create_all(api_client.create_order, payloads, "order")
+        _wait_all_readable(api_client.get_order, [p["id"] for p in payloads], "Order")
+        return payloads
+
+    def provision_users(n):
+        payloads = [user_payload(user_id, id_allocator.next_username()) for user_id in id_allocator.next_ids(n)]
+        batcher = _user_batcher(api_client, request)
+        batcher.add_payloads(payloads)
+        batcher.flush()
+        return payloads
+
+    def scoped(kind, provision):
+        """Provisioning runs inside whichever test leases first; a cassette records it under its own scope"""
+        cassette = request.config.cassette
+        if cassette is None:
+            return provision
+
+        def run(n):
+            with cassette.scoped(f"pool:{kind}"):
+                return provision(n)
+
+        return run
+
+    size = request.config.getoption("--pool-size")
+    pools = EntityPools([
+        EntityPool("pet", scoped("pet", provision_pets), size=size),
+        EntityPool("order", scoped("order", provision_orders), size=size),
+        EntityPool("user", scoped("user", provision_users), key="username", size=size),
+    ])
+    yield pools
+    request.config._entity_pool_stats = pools.stats()
+    cleanup_sweeper.submit(pools.cleanup_bag())
+
+
+def _lease(entity_pool, kind, request):
+    index, entity = entity_pool.lease(kind, holder=request.node.nodeid)
+    yield entity
+    entity_pool.release(kind, index)
+    rep_call = getattr(request.node, "rep_call", None)
+    if rep_call is not None and rep_call.failed:
+        # a shared entity may have been left in a bad state by an earlier holder
+        pool = entity_pool.pools[kind]
+        attach_json(lambda: {"kind": kind, "entity": entity, "holders": pool.holders(entity[pool.key])},
+                    "Entity pool lease")
+
+
+@pytest.fixture
+def pooled_pet(entity_pool, request):
+    """Shared ready-made pet (payload dict) for tests that only read it"""
+    yield from _lease(entity_pool, "pet", request)
+
+
+@pytest.fixture
+def pooled_order(entity_pool, request):
+    """Shared ready-made order (payload dict) for tests that only read it"""
+    yield from _lease(entity_pool, "order", request)
+
+
+@pytest.fixture
+def pooled_user(entity_pool, request):
+    """Shared ready-made user (payload dict, incl. password) for tests that only read it or log in"""
+    yield from _lease(entity_pool, "user", request)
+
+
+@pytest.fixture
+def cleanup(cleanup_sweeper):
     """
     Generic cleanup: {"pet": [], "user": [], "order": []}
-    At the end of the test, delete everything the test added to these lists.
+    At the end of the test, delete everything the test added to these lists
+    (concurrently; or later in one batch with --cleanup-mode=session/background).
     """
     bag = {"pet": [], "user": [], "order": []}
     yield bag
 
-    # pets
-    for pet_id in bag["pet"]:
-        try:
-            api_client.delete_pet(pet_id)
-        except Exception as e:
-            logging.warning(f"Failed to delete pet {pet_id}: {e}")
+    with PROFILER.span("cleanup"):
+        failures = cleanup_sweeper.submit(bag)
+    if failures:
+        attach_json(failures, "Cleanup failures")
 
-    # users
-    for username in bag["user"]:
-        try:
-            api_client.delete_user(username)
-        except Exception as e:
-            logging.warning(f"Failed to delete user {username}: {e}")
 
-    # orders
-    for order_id in bag["order"]:
-        try:
-            api_client.delete_order(order_id)
-        except Exception as e:
-            logging.warning(f"Failed to delete order {order_id}: {e}")
-
-
-def get_with_retry(api_client, entity_id, getter=None, field=None, expected=None, expect_deleted=False, attempts=30,
-                   delay=0.5):
+def get_with_retry(api_client, entity_id, getter=None, field=None, expected=None, expect_deleted=False,
+                   timeout=None, attempts=None, delay=None):
     """
     Generic retry that repeatedly checks a resource state via GET.
     Used after POST/PUT/DELETE to wait for the desired result.
 
+    Polls immediately, then with exponential backoff + jitter until the deadline (see utils/waiting.py).
+    The deadline never goes past the test's time budget: then BudgetExceeded is raised (also from make_*).
+
     :param getter: function to fetch the entity (e.g., api_client.get_pet or api_client.get_order)
     :param expect_deleted: if True — wait for 404 (deletion)
+    :param timeout: overall deadline in seconds (default WAIT_TIMEOUT)
+    :param attempts, delay: legacy fixed schedule (attempts polls every delay seconds)
     """
     getter = getter or api_client.get_pet  # default: get_pet
-    resp = None
-    for _ in range(attempts):
-        resp = getter(entity_id)
+    return wait_until(
+        lambda: getter(entity_id),
+        lambda resp: _is_settled(resp, field, expected, expect_deleted),
+        _wait_endpoint(getter, field, expect_deleted),
+        _wait_policy(timeout, attempts, delay),
+    )
+
+
+async def get_with_retry_async(async_api_client, entity_id, getter=None, field=None, expected=None,
+                               expect_deleted=False, timeout=None, attempts=None, delay=None):
+    """
+    Async version of get_with_retry: waits with asyncio.sleep, so many entities
+    can be polled concurrently (e.g. via asyncio.gather) inside one test.
+    """
+    getter = getter or async_api_client.get_pet
+    return await wait_until_async(
+        lambda: getter(entity_id),
+        lambda resp: _is_settled(resp, field, expected, expect_deleted),
+        _wait_endpoint(getter, field, expect_deleted),
+        _wait_policy(timeout, attempts, delay),
+    )
 
-        if expect_deleted and resp.status_code == 404:
-            return resp
 
-        if resp.status_code == 200 and (field is None or resp.json().get(field) == expected):
-            return resp
+def _is_settled(resp, field=None, expected=None, expect_deleted=False):
+    if expect_deleted:
+        return resp.status_code == 404
+    return resp.status_code == 200 and (field is None or resp.json().get(field) == expected)
 
-        time.sleep(delay)
-    return resp
 
+def _wait_endpoint(getter, field=None, expect_deleted=False):
+    """Key under which time-to-consistency is tracked, e.g. 'get_pet', 'get_pet[status]', 'get_pet[deleted]'"""
+    name = getattr(getter, "__name__", str(getter))
+    if expect_deleted:
+        return f"{name}[deleted]"
+    return f"{name}[{field}]" if field else name
 
-def _now_iso():
-    """Returns the current date and time in ISO 8601 (UTC)"""
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _wait_policy(timeout=None, attempts=None, delay=None):
+    if attempts is None and delay is None:
+        return WaitPolicy(timeout=timeout) if timeout else None
+    attempts = attempts or 30
+    delay = 0.5 if delay is None else delay
+    return WaitPolicy(timeout=timeout or attempts * delay, initial_delay=delay, factor=1.0, max_delay=delay,
+                      jitter=0.0, max_polls=attempts)
 
 
 def attach_json(data, name="payload"):
-    """Helper function to attach JSON data to the Allure report"""
+    """
+    Helper function to attach JSON data to the Allure report.
+
+    `data` may also be a zero-argument callable, evaluated only when the attachment is written.
+    Size caps, compression and --attach-mode are applied by utils.attachments.
+    """
     if isinstance(name, str):
         name_str = name
     else:
@@ -210,11 +1159,4 @@ def attach_json(data, name="payload"):
             name_str = json.dumps(name, ensure_ascii=False)
         except Exception:
             name_str = str(name)
-    try:
-        allure.attach(
-            json.dumps(data, ensure_ascii=False, indent=2),
-            name=name_str,
-            attachment_type=allure.attachment_type.JSON
-        )
-    except Exception:
-        allure.attach(str(data), name=name_str, attachment_type=allure.attachment_type.TEXT)
+    ATTACHMENTS.attach(data, name_str)
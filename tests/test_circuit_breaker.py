@@ -0,0 +1,138 @@
+import types
+import pytest
+import allure
+import requests
+from utils import circuit_breaker
+from utils.api_client import PetStoreClient
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(circuit_breaker, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def _response(status_code):
+    return types.SimpleNamespace(status_code=status_code,
+                                 request=types.SimpleNamespace(method="GET", path_url="/v2/pet/1"))
+
+
+def _fail(breaker, times=1):
+    for _ in range(times):
+        breaker.before("GET", "/pet/{petId}")
+        breaker.record_response(_response(503))
+
+
+def _opened(clock):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=30.0)
+    _fail(breaker, 3)
+    assert breaker.state == "open"
+    return breaker
+
+
+@allure.feature("Circuit breaker")
+@allure.story("Opening")
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=30.0)
+    _fail(breaker, 2)
+    breaker.before("GET", "/pet/{petId}")
+    breaker.record_response(_response(200))  # a success resets the count
+    _fail(breaker, 2)
+    assert breaker.state == "closed"
+
+    _fail(breaker)
+    assert breaker.state == "open"
+    assert breaker.reason == "HTTP 503 from GET /v2/pet/1"
+    with pytest.raises(CircuitOpenError, match="next trial in 30s"):
+        breaker.before("GET", "/pet/{petId}")
+    assert breaker.snapshot() == {"trips": 1, "rejected": 1, "recoveries": 0, "state": "open",
+                                  "reason": "HTTP 503 from GET /v2/pet/1"}
+
+
+@allure.feature("Circuit breaker")
+@allure.story("Recovery")
+def test_successful_trial_closes_the_breaker(clock):
+    breaker = _opened(clock)
+    clock.now += 29.9
+    assert breaker.retry_in() == pytest.approx(0.1)
+    with pytest.raises(CircuitOpenError):
+        breaker.before("GET", "/pet/{petId}")
+
+    clock.now += 0.1
+    breaker.before("GET", "/pet/{petId}")  # the trial
+    assert breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError, match="half-open"):
+        breaker.before("GET", "/store/inventory")  # only one trial at a time
+
+    breaker.record_response(_response(404))  # the backend answered: not a failure
+    assert breaker.state == "closed"
+    assert breaker.retry_in() == 0.0
+    breaker.before("GET", "/pet/{petId}")
+    assert breaker.counters["recoveries"] == 1
+
+
+@allure.feature("Circuit breaker")
+@allure.story("Recovery")
+def test_failed_trial_opens_the_breaker_again(clock):
+    breaker = _opened(clock)
+    clock.now += 30.0
+    breaker.before("GET", "/pet/{petId}")
+    breaker.record_failure("ConnectionError on GET /pet/{petId}")
+
+    assert breaker.state == "open"
+    assert breaker.retry_in() == pytest.approx(30.0), "another full reset_timeout"
+    assert breaker.counters["trips"] == 2
+    with pytest.raises(CircuitOpenError):
+        breaker.before("GET", "/pet/{petId}")
+
+
+@allure.feature("Circuit breaker")
+@allure.story("Recovery")
+def test_abandoned_trial_lets_the_next_request_try(clock):
+    breaker = _opened(clock)
+    clock.now += 30.0
+    breaker.before("GET", "/pet/{petId}")
+    breaker.abandon_trial()  # e.g. a cassette miss or Ctrl+C: the backend never saw the request
+
+    assert breaker.state == "half-open"
+    breaker.before("GET", "/pet/{petId}")  # the next request becomes the trial
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@allure.feature("Circuit breaker")
+@allure.story("Recovery")
+def test_client_abandons_the_trial_on_non_backend_errors(clock, monkeypatch):
+    client = PetStoreClient(base_url="http://petstore.invalid/v2", breaker=CircuitBreaker(threshold=1))
+    client.breaker.trip("health probe failed")
+    clock.now += client.breaker.reset_timeout
+
+    errors = [LookupError("no recording for this request")] * 2 + [requests.ConnectionError("refused")]
+
+    def send_limited(method, endpoint, url, **kwargs):
+        raise errors.pop(0)
+
+    monkeypatch.setattr(client, "_send_limited", send_limited)
+    try:
+        for _ in range(2):  # without abandon_trial the second call would be rejected as a second trial
+            with pytest.raises(LookupError):
+                client.get_pet(1)
+
+        with pytest.raises(requests.ConnectionError):
+            client.get_pet(1)
+        assert client.breaker.state == "open"
+    finally:
+        client.close()
+
+
+@allure.feature("Circuit breaker")
+@allure.story("Opening")
+def test_trip_opens_right_away(clock):
+    breaker = CircuitBreaker(threshold=5)
+    breaker.trip("health probe failed: ConnectionError")
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError, match="health probe failed"):
+        breaker.before("POST", "/pet")
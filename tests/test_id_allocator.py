@@ -0,0 +1,81 @@
+import pytest
+import allure
+from utils.id_allocator import (COUNTER_BITS, NONCE_BITS, WORKER_BITS, IdAllocator, split_id, split_username,
+                                worker_index)
+
+LAST_WORKER = (1 << WORKER_BITS) - 1
+LAST_NONCE = (1 << NONCE_BITS) - 1
+
+
+@allure.feature("ID allocation")
+@allure.story("Collision-free IDs")
+def test_ids_are_unique_across_workers_and_runs():
+    allocators = [IdAllocator(nonce, worker) for nonce in (0, 1, LAST_NONCE) for worker in (0, 1, 2, LAST_WORKER)]
+    ids, usernames = set(), set()
+    for allocator in allocators:
+        ids.update(allocator.next_ids(500))
+        ids.update(allocator.next_id() for _ in range(100))
+        ids.add(allocator.id_at((1 << COUNTER_BITS) - 1))  # the very last ID of the worker's range
+        usernames.update(allocator.next_username() for _ in range(100))
+
+    assert len(ids) == len(allocators) * 601
+    assert len(usernames) == len(allocators) * 100
+
+
+@allure.feature("ID allocation")
+@allure.story("Collision-free IDs")
+@pytest.mark.parametrize("nonce, worker", [(0, 0), (12345, 7), (LAST_NONCE, LAST_WORKER)])
+def test_ids_decode_to_their_owner(nonce, worker):
+    allocator = IdAllocator(nonce, worker)
+    allocator.next_ids(3)
+
+    assert split_id(allocator.next_id()) == (nonce, worker, 3)
+    assert split_id(allocator.id_at((1 << COUNTER_BITS) - 1)) == (nonce, worker, (1 << COUNTER_BITS) - 1)
+    assert split_username(allocator.next_username("owner")) == ("owner", nonce, worker, 4)
+
+
+@allure.feature("ID allocation")
+@allure.story("Overflow")
+def test_exhausted_counter_fails_instead_of_wrapping():
+    allocator = IdAllocator(1, 3)
+    block = allocator.next_ids((1 << COUNTER_BITS) - 1)
+    last = allocator.next_id()
+    assert split_id(last) == (1, 3, (1 << COUNTER_BITS) - 1)
+    assert last == block[-1] + 1
+
+    with pytest.raises(RuntimeError, match="exhausted"):
+        allocator.next_id()
+    with pytest.raises(RuntimeError, match="exhausted"):
+        allocator.next_username()
+    with pytest.raises(ValueError, match="counter"):
+        allocator.id_at(1 << COUNTER_BITS)
+    with pytest.raises(ValueError, match="counter"):
+        allocator.username_at(-1)
+
+
+@allure.feature("ID allocation")
+@allure.story("Overflow")
+def test_block_larger_than_the_rest_of_the_range_is_refused():
+    allocator = IdAllocator(1, 3)
+    allocator.next_ids(10)
+    with pytest.raises(RuntimeError, match="exhausted"):
+        allocator.next_ids(1 << COUNTER_BITS)
+    assert allocator.allocated == 10, "a refused block reserves nothing"
+
+
+@allure.feature("ID allocation")
+@allure.story("Overflow")
+@pytest.mark.parametrize("nonce, worker", [(0, LAST_WORKER + 1), (0, -1), (LAST_NONCE + 1, 0), (-1, 0)])
+def test_fields_out_of_range_are_rejected(nonce, worker):
+    with pytest.raises(ValueError, match="bits"):
+        IdAllocator(nonce, worker)
+
+
+@allure.feature("ID allocation")
+@allure.story("Worker index")
+def test_worker_index():
+    assert worker_index("master") == 0
+    assert worker_index("gw0") == 0
+    assert worker_index("gw17") == 17
+    with pytest.raises(ValueError, match="worker index"):
+        IdAllocator(0, worker_index(f"gw{LAST_WORKER + 1}"))
@@ -0,0 +1,64 @@
+import pytest
+import allure
+from utils.perf_gate import compare, format_regression
+
+
+def _run(p95_s=0.100, count=10, test_s=1.0):
+    return {
+        "endpoints": {"GET /store/inventory": {"count": count, "p50_s": 0.050, "p95_s": p95_s}},
+        "tests": {"tests/test_store_inventory.py::test_store_inventory": test_s},
+    }
+
+
+@allure.feature("Performance")
+@allure.story("Regression gate")
+@pytest.mark.parametrize("p95_s, flagged", [(0.129, False), (0.131, True), (0.080, False)])
+def test_tolerance(p95_s, flagged):
+    regressions = compare(_run(), _run(p95_s=p95_s), tolerance=0.3)
+
+    assert [r["metric"] for r in regressions] == (["p95_s"] if flagged else [])
+    if flagged:
+        assert regressions[0]["change"] == pytest.approx(0.31)
+        assert format_regression(regressions[0]).endswith("100.0 ms -> 131.0 ms (+31%)")
+
+
+@allure.feature("Performance")
+@allure.story("Regression gate")
+@pytest.mark.parametrize("baseline_count, current_count, flagged", [(10, 10, True), (4, 10, False), (10, 4, False)])
+def test_min_samples(baseline_count, current_count, flagged):
+    regressions = compare(_run(count=baseline_count), _run(p95_s=0.200, count=current_count), min_samples=5)
+
+    assert bool(regressions) is flagged
+
+
+@allure.feature("Performance")
+@allure.story("Regression gate")
+def test_floor_ignores_small_absolute_differences():
+    baseline = {"endpoints": {"GET /user/logout": {"count": 10, "p50_s": 0.002, "p95_s": 0.004}}, "tests": {}}
+    current = {"endpoints": {"GET /user/logout": {"count": 10, "p50_s": 0.004, "p95_s": 0.008}}, "tests": {}}
+
+    assert compare(baseline, current, floor_s=0.005) == []
+    assert len(compare(baseline, current, floor_s=0.001)) == 2  # +100% on both metrics
+
+
+@allure.feature("Performance")
+@allure.story("Regression gate")
+@pytest.mark.parametrize("before_s, after_s, flagged", [
+    (0.030, 0.045, False),  # +50%, but only 15 ms: jitter of a short test
+    (0.050, 0.140, False),
+    (0.200, 0.310, True),
+    (1.000, 1.250, False),  # within the tolerance
+])
+def test_test_durations_have_their_own_floor(before_s, after_s, flagged):
+    regressions = compare(_run(test_s=before_s), _run(test_s=after_s), tolerance=0.3, test_floor_s=0.1)
+
+    assert [r["kind"] for r in regressions] == (["test"] if flagged else [])
+
+
+@allure.feature("Performance")
+@allure.story("Regression gate")
+def test_new_endpoints_and_tests_are_not_regressions():
+    current = _run(p95_s=10.0, test_s=10.0)
+
+    assert compare({"endpoints": {}, "tests": {}}, current) == []
+    assert compare({}, current) == []
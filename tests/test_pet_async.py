@@ -0,0 +1,35 @@
+import asyncio
+import logging
+import pytest
+import allure
+from conftest import get_with_retry_async, attach_json
+
+PETS_COUNT = 5
+
+
+@allure.feature("Pet")
+@allure.story("Create pets concurrently (async client)")
+@pytest.mark.regression
+@pytest.mark.asyncio
+async def test_pet_create_concurrently(async_api_client, id_allocator, make_pet_async):
+    pet_ids = id_allocator.next_ids(PETS_COUNT)
+    logging.info(f"CREATE (async) pet_ids={pet_ids}")
+
+    with allure.step(f"Create {PETS_COUNT} pets concurrently"):
+        created = await asyncio.gather(*(make_pet_async(pet_id, status="pending") for pet_id in pet_ids))
+        assert created == pet_ids
+
+    try:
+        with allure.step("Read all pets concurrently via GET /pet/{id}"):
+            responses = await asyncio.gather(*(async_api_client.get_pet(pet_id) for pet_id in pet_ids))
+            attach_json([resp.json() for resp in responses], "GET responses")
+            for pet_id, resp in zip(pet_ids, responses):
+                assert resp.status_code == 200
+                assert resp.json()["id"] == pet_id
+                assert resp.json()["status"] == "pending"
+    finally:
+        with allure.step("Delete all pets concurrently and wait for 404"):
+            await asyncio.gather(*(async_api_client.delete_pet(pet_id) for pet_id in pet_ids))
+            await asyncio.gather(*(
+                get_with_retry_async(async_api_client, pet_id, expect_deleted=True) for pet_id in pet_ids
+            ))
@@ -1,7 +1,12 @@
 import logging
 import pytest
 import allure
+from urllib.parse import urlsplit
 from conftest import get_with_retry, attach_json
+from utils.api_client import PetStoreClient
+from utils.cassette import Cassette, replayed
+from utils.id_allocator import IdAllocator, new_run_nonce
+from utils.payloads import pet_payload
 
 
 @allure.feature("Pet")
@@ -24,10 +29,30 @@ def test_pet_create(api_client, unique_pet_id, make_pet, cleanup):
         assert body["status"] == "available"
 
 
+@allure.feature("Pet")
+@allure.story("Create pets in bulk")
+@pytest.mark.regression
+def test_pet_create_bulk(api_client, id_allocator, make_pets, cleanup):
+    pet_ids = id_allocator.next_ids(5)
+    logging.info(f"CREATE (bulk) pet_ids={pet_ids}")
+    with allure.step(f"CREATE {len(pet_ids)} pets and wait until all are readable"):
+        created = make_pets(pet_ids, status="pending")
+        # add items to cleanup
+        cleanup["pet"].extend(created)
+        assert created == pet_ids
+
+    with allure.step("GET every created pet"):
+        for pet_id in pet_ids:
+            resp = api_client.get_pet(pet_id)
+            assert resp.status_code == 200
+            assert resp.json()["status"] == "pending"
+
+
 @allure.feature("Pet")
 @allure.story("Get pet")
 @pytest.mark.regression
-def test_pet_get(api_client, pet_id):
+def test_pet_get(api_client, pooled_pet):
+    pet_id = pooled_pet["id"]
     with allure.step(f"GET pet_id={pet_id}"):
         logging.info(f"GET pet_id={pet_id}")
         resp = get_with_retry(api_client, pet_id)
@@ -81,6 +106,44 @@ def test_pet_update_status(api_client, unique_pet_id, make_pet, cleanup, initial
             assert resp.json()["status"] == updated_status
 
 
+@allure.feature("Pet")
+@allure.story("Replay pet traffic from a cassette")
+@pytest.mark.regression
+def test_pet_replay_from_cassette(api_client, id_allocator, tmp_path, cleanup):
+    """Create + GET recorded through a cassette are served again without a server, with the IDs of the new run"""
+    if api_client.cassette is not None and api_client.cassette.replaying:
+        pytest.skip("needs a real server to record from")
+
+    def create_and_get(client, allocator):
+        client.cassette.begin("create_and_get")
+        pet_id = allocator.next_id()
+        assert client.add_pet(pet_payload(pet_id, status="sold")).status_code in (200, 201)
+        resp = get_with_retry(client, pet_id)
+        client.cassette.end()
+        return pet_id, resp
+
+    with allure.step("Record against the server"):
+        with PetStoreClient(base_url=api_client.base_url,
+                            cassette=Cassette(str(tmp_path), "record", id_allocator)) as client:
+            recorded_id, resp = create_and_get(client, id_allocator)
+            cleanup["pet"].append(recorded_id)
+            assert resp.status_code == 200
+            client.cassette.close()
+
+    with allure.step("Replay in strict mode with an unreachable server and another run's IDs"):
+        allocator = IdAllocator(new_run_nonce())
+        unreachable = api_client.base_url.replace(urlsplit(api_client.base_url).netloc, "127.0.0.1:9")
+        with PetStoreClient(base_url=unreachable,
+                            cassette=Cassette(str(tmp_path), "strict", allocator)) as client:
+            pet_id, resp = create_and_get(client, allocator)
+            assert replayed(resp)
+            attach_json("Replayed body", resp.json())
+            assert resp.status_code == 200
+            assert pet_id != recorded_id
+            assert resp.json()["id"] == pet_id
+            assert resp.json()["status"] == "sold"
+
+
 # For flaky use pytest-rerunfailures:
 @allure.feature("Pet")
 @allure.story("Delete pet (flaky public stand)")
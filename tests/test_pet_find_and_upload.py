@@ -1,7 +1,9 @@
+import io
 import logging
 import pytest
 import allure
 from conftest import get_with_retry, attach_json
+from utils.waiting import wait_until
 
 
 # On the public Petstore, POST /pet/{petId} via form-data does not accept partial updates (only name or only status)
@@ -63,8 +65,16 @@ def test_pet_update_via_form(api_client, unique_pet_id, make_pet, new_name, new_
 @pytest.mark.flaky(reruns=2, reruns_delay=1)
 @allure.feature("Pet")
 @allure.story("Upload pet image")
-def test_pet_upload_image(api_client, unique_pet_id, make_pet, temp_image_file, cleanup):
-    logging.info(f"[UPLOAD] START pet_id={unique_pet_id}")
+@pytest.mark.parametrize("source", ["bytes", "memoryview", "file", "generator", "path"])
+def test_pet_upload_image(api_client, unique_pet_id, make_pet, stub_image, source, request, cleanup):
+    logging.info(f"[UPLOAD] START pet_id={unique_pet_id} source={source}")
+    image = {
+        "bytes": lambda: stub_image,
+        "memoryview": lambda: memoryview(stub_image),
+        "file": lambda: io.BytesIO(stub_image),
+        "generator": lambda: (stub_image[i:i + 32] for i in range(0, len(stub_image), 32)),  # chunked upload
+        "path": lambda: request.getfixturevalue("temp_image_file"),
+    }[source]()
     with allure.step("Create a pet before uploading image"):
         make_pet(unique_pet_id, status="available", name="Gosha")
 
@@ -72,7 +82,7 @@ def test_pet_upload_image(api_client, unique_pet_id, make_pet, temp_image_file,
         cleanup["pet"].append(unique_pet_id)
 
     with allure.step("Upload pet image via POST /pet/{id}/uploadImage"):
-        resp = api_client.upload_pet_image(unique_pet_id, temp_image_file)
+        resp = api_client.upload_pet_image(unique_pet_id, image, additional_metadata="test metadata")
         attach_json("Upload response", resp.json())
     assert resp.status_code == 200, "Error uploading image"
     msg = (resp.json().get("message") or "").lower()
@@ -80,3 +90,45 @@ def test_pet_upload_image(api_client, unique_pet_id, make_pet, temp_image_file,
     assert ("test metadata" in msg) or (str(unique_pet_id) in msg) or ("uploaded" in msg)
 
     logging.info("[UPLOAD] DONE")
+
+
+@pytest.mark.regression
+@allure.feature("Pet")
+@allure.story("Find pet by status (streaming)")
+def test_pet_find_by_status_streaming(api_client, unique_pet_id, make_pet, cleanup):
+    logging.info(f"[FIND-STREAM] START pet_id={unique_pet_id}")
+    with allure.step("Create a pet with status pending"):
+        make_pet(unique_pet_id, status="pending", name="Stream")
+        cleanup["pet"].append(unique_pet_id)
+
+    with allure.step("Stream GET /pet/findByStatus until the pet is seen"):
+        pet = wait_until(lambda: api_client.find_pet_in_status("pending", unique_pet_id),
+                         lambda found: found is not None, "find_pet_in_status")
+        attach_json(pet, "Found pet")
+    assert pet is not None, "Pet not found in findByStatus=pending"
+    assert pet["status"] == "pending"
+    assert pet["name"] == "Stream"
+
+    logging.info("[FIND-STREAM] DONE")
+
+
+@pytest.mark.regression
+@allure.feature("Pet")
+@allure.story("Find pet by status (columnar)")
+def test_pet_find_by_status_columns(api_client, unique_pet_id, make_pet, cleanup):
+    logging.info(f"[FIND-COLUMNS] START pet_id={unique_pet_id}")
+    with allure.step("Create a pet with status sold"):
+        make_pet(unique_pet_id, status="sold", name="Columns")
+        cleanup["pet"].append(unique_pet_id)
+
+    with allure.step("Decode GET /pet/findByStatus into PetColumns"):
+        pets = wait_until(lambda: api_client.find_pet_columns("sold"),
+                          lambda found: found.index_of(unique_pet_id) >= 0, "find_pet_columns")
+    pet = pets[pets.index_of(unique_pet_id)]
+    attach_json(pet.to_dict(), "Found pet")
+    assert set(pets.statuses) == {"sold"}, f"Unexpected statuses: {pets.count_by_status()}"
+    assert pet.name == "Columns"
+    assert pet.category.name == "cats"
+    assert [tag.name for tag in pet.tags] == ["cute"]
+
+    logging.info("[FIND-COLUMNS] DONE")
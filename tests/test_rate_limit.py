@@ -0,0 +1,111 @@
+import io
+import os
+import subprocess
+import sys
+import pytest
+import allure
+import requests
+from utils import rate_limit
+from utils.api_client import PetStoreClient
+from utils.budget import Budget, BudgetExceeded
+from utils.rate_limit import RateLimiter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# another worker: takes a write token and holds a write slot until told to let go
+WORKER = """
+import sys
+from utils.rate_limit import RateLimiter
+limiter = RateLimiter({"write": (float(sys.argv[2]), int(sys.argv[3]) or None)}, sys.argv[1])
+release = limiter.acquire("POST")
+print("ready", flush=True)
+sys.stdin.readline()
+release()
+"""
+
+pytestmark = pytest.mark.skipif(rate_limit.fcntl is None, reason="limits are shared through flock")
+
+
+@pytest.fixture
+def other_worker(tmp_path):
+    processes = []
+
+    def start(rate, in_flight):
+        process = subprocess.Popen([sys.executable, "-c", WORKER, str(tmp_path), str(rate), str(in_flight)],
+                                   cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        processes.append(process)
+        assert process.stdout.readline().strip() == "ready"
+        return process
+
+    yield start
+    for process in processes:
+        if process.returncode is None:
+            process.communicate("\n", timeout=10)
+
+
+def _with_budget(seconds, fn, *args):
+    token = Budget(seconds).activate()
+    try:
+        return fn(*args)
+    finally:
+        Budget.deactivate(token)
+
+
+@allure.feature("Rate limiting")
+@allure.story("Shared between processes")
+def test_in_flight_slot_is_shared_between_processes(tmp_path, other_worker):
+    worker = other_worker(rate=0, in_flight=1)
+    limiter = RateLimiter({"write": (0, 1)}, str(tmp_path))
+    try:
+        with pytest.raises(BudgetExceeded, match="in-flight slot"):
+            _with_budget(0.3, limiter.acquire, "POST")
+
+        worker.communicate("\n", timeout=10)  # the other worker's request is done
+        release = _with_budget(5.0, limiter.acquire, "POST")
+        release()
+        release()  # idempotent
+        assert limiter.stats()["write"]["requests"] == 1
+    finally:
+        limiter.close()
+
+
+@allure.feature("Rate limiting")
+@allure.story("Shared between processes")
+def test_token_bucket_is_shared_between_processes(tmp_path, other_worker):
+    other_worker(rate=1, in_flight=0)  # takes the only token of the 1/s bucket
+    limiter = RateLimiter({"write": (1, None)}, str(tmp_path))
+    try:
+        with pytest.raises(BudgetExceeded, match="token"):
+            _with_budget(0.3, limiter.acquire, "POST")
+        assert limiter.stats() == {}, "a request refused by the budget was never sent"
+
+        _with_budget(5.0, limiter.acquire, "POST")
+        assert limiter.stats()["write"]["throttled"] == 1
+    finally:
+        limiter.close()
+
+
+@allure.feature("Rate limiting")
+@allure.story("In-flight limit")
+@pytest.mark.parametrize("stream", [False, True])
+def test_streamed_response_holds_its_slot_until_closed(tmp_path, monkeypatch, stream):
+    def send_timed(method, endpoint, url, **kwargs):
+        resp = requests.Response()
+        resp.status_code, resp.raw = 200, io.BytesIO(b"[]")
+        return resp
+
+    client = PetStoreClient(base_url="http://petstore.invalid/v2",
+                            limiter=RateLimiter({"read": (0, 1)}, str(tmp_path)))
+    monkeypatch.setattr(client, "_send_timed", send_timed)
+    other = RateLimiter({"read": (0, 1)}, str(tmp_path))  # own lock files, like another worker
+    try:
+        resp = client._request("GET", "/pet/findByStatus", params={"status": "sold"}, stream=stream)
+        if stream:
+            with pytest.raises(BudgetExceeded, match="in-flight slot"):
+                _with_budget(0.2, other.acquire, "GET")
+            resp.close()
+        _with_budget(5.0, other.acquire, "GET")()
+    finally:
+        other.close()
+        client.limiter.close()
+        client.close()
@@ -0,0 +1,151 @@
+import types
+import pytest
+import allure
+from utils import read_cache
+from utils.api_client import PetStoreClient
+from utils.read_cache import ReadCache
+
+INVENTORY = "/store/inventory"
+
+
+class StubServer:
+    """send(extra_headers) for ReadCache.get: counts the GETs that reached the 'server'"""
+
+    def __init__(self, body=b'{"available": 1}', etag=None, status_code=200):
+        self.body, self.etag, self.status_code = body, etag, status_code
+        self.requests = []
+
+    def send(self, headers):
+        self.requests.append(headers)
+        if self.etag is not None and headers.get("If-None-Match") == self.etag:
+            return types.SimpleNamespace(status_code=304, content=b"", headers={"ETag": self.etag})
+        return types.SimpleNamespace(status_code=self.status_code, content=self.body,
+                                     headers={"ETag": self.etag} if self.etag else {})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(read_cache, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@allure.feature("Read cache")
+@allure.story("Hits")
+def test_repeated_gets_are_served_from_the_cache(clock):
+    cache, server = ReadCache(), StubServer()
+
+    first = cache.get(INVENTORY, INVENTORY, server.send)
+    clock.now += 4.9
+    assert cache.get(INVENTORY, INVENTORY, server.send) is first
+
+    assert len(server.requests) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "revalidated": 0, "invalidations": 0, "evictions": 0,
+                             "entries": 1}
+
+
+@allure.feature("Read cache")
+@allure.story("Invalidation")
+@pytest.mark.parametrize("write, stale", [
+    ("/pet", True),  # inventory is computed from pet statuses
+    ("/pet/{petId}", True),
+    ("/store/order", True),
+    ("/user", False),
+])
+def test_writes_invalidate_their_resource_family(clock, write, stale):
+    cache, server = ReadCache(), StubServer()
+    cache.get(INVENTORY, INVENTORY, server.send)
+
+    cache.invalidate(write)
+    cache.get(INVENTORY, INVENTORY, server.send)
+
+    assert len(server.requests) == (2 if stale else 1)
+    assert cache.stats()["invalidations"] == (1 if stale else 0)
+
+
+@allure.feature("Read cache")
+@allure.story("Invalidation")
+def test_client_write_invalidates_its_own_cached_reads(clock, monkeypatch):
+    server = StubServer()
+    sent = []
+
+    def send(method, endpoint, url, headers=None, **kwargs):
+        sent.append((method, endpoint))
+        return server.send(headers or {})
+
+    client = PetStoreClient(base_url="http://petstore.invalid/v2", read_cache=ReadCache())
+    monkeypatch.setattr(client, "_send", send)
+    try:
+        client.get_inventory()
+        client.get_inventory()
+        client.add_pet({"id": 1, "name": "doggie", "status": "available"})
+        client.get_inventory()
+    finally:
+        client.close()
+
+    assert sent == [("GET", INVENTORY), ("POST", "/pet/"), ("GET", INVENTORY)]
+
+
+@allure.feature("Read cache")
+@allure.story("Revalidation")
+def test_expired_entry_is_revalidated_with_etag(clock):
+    cache, server = ReadCache(), StubServer(etag='"v1"')
+    first = cache.get(INVENTORY, INVENTORY, server.send)
+
+    clock.now += 5.1
+    assert cache.get(INVENTORY, INVENTORY, server.send) is first, "304 reuses the cached response"
+    assert server.requests == [{}, {"If-None-Match": '"v1"'}]
+
+    clock.now += 1.0
+    cache.get(INVENTORY, INVENTORY, server.send)
+    assert len(server.requests) == 2, "a revalidated entry is fresh for another TTL"
+    assert cache.stats()["revalidated"] == 1
+
+
+@allure.feature("Read cache")
+@allure.story("Revalidation")
+def test_expired_entry_is_revalidated_by_content_hash(clock):
+    cache, server = ReadCache(), StubServer()
+    first = cache.get(INVENTORY, INVENTORY, server.send)
+
+    clock.now += 5.1
+    assert cache.get(INVENTORY, INVENTORY, server.send) is first, "same body -> cached response is kept"
+    assert cache.stats()["revalidated"] == 1
+
+    clock.now += 5.1
+    server.body = b'{"available": 2}'
+    changed = cache.get(INVENTORY, INVENTORY, server.send)
+    assert changed is not first
+    assert changed.content == b'{"available": 2}'
+    assert len(server.requests) == 3
+
+
+@allure.feature("Read cache")
+@allure.story("Misses")
+def test_errors_and_uncached_endpoints_go_to_the_server(clock):
+    cache = ReadCache()
+    server = StubServer(status_code=503)
+    cache.get(INVENTORY, INVENTORY, server.send)
+    cache.get(INVENTORY, INVENTORY, server.send)
+    assert len(server.requests) == 2, "error responses are not cached"
+
+    assert not cache.cacheable("/pet/{petId}")
+    with cache.bypass():
+        assert not cache.cacheable(INVENTORY)
+    assert cache.cacheable(INVENTORY)
+
+
+@allure.feature("Read cache")
+@allure.story("Size limit")
+def test_least_recently_used_entry_is_evicted(clock):
+    cache, server = ReadCache(ttls={"/pet/findByStatus": 5.0}, max_entries=2), StubServer()
+    for status in ("available", "pending"):
+        cache.get("/pet/findByStatus", status, server.send)
+    cache.get("/pet/findByStatus", "available", server.send)  # now the most recently used
+    cache.get("/pet/findByStatus", "sold", server.send)
+
+    cache.get("/pet/findByStatus", "available", server.send)
+    assert len(server.requests) == 3
+    cache.get("/pet/findByStatus", "pending", server.send)
+    assert len(server.requests) == 4
+    assert cache.stats()["evictions"] == 2
@@ -2,6 +2,7 @@ import logging
 import pytest
 import allure
 from conftest import attach_json
+from utils.waiting import wait_until
 
 
 @allure.feature("Store")
@@ -31,3 +32,29 @@ def test_store_inventory(api_client):
         for known in ("available", "pending", "sold"):
             if known in body:
                 assert isinstance(body[known], int)
+
+
+@allure.feature("Store")
+@allure.story("Inventory reflects a new pet")
+@pytest.mark.regression
+@pytest.mark.no_cache
+def test_store_inventory_reflects_new_pet(api_client, unique_pet_id, make_pet, cleanup):
+    """
+    A pet with a status unique to this test must show up in GET /store/inventory as {status: 1}
+    """
+    status = f"status_{unique_pet_id}"
+    with allure.step("Read inventory before creating the pet"):
+        resp = api_client.get_inventory()
+        assert resp.status_code == 200
+        assert status not in resp.json()
+
+    with allure.step(f"Create pet with status {status}"):
+        make_pet(unique_pet_id, status=status)
+        cleanup["pet"].append(unique_pet_id)
+
+    with allure.step("Inventory contains the new status"):
+        resp = wait_until(api_client.get_inventory,
+                          lambda r: r.status_code == 200 and r.json().get(status) == 1,
+                          "get_inventory")
+        assert resp.status_code == 200
+        assert resp.json().get(status) == 1
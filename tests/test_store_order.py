@@ -30,21 +30,17 @@ def test_order_create(api_client, unique_order_id, unique_pet_id, make_order, cl
 @allure.feature("Store")
 @allure.story("Get order by id")
 @pytest.mark.regression
-def test_order_get(api_client, unique_order_id, unique_pet_id, make_order, cleanup):
-    logging.info(f"GET order_id={unique_order_id}")
-    with allure.step("Create order via POST /store/order"):
-        make_order(unique_order_id, unique_pet_id, status="placed", complete=True)
-        # add element to cleanup
-        cleanup["order"].append(unique_order_id)
-
-    with allure.step("Check order via GET /store/order/{id}"):
-        resp = api_client.get_order(unique_order_id)
+def test_order_get(api_client, pooled_order):
+    order_id = pooled_order["id"]
+    logging.info(f"GET order_id={order_id}")
+    with allure.step("Check shared order via GET /store/order/{id}"):
+        resp = api_client.get_order(order_id)
         assert resp.status_code in (200, 404), f"Unexpected code on GET: {resp.status_code}"
         if resp.status_code == 200:
             attach_json("GET /order response", resp.json())
             body = resp.json()
-            assert body.get("id") == unique_order_id
-            assert body.get("petId") == unique_pet_id
+            assert body.get("id") == order_id
+            assert body.get("petId") == pooled_order["petId"]
             assert isinstance(body.get("complete"), bool)
 
 
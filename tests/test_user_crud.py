@@ -26,16 +26,33 @@ def test_user_create(api_client, unique_user_id, unique_username, make_user, cle
 
 
 @allure.feature("User")
-@allure.story("Get user by username")
+@allure.story("Create users in bulk (createWithList)")
 @pytest.mark.regression
-def test_user_get(api_client, unique_user_id, unique_username, make_user, cleanup):
-    logging.info(f"GET user: username={unique_username}")
-    with allure.step("Create user via POST /user"):
-        username = make_user(id=unique_user_id, username=unique_username, userStatus=0)
-        # add element to cleanup
-        cleanup["user"].append(username)
+def test_user_create_bulk(api_client, id_allocator, user_batch, cleanup):
+    user_ids = id_allocator.next_ids(7)
+    with allure.step(f"Buffer {len(user_ids)} users and flush them via POST /user/createWithList"):
+        for user_id in user_ids:
+            user_batch.add(user_id, id_allocator.next_username(), userStatus=1)
+        usernames = user_batch.flush()
+        # add items to cleanup
+        cleanup["user"].extend(usernames)
+        logging.info(f"CREATE (bulk) usernames={usernames} batches={user_batch.batches}")
+        assert len(usernames) == len(user_ids)
+
+    with allure.step("GET every created user"):
+        for username in usernames:
+            resp = api_client.get_user(username)
+            assert resp.status_code == 200
+            assert resp.json()["userStatus"] == 1
 
-    with allure.step("Ensure user is readable via GET /user/{username}"):
+
+@allure.feature("User")
+@allure.story("Get user by username")
+@pytest.mark.regression
+def test_user_get(api_client, pooled_user):
+    username = pooled_user["username"]
+    logging.info(f"GET user: username={username}")
+    with allure.step("Ensure shared user is readable via GET /user/{username}"):
         resp = get_with_retry(api_client, username, getter=api_client.get_user)
         attach_json("GET /user response", resp.json())
         assert resp.status_code == 200, "User not found"
@@ -1,9 +1,9 @@
 import logging
 import pytest
 import allure
-from conftest import get_with_retry, attach_json
+from conftest import attach_json
+from utils.payloads import DEFAULT_PASSWORD
 
-PASSWORD_OK = "p@ssw0rd!"
 PASSWORD_BAD = "wrong_pass!"
 
 
@@ -20,25 +20,16 @@ PASSWORD_BAD = "wrong_pass!"
 @pytest.mark.regression
 @allure.feature("User")
 @allure.story("User login (parametrized)")
-def test_user_login(api_client, unique_user_id, unique_username,
-                                 valid_username, valid_password, expected_codes,
-                                 make_user, cleanup):
-    logging.info(f"--- TEST STARTED (id={unique_user_id}, username={unique_username}) ---")
-
-    # Preparation: create a real user if the scenario requires it
-    real_username = unique_username
-    real_password = PASSWORD_OK
-
+def test_user_login(api_client, unique_username, valid_username, valid_password, expected_codes, request):
     if valid_username:
-        with allure.step("Create test user"):
-            make_user(id=unique_user_id, username=real_username, userStatus=0)
-            # add item to cleanup
-            cleanup["user"].append(real_username)
-            # wait for availability via GET
-            assert get_with_retry(api_client, real_username, getter=api_client.get_user).status_code == 200
-            attach_json("Created user", {"username": real_username})
+        # A real user comes from the shared pool (login does not modify it); only leased when logged in as
+        real_user = request.getfixturevalue("pooled_user")
+        attach_json("Leased user", {"username": real_user["username"]})
+        username, real_password = real_user["username"], real_user["password"]
+    else:
+        username, real_password = f"{unique_username}_invalid", DEFAULT_PASSWORD
+    logging.info(f"--- TEST STARTED (username={username}) ---")
 
-    username = real_username if valid_username else f"{unique_username}_invalid"
     password = real_password if valid_password else PASSWORD_BAD
 
     with allure.step("Perform login request"):
@@ -0,0 +1,214 @@
+import random
+import time
+import types
+import pytest
+import allure
+from utils import budget as budgets, waiting
+from utils.budget import Budget, BudgetExceeded
+from utils.waiting import WaitPolicy, WaitStats, wait_all, wait_until
+
+NO_JITTER = WaitPolicy(jitter=0.0)
+
+
+class FakeClock:
+    """time.monotonic / time.sleep of utils.waiting: sleeping only moves the clock"""
+
+    def __init__(self):
+        self.now = time.monotonic()  # the test's own budget keeps counting in real time
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    fake_time = types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep)
+    monkeypatch.setattr(waiting, "time", fake_time)
+    monkeypatch.setattr(budgets, "time", fake_time)
+    monkeypatch.setattr(waiting, "random", random.Random(7))  # reproducible jitter
+    return clock
+
+
+def _wait_for_delay(clock, stats, delay, latency=0.005):
+    """One wait on an entity that becomes readable `delay` seconds after the wait starts"""
+    created = clock.now
+
+    def fetch():
+        clock.now += latency
+        return clock.now - created >= delay
+
+    return wait_until(fetch, bool, "get_pet", stats=stats)
+
+
+@allure.feature("Waiting")
+@allure.story("Time-to-consistency hint")
+def test_hint_converges_to_fixed_delay(clock):
+    stats = WaitStats()
+    for _ in range(25):
+        assert _wait_for_delay(clock, stats, 0.2)
+
+    assert stats.hint("get_pet") == pytest.approx(0.2, abs=0.02)
+    assert stats.snapshot()["get_pet"]["ttc_s"] == pytest.approx(0.2, abs=0.02)
+
+
+@allure.feature("Waiting")
+@allure.story("Time-to-consistency hint")
+def test_hint_comes_down_when_the_endpoint_gets_faster(clock):
+    stats = WaitStats()
+    for _ in range(20):
+        _wait_for_delay(clock, stats, 0.4)
+    assert stats.hint("get_pet") == pytest.approx(0.4, abs=0.04)
+
+    for _ in range(25):
+        _wait_for_delay(clock, stats, 0.2)
+    assert stats.hint("get_pet") == pytest.approx(0.2, abs=0.02)
+
+
+@allure.feature("Waiting")
+@allure.story("Time-to-consistency hint")
+def test_no_hint_when_most_waits_are_immediate(clock):
+    stats = WaitStats()
+    for delay in (0.0, 0.0, 0.0, 0.3):
+        _wait_for_delay(clock, stats, delay)
+
+    assert stats.hint("get_pet") is None
+    assert stats.snapshot()["get_pet"]["ttc_s"] == 0.0
+
+
+class Replayed:
+    from_cassette = True
+
+
+def _never(clock, latency=0.005):
+    def fetch():
+        clock.now += latency
+        return False
+
+    return fetch
+
+
+@allure.feature("Waiting")
+@allure.story("Polling schedule")
+def test_backoff_schedule(clock):
+    stats = WaitStats()
+    started = clock.now
+    polls = []
+
+    def fetch():
+        polls.append(clock.now - started)
+        return len(polls) == 8
+
+    assert wait_until(fetch, bool, "get_pet", policy=NO_JITTER, stats=stats)
+    assert polls[0] == 0.0, "the first poll is never delayed"
+    assert clock.sleeps == pytest.approx([0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 2.0])
+    assert stats.snapshot()["get_pet"]["polls"] == 8
+
+
+@allure.feature("Waiting")
+@allure.story("Polling schedule")
+def test_deadline_ends_the_wait(clock):
+    stats = WaitStats()
+    started = clock.now
+
+    assert wait_until(_never(clock), bool, "get_pet", policy=WaitPolicy(timeout=3.0), stats=stats) is False
+    assert clock.now - started == pytest.approx(3.0, abs=0.05), "the last sleep is cut at the deadline"
+    snapshot = stats.snapshot()["get_pet"]
+    assert snapshot["timeouts"] == 1
+    assert snapshot["ttc_s"] is None
+
+
+@allure.feature("Waiting")
+@allure.story("Polling schedule")
+def test_max_polls_caps_the_wait(clock):
+    stats = WaitStats()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return False
+
+    assert wait_until(fetch, bool, "get_pet", policy=WaitPolicy(max_polls=3), stats=stats) is False
+    assert len(calls) == 3
+    assert len(clock.sleeps) == 2
+    assert stats.snapshot()["get_pet"]["timeouts"] == 1
+
+
+@allure.feature("Waiting")
+@allure.story("Time budget")
+def test_budget_cuts_the_wait_short(clock):
+    stats = WaitStats()
+    started = clock.now
+    token = Budget(2.0).activate()
+    try:
+        with pytest.raises(BudgetExceeded, match="waiting for get_pet"):
+            wait_until(_never(clock), bool, "get_pet", stats=stats)
+    finally:
+        Budget.deactivate(token)
+
+    assert clock.now - started <= 2.0
+    assert stats.snapshot()["get_pet"]["timeouts"] == 1
+
+
+@allure.feature("Waiting")
+@allure.story("Cassette replay")
+def test_replayed_responses_are_not_slept_on(clock):
+    stats = WaitStats()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return Replayed()
+
+    result = wait_until(fetch, lambda resp: False, "get_pet", policy=WaitPolicy(timeout=3.0), stats=stats)
+    assert isinstance(result, Replayed)
+    assert clock.sleeps == []
+    assert 1 < len(calls) < 20, "the deadline still moves by the skipped sleeps"
+
+
+@allure.feature("Waiting")
+@allure.story("Batch waits")
+def test_wait_all_does_not_hold_back_ready_entities(clock):
+    stats = WaitStats()
+    started = clock.now
+    calls = {"fast": 0, "slow": 0}
+
+    def get(entity_id):
+        calls[entity_id] += 1
+        return clock.now - started >= (0.0 if entity_id == "fast" else 0.3)
+
+    results = wait_all([(get, "fast", bool, "fast"), (get, "slow", bool, "slow")], policy=NO_JITTER, stats=stats)
+
+    assert results == [True, True]
+    assert calls["fast"] == 1, "a ready entity is not polled again"
+    assert calls["slow"] == 4  # 0, 0.05, 0.15, 0.35
+    snapshot = stats.snapshot()
+    assert snapshot["fast"]["polls"] == 1
+    assert snapshot["slow"]["polls"] == 4
+    assert snapshot["slow"]["slept_s"] == pytest.approx(0.35 / 2), "the shared sleeps are split between entities"
+
+
+@allure.feature("Waiting")
+@allure.story("Batch waits")
+def test_wait_all_deadline_and_budget(clock):
+    stats = WaitStats()
+
+    def get(entity_id):
+        return entity_id == "ready"
+
+    results = wait_all([(get, "ready", bool, "e"), (get, "stuck", bool, "e")],
+                       policy=WaitPolicy(timeout=1.0), stats=stats)
+    assert results == [True, False]
+    assert stats.snapshot()["e"]["timeouts"] == 1
+
+    token = Budget(0.5).activate()
+    try:
+        with pytest.raises(BudgetExceeded, match="1 of 2 entities"):
+            wait_all([(get, "ready", bool, "e"), (get, "stuck", bool, "e")], stats=stats)
+    finally:
+        Budget.deactivate(token)
@@ -1,36 +1,265 @@
 import os
+import time
+import weakref
 import requests
-from dotenv import load_dotenv
 
-# Loading variables from .env
-load_dotenv()
+from utils.budget import current_budget
+from utils.instrumentation import TimedHTTPAdapter, start_timing, stop_timing
+from utils.json_stream import iter_json_array
+from utils.models import PetColumns
+from utils.multipart import CHUNK_SIZE, MultipartBody
+from utils.settings import load_env
+
+# Loading variables from .env (once per run: xdist workers inherit them)
+load_env()
 
 BASE_URL = os.getenv("BASE_URL")
 
+# Connection pool settings (can be overridden in .env or per client)
+POOL_CONNECTIONS = int(os.getenv("POOL_CONNECTIONS", "4"))  # number of per-host pools kept alive
+POOL_MAXSIZE = int(os.getenv("POOL_MAXSIZE", "16"))  # max keep-alive connections per host
+
+# (connect, read) timeouts in seconds; "default" applies to endpoints without their own entry
+DEFAULT_TIMEOUTS = {
+    "default": (float(os.getenv("CONNECT_TIMEOUT", "3.05")), float(os.getenv("READ_TIMEOUT", "15"))),
+    "/pet/findByStatus": (3.05, 30.0),  # large body
+    "/pet/{petId}/uploadImage": (3.05, 60.0),
+}
+
+
+def parse_timeouts(lines):
+    """['default = 3:15', '/pet/findByStatus = 3:30'] -> {"default": (3.0, 15.0), ...}"""
+    timeouts = {}
+    for line in lines:
+        endpoint, _, value = line.partition("=")
+        connect, _, read = value.partition(":")
+        if not endpoint.strip() or not connect.strip():
+            raise ValueError(f"Bad timeout {line!r}, expected ENDPOINT = CONNECT[:READ]")
+        timeouts[endpoint.strip()] = (float(connect), float(read or connect))
+    return timeouts
+
 
 class PetStoreClient:
 
-    def __init__(self):
-        if not BASE_URL:
+    def __init__(self, base_url=None, pool_connections=None, pool_maxsize=None, pool_block=False, read_cache=None,
+                 limiter=None, breaker=None, timeouts=None, cassette=None):
+        base_url = base_url or BASE_URL
+        if not base_url:
             raise ValueError("BASE_URL not found in file .env")
-        self.base_url = BASE_URL
+        self.base_url = base_url.rstrip("/")
+        self.session = self._make_session(
+            pool_connections or POOL_CONNECTIONS,
+            pool_maxsize or POOL_MAXSIZE,
+            pool_block,
+            cassette,
+        )
+        self.listeners = []  # callables receiving a timing record for every request
+        self.read_cache = read_cache  # optional utils.read_cache.ReadCache for idempotent GETs
+        self.limiter = limiter  # optional utils.rate_limit.RateLimiter shared by xdist workers
+        self.breaker = breaker  # optional utils.circuit_breaker.CircuitBreaker
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}  # endpoint -> (connect, read)
+        self.cassette = cassette  # optional utils.cassette.Cassette recording/replaying the traffic
+
+    @staticmethod
+    def _make_session(pool_connections, pool_maxsize, pool_block, cassette=None):
+        """
+        One pooled session per client (i.e. per xdist worker, since api_client is session-scoped).
+        Connections are kept alive and reused per host instead of opening a new TCP/TLS connection on every call.
+        A cassette wraps the adapter: it records what goes over the wire or replays it without sending.
+        """
+        session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        if cassette is not None:
+            adapter = cassette.adapter(adapter)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def add_listener(self, listener):
+        """
+        Register listener(record) called after every request with:
+        method, endpoint (templated, e.g. /pet/{petId}), status (None on connection error),
+        bytes_out, bytes_in, dns_s, connect_s (both 0 for a reused connection), ttfb_s, total_s
+        """
+        self.listeners.append(listener)
+
+    def _request(self, method, endpoint, path=None, **kwargs):
+        """
+        Single entry point for all HTTP calls of the client.
+
+        :param endpoint: templated path, e.g. "/pet/{petId}"
+        :param path: values for the template placeholders, e.g. {"petId": 1}
+        """
+        url = f"{self.base_url}{endpoint.format(**path) if path else endpoint}"
+        if self.read_cache is None:
+            return self._send(method, endpoint, url, **kwargs)
+
+        if method == "GET" and not kwargs.get("stream") and self.read_cache.cacheable(endpoint):
+            key = (url, tuple(sorted((k, str(v)) for k, v in (kwargs.get("params") or {}).items())))
+            return self.read_cache.get(
+                endpoint, key, lambda headers: self._send(method, endpoint, url, headers=headers, **kwargs)
+            )
+        try:
+            return self._send(method, endpoint, url, **kwargs)
+        finally:
+            if method != "GET":
+                self.read_cache.invalidate(endpoint)
+
+    def _send(self, method, endpoint, url, **kwargs):
+        """
+        Performs the HTTP call (unless the circuit breaker is open, once the rate limiter allows it)
+        and reports its timing record to the listeners.
+
+        Every call gets (connect, read) timeouts for its endpoint, capped by the time left in the
+        test budget; a spent budget raises BudgetExceeded without sending anything.
+        """
+        budget = current_budget()
+        timeout = kwargs.get("timeout") or self.timeouts.get(endpoint, self.timeouts["default"])
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        remaining = budget.remaining() if budget is not None else None
+        if remaining is not None:
+            if remaining <= 0:
+                budget.exceeded(f"{method} {endpoint} not sent")
+            timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+        kwargs["timeout"] = timeout
+        try:
+            return self._send_guarded(method, endpoint, url, **kwargs)
+        except requests.Timeout as e:
+            if budget is not None:
+                budget.note("timeout", f"{method} {endpoint}: {type(e).__name__} (connect/read {timeout[0]:.1f}/"
+                                       f"{timeout[1]:.1f}s)")
+            raise
+
+    def _send_guarded(self, method, endpoint, url, **kwargs):
+        if self.breaker is None:
+            return self._send_limited(method, endpoint, url, **kwargs)
+        self.breaker.before(method, endpoint)
+        try:
+            resp = self._send_limited(method, endpoint, url, **kwargs)
+        except requests.RequestException as e:
+            self.breaker.record_failure(f"{type(e).__name__} on {method} {endpoint}")
+            raise
+        except BaseException:
+            self.breaker.abandon_trial()  # not the backend's fault (cassette miss, limiter, Ctrl+C)
+            raise
+        self.breaker.record_response(resp)
+        return resp
+
+    def _send_limited(self, method, endpoint, url, **kwargs):
+        if self.limiter is None:
+            return self._send_timed(method, endpoint, url, **kwargs)
+        release = self.limiter.acquire(method)
+        try:
+            budget = current_budget()
+            remaining = budget.remaining() if budget is not None else None
+            if remaining is not None:  # the wait for the limiter came out of the budget as well
+                if remaining <= 0:
+                    budget.exceeded(f"{method} {endpoint} not sent (rate limited)")
+                kwargs["timeout"] = tuple(min(part, remaining) for part in kwargs["timeout"])
+            resp = self._send_timed(method, endpoint, url, **kwargs)
+        except BaseException:
+            release()
+            raise
+        if not kwargs.get("stream"):
+            release()
+            return resp
+        # a streamed body is still downloading: the request stays in flight until the response is closed
+        close = resp.close
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+
+        resp.close = close_and_release
+        weakref.finalize(resp, release)  # never closed: the slot comes back with the response object
+        return resp
+
+    def _send_timed(self, method, endpoint, url, **kwargs):
+        if not self.listeners:
+            return self.session.request(method, url, **kwargs)
+
+        timing = start_timing()
+        started = time.perf_counter()
+        resp = None
+        try:
+            resp = self.session.request(method, url, **kwargs)
+            return resp
+        finally:
+            total = time.perf_counter() - started
+            stop_timing()
+            record = {
+                "method": method,
+                "endpoint": endpoint,
+                "status": resp.status_code if resp is not None else None,
+                "bytes_out": _body_size(resp.request.body) if resp is not None else 0,
+                "bytes_in": _response_size(resp, kwargs.get("stream")),
+                "dns_s": timing["dns_s"],
+                "connect_s": timing["connect_s"],
+                "ttfb_s": resp.elapsed.total_seconds() if resp is not None else total,
+                "total_s": total,
+            }
+            for listener in self.listeners:
+                listener(record)
+
+    def close(self):
+        """Close the pooled session and release all kept-alive connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def health_check(self, timeout=5.0):
+        """Cheap GET used as the session health probe; raises requests.RequestException if unreachable"""
+        return self._request("GET", "/store/inventory", timeout=timeout)
 
     # --- PET ---
 
     def get_pet(self, pet_id):
-        return requests.get(f"{self.base_url}/pet/{pet_id}")
+        return self._request("GET", "/pet/{petId}", path={"petId": pet_id})
 
     def add_pet(self, pet_data):
-        return requests.post(f"{self.base_url}/pet/", json=pet_data)
+        return self._request("POST", "/pet/", json=pet_data)
 
     def update_pet(self, pet_data):
-        return requests.put(f"{self.base_url}/pet/", json=pet_data)
+        return self._request("PUT", "/pet/", json=pet_data)
 
     def delete_pet(self, pet_id):
-        return requests.delete(f"{self.base_url}/pet/{pet_id}")
+        return self._request("DELETE", "/pet/{petId}", path={"petId": pet_id})
 
     def find_by_status(self, status):
-        return requests.get(f"{self.base_url}/pet/findByStatus", params={"status": status})
+        return self._request("GET", "/pet/findByStatus", params={"status": status})
+
+    def iter_pets_by_status(self, status, chunk_size=64 * 1024):
+        """
+        Streaming variant of find_by_status: yields pets one by one while the body is downloaded,
+        with memory bounded by chunk_size + one pet. Stopping the iteration early closes the response.
+        Raises requests.HTTPError on a non-2xx status.
+        """
+        resp = self._request("GET", "/pet/findByStatus", params={"status": status}, stream=True)
+        with resp:
+            resp.raise_for_status()
+            yield from iter_json_array(resp.iter_content(chunk_size=chunk_size))
+
+    def find_pet_in_status(self, status, pet_id, chunk_size=64 * 1024):
+        """Streams findByStatus until the pet with pet_id is seen; returns it or None"""
+        pets = self.iter_pets_by_status(status, chunk_size)
+        try:
+            for pet in pets:
+                if isinstance(pet, dict) and pet.get("id") == pet_id:
+                    return pet
+            return None
+        finally:
+            pets.close()  # stop downloading the rest of the body
+
+    def find_pet_columns(self, status, chunk_size=64 * 1024):
+        """findByStatus decoded straight from the stream into a compact PetColumns collection"""
+        return PetColumns.from_iter(self.iter_pets_by_status(status, chunk_size))
 
     def update_pet_form(self, pet_id, name=None, status=None):
         """Update pet via form-data (application/x-www-form-urlencoded)"""
@@ -39,48 +268,71 @@ class PetStoreClient:
             data["name"] = name
         if status:
             data["status"] = status
-        return requests.post(f"{self.base_url}/pet/{pet_id}", data=data)
+        return self._request("POST", "/pet/{petId}", path={"petId": pet_id}, data=data)
 
-    def upload_pet_image(self, pet_id, file_path):
-        """Upload pet image (multipart/form-data)"""
-        with open(file_path, "rb") as f:
-            files = {"file": (os.path.basename(file_path), f, "image/jpeg")}
-            return requests.post(f"{self.base_url}/pet/{pet_id}/uploadImage", files=files)
+    def upload_pet_image(self, pet_id, image, filename=None, content_type="image/jpeg", additional_metadata=None,
+                         chunk_size=CHUNK_SIZE):
+        """
+        Upload pet image (multipart/form-data), streamed in chunks without building the body in memory.
+
+        :param image: path, bytes / memoryview, binary file object or iterable of bytes (see utils/multipart.py)
+        """
+        body = MultipartBody(image, "file", filename, content_type, {"additionalMetadata": additional_metadata},
+                             chunk_size)
+        return self._request("POST", "/pet/{petId}/uploadImage", path={"petId": pet_id}, data=body,
+                             headers={"Content-Type": body.content_type})
 
     # --- STORE ---
 
     def create_order(self, order_data):
-        return requests.post(f"{self.base_url}/store/order", json=order_data)
+        return self._request("POST", "/store/order", json=order_data)
 
     def get_order(self, order_id):
-        return requests.get(f"{self.base_url}/store/order/{order_id}")
+        return self._request("GET", "/store/order/{orderId}", path={"orderId": order_id})
 
     def delete_order(self, order_id):
-        return requests.delete(f"{self.base_url}/store/order/{order_id}")
+        return self._request("DELETE", "/store/order/{orderId}", path={"orderId": order_id})
 
     def get_inventory(self):
-        return requests.get(f"{self.base_url}/store/inventory")
+        return self._request("GET", "/store/inventory")
 
     # --- USER ---
 
     def create_user(self, user_data):
-        return requests.post(f"{self.base_url}/user", json=user_data)
+        return self._request("POST", "/user", json=user_data)
 
     def create_users_with_list(self, users_list):
-        return requests.post(f"{self.base_url}/user/createWithList", json=users_list)
+        return self._request("POST", "/user/createWithList", json=users_list)
 
     def get_user(self, username):
-        return requests.get(f"{self.base_url}/user/{username}")
+        return self._request("GET", "/user/{username}", path={"username": username})
 
     def update_user(self, username, user_data):
-        return requests.put(f"{self.base_url}/user/{username}", json=user_data)
+        return self._request("PUT", "/user/{username}", path={"username": username}, json=user_data)
 
     def delete_user(self, username):
-        return requests.delete(f"{self.base_url}/user/{username}")
+        return self._request("DELETE", "/user/{username}", path={"username": username})
 
     def login_user(self, username, password):
         params = {"username": username, "password": password}
-        return requests.get(f"{self.base_url}/user/login", params=params)
+        return self._request("GET", "/user/login", params=params)
 
     def logout_user(self):
-        return requests.get(f"{self.base_url}/user/logout")
+        return self._request("GET", "/user/logout")
+
+
+def _response_size(resp, stream=False):
+    if resp is None:
+        return 0
+    if stream:
+        # the body has not been read yet; don't force it into memory
+        return int(resp.headers.get("Content-Length") or 0)
+    return len(resp.content)
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, str, MultipartBody)):
+        return len(body)
+    return 0  # streamed body of unknown size
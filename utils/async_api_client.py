@@ -0,0 +1,109 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import PetStoreClient, POOL_MAXSIZE
+
+
+class AsyncPetStoreClient:
+    """
+    Async twin of PetStoreClient with the same API surface.
+
+    Every call is executed on the pooled sync client in a dedicated thread pool,
+    so responses are the same requests.Response objects the sync tests work with,
+    and all transport settings of PetStoreClient (pool, keep-alive) apply as-is.
+    Concurrency is bounded by the size of the connection pool.
+    """
+
+    def __init__(self, client=None, max_workers=None, **client_kwargs):
+        self._owns_client = client is None
+        self.client = client or PetStoreClient(**client_kwargs)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or POOL_MAXSIZE,
+            thread_name_prefix="petstore-async",
+        )
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # carry context variables (e.g. the rate limiter's polling flag) over to the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args, **kwargs))
+
+    def close(self):
+        """Stop the worker threads (and close the sync client if it was created here)"""
+        self._executor.shutdown(wait=True)
+        if self._owns_client:
+            self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    # --- PET ---
+
+    async def get_pet(self, pet_id):
+        return await self._call(self.client.get_pet, pet_id)
+
+    async def add_pet(self, pet_data):
+        return await self._call(self.client.add_pet, pet_data)
+
+    async def update_pet(self, pet_data):
+        return await self._call(self.client.update_pet, pet_data)
+
+    async def delete_pet(self, pet_id):
+        return await self._call(self.client.delete_pet, pet_id)
+
+    async def find_by_status(self, status):
+        return await self._call(self.client.find_by_status, status)
+
+    async def find_pet_in_status(self, status, pet_id):
+        return await self._call(self.client.find_pet_in_status, status, pet_id)
+
+    async def find_pet_columns(self, status):
+        return await self._call(self.client.find_pet_columns, status)
+
+    async def update_pet_form(self, pet_id, name=None, status=None):
+        return await self._call(self.client.update_pet_form, pet_id, name=name, status=status)
+
+    async def upload_pet_image(self, pet_id, image, **kwargs):
+        return await self._call(self.client.upload_pet_image, pet_id, image, **kwargs)
+
+    # --- STORE ---
+
+    async def create_order(self, order_data):
+        return await self._call(self.client.create_order, order_data)
+
+    async def get_order(self, order_id):
+        return await self._call(self.client.get_order, order_id)
+
+    async def delete_order(self, order_id):
+        return await self._call(self.client.delete_order, order_id)
+
+    async def get_inventory(self):
+        return await self._call(self.client.get_inventory)
+
+    # --- USER ---
+
+    async def create_user(self, user_data):
+        return await self._call(self.client.create_user, user_data)
+
+    async def create_users_with_list(self, users_list):
+        return await self._call(self.client.create_users_with_list, users_list)
+
+    async def get_user(self, username):
+        return await self._call(self.client.get_user, username)
+
+    async def update_user(self, username, user_data):
+        return await self._call(self.client.update_user, username, user_data)
+
+    async def delete_user(self, username):
+        return await self._call(self.client.delete_user, username)
+
+    async def login_user(self, username, password):
+        return await self._call(self.client.login_user, username, password)
+
+    async def logout_user(self):
+        return await self._call(self.client.logout_user)
@@ -0,0 +1,132 @@
+"""
+Size-capped, lazy Allure attachments behind conftest.attach_json.
+
+- nothing is serialized when no Allure results are collected (no --alluredir);
+- bodies up to inline_limit bytes are attached as pretty-printed JSON;
+- larger bodies are serialized compactly (orjson when installed) into a file attachment,
+  optionally gzip-compressed, and truncated at max_bytes;
+- mode "failed": attachments of a test are only buffered while it runs, together with a
+  ring buffer of the last `ring_size` request/response pairs of the client, and written
+  only if the test fails.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import deque
+
+import allure
+
+from utils.models import dumps
+
+ATTACH_MODES = ("always", "failed")
+
+
+def _clip(text, limit):
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...[truncated, {len(text)} chars total]"
+
+
+def _body_text(body, limit):
+    if body is None:
+        return None
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    elif not isinstance(body, str):
+        return f"<{type(body).__name__} body>"  # multipart generator, file object
+    return _clip(body, limit)
+
+
+class Attachments:
+
+    def __init__(self, mode="always", inline_limit=64 * 1024, max_bytes=2 * 1024 * 1024, compress=False,
+                 ring_size=20, enabled=True):
+        self.mode = mode
+        self.inline_limit = inline_limit
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.enabled = enabled
+        self._pending = []
+        self._exchanges = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+
+    def configure(self, **settings):
+        ring_size = settings.pop("ring_size", None)
+        for key, value in settings.items():
+            setattr(self, key, value)
+        if ring_size is not None:
+            self._exchanges = deque(maxlen=ring_size)
+
+    def attach(self, data, name):
+        """Attach `data` (JSON-serializable, or a zero-argument callable producing it)"""
+        if not self.enabled:
+            return
+        if self.mode == "failed":
+            with self._lock:
+                self._pending.append((name, data))
+            return
+        self._write(data, name)
+
+    def record_response(self, resp, *args, stream=False, **kwargs):
+        """requests response hook: remembers the exchange, serialized only if the test fails"""
+        if self.enabled and self.mode == "failed":
+            self._exchanges.append((resp, stream, time.time()))
+
+    def start_test(self):
+        with self._lock:
+            self._pending.clear()
+        self._exchanges.clear()
+
+    def finish_test(self, failed):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        exchanges = list(self._exchanges)
+        self._exchanges.clear()
+        if not failed or not self.enabled:
+            return
+        for name, data in pending:
+            self._write(data, name)
+        if exchanges:
+            self._write(lambda: [self._exchange(*e) for e in exchanges], "Last HTTP exchanges")
+
+    def _exchange(self, resp, stream, at):
+        request = resp.request
+        body = "<streamed, not captured>" if stream else _body_text(resp.content, self.inline_limit)
+        return {
+            "at": time.strftime("%H:%M:%S", time.localtime(at)),
+            "request": {"method": request.method, "url": request.url,
+                        "body": _body_text(request.body, self.inline_limit)},
+            "response": {"status": resp.status_code, "elapsed_s": round(resp.elapsed.total_seconds(), 4),
+                         "body": body},
+        }
+
+    def _write(self, data, name):
+        if callable(data):
+            data = data()
+        try:
+            text = dumps(data)
+        except TypeError:
+            allure.attach(_clip(str(data), self.max_bytes), name=name, attachment_type=allure.attachment_type.TEXT)
+            return
+
+        if len(text) <= self.inline_limit:
+            allure.attach(json.dumps(data, ensure_ascii=False, indent=2), name=name,
+                          attachment_type=allure.attachment_type.JSON)
+            return
+
+        body = text.encode()
+        size = len(body)
+        if size > self.max_bytes:
+            body = body[:self.max_bytes]
+            name = f"{name} (truncated to {self.max_bytes} of {size} bytes)"
+        if self.compress:
+            allure.attach(gzip.compress(body, compresslevel=5), name=f"{name}.gz", extension="json.gz")
+        elif size > self.max_bytes:
+            # cut JSON is no longer valid, keep it readable as text
+            allure.attach(body, name=name, attachment_type=allure.attachment_type.TEXT)
+        else:
+            allure.attach(body, name=name, attachment_type=allure.attachment_type.JSON)
+
+
+ATTACHMENTS = Attachments()  # one per process (i.e. per xdist worker)
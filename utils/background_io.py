@@ -0,0 +1,238 @@
+"""
+Log and Allure result writing off the test thread.
+
+- QueuedLogging: the root logger gets a QueueHandler (a record is only put on a queue) and a
+  QueueListener thread per process (i.e. per xdist worker) formats it and writes it to stderr.
+  pytest's own log capture ("Captured log" sections, caplog) is unaffected: its handlers are
+  called on the test thread as before.
+- QueuedAllureWriter: replaces allure's AllureFileLogger in allure_commons' plugin manager.
+  Test results, containers and attachments are handed to a BackgroundWriter thread, which
+  serializes and writes them through the original logger; flush() at session end waits until
+  everything is on disk. Attachments given as a file path are copied right away, the file may
+  be gone later.
+
+Both count the time spent on the test thread ("hot path") and in the background thread.
+sync=True keeps the old synchronous writing with the same counters, to compare the two.
+"""
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import allure_commons
+from allure_commons.logger import AllureFileLogger
+
+
+class _Counter:
+
+    def __init__(self):
+        self.items = 0
+        self.hot_s = 0.0
+        self.background_s = 0.0
+        self.errors = 0
+
+    def snapshot(self):
+        return {"items": self.items, "hot_s": round(self.hot_s, 6), "background_s": round(self.background_s, 6),
+                "errors": self.errors}
+
+
+class BackgroundWriter:
+    """One daemon thread running submitted writes in order"""
+
+    def __init__(self, name="background-writer"):
+        self.counter = _Counter()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        self._queue.put((fn, args))
+
+    def _run(self):
+        while True:
+            fn, args = self._queue.get()
+            try:
+                if fn is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    self.counter.errors += 1
+                    logging.getLogger(__name__).error(f"background write failed: {e!r}")
+                self.counter.background_s += time.perf_counter() - started
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until everything submitted so far is written"""
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put((None, ()))
+            self._thread.join()
+
+
+class _TimedQueueHandler(QueueHandler):
+
+    def __init__(self, log_queue, counter):
+        super().__init__(log_queue)
+        self.counter = counter
+
+    def prepare(self, record):
+        if record.exc_info or record.stack_info:
+            return super().prepare(record)  # render the traceback now
+        # a shallow copy is enough (the stock prepare() also formats it on this thread): pytest's
+        # handlers get the same record and format it concurrently with the listener
+        prepared = logging.LogRecord.__new__(logging.LogRecord)
+        prepared.__dict__.update(record.__dict__)
+        if record.args:
+            prepared.msg, prepared.args = record.getMessage(), None
+        return prepared
+
+    def emit(self, record):
+        started = time.perf_counter()
+        super().emit(record)
+        self.counter.items += 1
+        self.counter.hot_s += time.perf_counter() - started
+
+
+class _TimedStreamHandler(logging.StreamHandler):
+    """Writes on the calling thread; `background` says whether that is the listener thread"""
+
+    def __init__(self, stream, counter, background):
+        super().__init__(stream)
+        self.counter = counter
+        self.background = background
+
+    def emit(self, record):
+        started = time.perf_counter()
+        super().emit(record)
+        elapsed = time.perf_counter() - started
+        if self.background:
+            self.counter.background_s += elapsed
+        else:
+            self.counter.items += 1
+            self.counter.hot_s += elapsed
+
+
+class QueuedLogging:
+
+    def __init__(self, level=logging.INFO, fmt="%(asctime)s [%(levelname)s] %(message)s", datefmt="%H:%M:%S",
+                 stream=None, sync=False):
+        self.counter = _Counter()
+        self.sync = sync
+        writer = _TimedStreamHandler(stream or sys.stderr, self.counter, background=not sync)
+        writer.setFormatter(logging.Formatter(fmt, datefmt))
+        self._listener = None
+        if sync:
+            self.handler = writer
+        else:
+            log_queue = queue.SimpleQueue()
+            self.handler = _TimedQueueHandler(log_queue, self.counter)
+            self._listener = QueueListener(log_queue, writer, respect_handler_level=True)
+        self._root_level = None
+        self.level = level
+        self._started = False
+
+    def start(self):
+        root = logging.getLogger()
+        self._root_level = root.level
+        root.setLevel(self.level)
+        root.addHandler(self.handler)
+        if self._listener is not None:
+            self._listener.start()
+        self._started = True
+        return self
+
+    def stop(self):
+        """Detach from the root logger and write out what is still queued"""
+        if not self._started:
+            return
+        self._started = False
+        root = logging.getLogger()
+        root.removeHandler(self.handler)
+        root.setLevel(self._root_level)
+        if self._listener is not None:
+            self._listener.stop()
+
+
+class QueuedAllureWriter:
+    """allure_commons reporter hooks of AllureFileLogger, written by a BackgroundWriter"""
+
+    def __init__(self, file_logger, sync=False):
+        self.file_logger = file_logger
+        self.sync = sync
+        self.writer = None if sync else BackgroundWriter("allure-writer")
+        self.counter = _Counter() if sync else self.writer.counter
+
+    def _write(self, fn, *args):
+        started = time.perf_counter()
+        if self.sync:
+            fn(*args)
+        else:
+            self.writer.submit(fn, *args)
+        self.counter.items += 1
+        self.counter.hot_s += time.perf_counter() - started
+
+    @allure_commons.hookimpl
+    def report_result(self, result):
+        self._write(self.file_logger.report_result, result)
+
+    @allure_commons.hookimpl
+    def report_container(self, container):
+        self._write(self.file_logger.report_container, container)
+
+    @allure_commons.hookimpl
+    def report_attached_file(self, source, file_name):
+        self.file_logger.report_attached_file(source, file_name)
+
+    @allure_commons.hookimpl
+    def report_attached_data(self, body, file_name):
+        self._write(self.file_logger.report_attached_data, body, file_name)
+
+    @allure_commons.hookimpl
+    def report_globals(self, globals_item):
+        self._write(self.file_logger.report_globals, globals_item)
+
+    def flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+    @classmethod
+    def install(cls, sync=False):
+        """Take the place of the registered AllureFileLogger; None when allure writes no results"""
+        manager = allure_commons.plugin_manager
+        file_logger = next((p for p in manager.get_plugins() if isinstance(p, AllureFileLogger)), None)
+        if file_logger is None:
+            return None
+        self = cls(file_logger, sync)
+        self._name = manager.get_name(file_logger)
+        manager.unregister(file_logger)
+        manager.register(self)
+        return self
+
+    def uninstall(self):
+        """Write out everything and put the file logger back (allure's own cleanup unregisters it)"""
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+        manager = allure_commons.plugin_manager
+        manager.unregister(self)
+        manager.register(self.file_logger, name=self._name)
+
+
+def summarize(snapshots):
+    """Merge per-worker {"logging": counter, "allure": counter} snapshots"""
+    totals = {}
+    for snapshot in snapshots:
+        for channel, counter in snapshot.items():
+            if counter is None:
+                continue
+            merged = totals.setdefault(channel, {"items": 0, "hot_s": 0.0, "background_s": 0.0, "errors": 0})
+            for key, value in counter.items():
+                merged[key] += value
+    return totals
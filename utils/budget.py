@@ -0,0 +1,73 @@
+"""
+Per-test time budget.
+
+The budget of the running test is kept in a context variable, so every layer can see it
+without passing it around: PetStoreClient caps read timeouts at the time left and refuses to
+send once it is spent; the waiting engine stops polling at the budget deadline and raises
+BudgetExceeded instead of returning a stale response. Request timeouts and budget cuts are
+recorded as events, which conftest attaches to the test's Allure report.
+"""
+import contextvars
+import threading
+import time
+
+_current = contextvars.ContextVar("petstore_budget", default=None)
+
+
+class BudgetExceeded(Exception):
+    """The test ran out of its time budget"""
+
+
+class Budget:
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds if seconds else None
+        self.events = []
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        """Seconds left, or None for an unlimited budget"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def exhausted(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def note(self, kind, detail):
+        with self._lock:
+            self.events.append({"kind": kind, "detail": detail, "at_s": round(self.elapsed(), 3)})
+
+    def exceeded(self, what):
+        """Record the exhaustion and raise BudgetExceeded"""
+        self.note("budget", what)
+        raise BudgetExceeded(f"Test time budget of {self.seconds}s exhausted after {self.elapsed():.1f}s: {what}")
+
+    def activate(self):
+        """Make this the budget of the running test; returns a token for deactivate()"""
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+
+def current_budget():
+    return _current.get()
+
+
+def wait_deadline(started, timeout):
+    """
+    Deadline for a wait of `timeout` seconds started at `started` (monotonic), capped by the budget.
+    Returns (deadline, budget) where budget is set only if it is what cut the wait short.
+    """
+    deadline = started + timeout
+    budget = _current.get()
+    if budget is not None and budget.deadline is not None and budget.deadline < deadline:
+        return budget.deadline, budget
+    return deadline, None
@@ -0,0 +1,365 @@
+"""
+Record/replay of PetStoreClient traffic at the transport level (cassettes).
+
+record  - every request is sent for real and the response is stored;
+replay  - responses are served from the cassette with no network; unmatched requests go to the server;
+strict  - like replay, but an unmatched request fails with CassetteMiss.
+
+A cassette is a directory with one pair of files per xdist worker: <worker>.bin holds the response
+bodies (deduplicated, zlib-compressed when that helps), <worker>.idx.json the index
+key -> [responses in recorded order]. Replay reads the indexes on the first request and
+memory-maps the bodies, so only the responses actually served are read.
+
+Keys are normalized, so a recording matches a later run on other workers and in another order:
+- requests are scoped by test (node id). IDs/usernames the test allocated itself are written relative
+  to the allocator position at the start of the test ({{n+0}}, {{n+1:user}}), other IDs of the run
+  (e.g. a leased pool entity) in order of appearance in the request ({{r0}}). IDs that only show up in
+  the response are relative to one of the request ({{r0+4}}). On replay all placeholders in a recorded
+  response body are filled in with the values of this run;
+- timestamps and the multipart boundary are masked; the body enters the key as a digest.
+Repeated identical requests (polling) get the recorded responses in order, then the last one again.
+A request missing from its own scope (e.g. session teardown, which runs after whichever test is last)
+is looked up in any scope.
+"""
+import glob
+import hashlib
+import io
+import json
+import mmap
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from utils.id_allocator import split_id, split_username
+from utils.models import loads
+
+CASSETTE_MODES = ("record", "replay", "strict")
+SESSION_SCOPE = "session"
+
+# allocated IDs and usernames, also inside longer words (e.g. "status_<id>", "<username>_invalid")
+_TOKEN = re.compile(rb"(?<![A-Za-z0-9.])(?:\d{8,16}|[A-Za-z0-9]+_[0-9a-z]+w\d+n[0-9a-z]+)(?![A-Za-z0-9.])")
+_TIMESTAMP = re.compile(rb"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:?\d\d)?")
+_PLACEHOLDER = re.compile(rb"\{\{(n|r\d+)([+-]\d+)?(?::([A-Za-z0-9]+))?\}\}")
+_BOUNDARY = re.compile(r"boundary=\"?([^\";]+)")
+_SKIP_HEADERS = {"content-length", "date", "connection", "keep-alive", "transfer-encoding"}
+_MIN_COMPRESS = 256  # bytes; smaller bodies are stored as they are
+
+
+class CassetteMiss(LookupError):
+    """Strict replay: the request was never recorded"""
+
+
+def replayed(resp):
+    """True if the response came from a cassette (no server behind it to wait for)"""
+    return getattr(resp, "from_cassette", False)
+
+
+def erase(directory):
+    """Removes the recordings of all workers (before a new recording run)"""
+    for path in glob.glob(os.path.join(directory, "*.idx.json")) + glob.glob(os.path.join(directory, "*.bin")):
+        os.remove(path)
+
+
+class Cassette:
+
+    def __init__(self, directory, mode, allocator, worker="master", base_url=None):
+        """
+        :param allocator: the worker's IdAllocator, used to normalize the IDs of this run
+        :param base_url: stored with a recording; replay falls back to it when no server is configured
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {CASSETTE_MODES}")
+        self.directory = directory
+        self.mode = mode
+        self.allocator = allocator
+        self.worker = worker
+        self._base_url = base_url
+        self._scope = (SESSION_SCOPE, None)  # one test at a time per worker, so shared by all threads
+        self._nested = []  # (start, end) allocator counters used inside scoped() blocks
+        self._lock = threading.Lock()
+        self.counters = {"recorded": 0, "replayed": 0, "live": 0, "missed": 0}
+        # record
+        self._index = {}
+        self._bodies = {}  # sha1 of a stored body -> (offset, length, compressed)
+        self._bin = None
+        self._size = 0
+        # replay
+        self._loaded = False
+        self._entries = {}  # scope|key -> [(file, status, reason, headers, offset, length, compressed)]
+        self._any = {}  # key -> the same, from every scope
+        self._cursors = {}
+        self._maps = []
+
+    @property
+    def replaying(self):
+        return self.mode != "record"
+
+    @property
+    def base_url(self):
+        if self._base_url is None and self.replaying:
+            with self._lock:
+                self._load()
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, value):
+        self._base_url = value
+
+    def adapter(self, adapter):
+        """Transport adapter recording/replaying around `adapter` (which sends for real)"""
+        return CassetteAdapter(self, adapter)
+
+    # --- scopes ---
+
+    def begin(self, name):
+        """Following requests belong to `name` (a test); IDs allocated from now on are relative to here"""
+        self._scope = (name, self.allocator.allocated)
+
+    def end(self):
+        self._scope = (SESSION_SCOPE, None)
+
+    @contextmanager
+    def scoped(self, name):
+        """Temporary scope, e.g. for entity pool provisioning that runs inside whichever test leases first"""
+        previous = self._scope
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self._nested.append((self._scope[1], self.allocator.allocated))
+            self._scope = previous
+
+    # --- transport ---
+
+    def send(self, request, adapter, **kwargs):
+        scope, base = self._scope
+        refs = {}
+        key = self._key(request, base, refs)
+        if self.mode == "record":
+            resp = adapter.send(request, **kwargs)
+            self._record(f"{scope}|{key}", resp, base, refs)
+            return resp
+
+        entry = self._lookup(f"{scope}|{key}", key)
+        if entry is None:
+            self._count("missed")
+            if self.mode == "strict":
+                raise CassetteMiss(f"No recorded response for {key!r} in {scope} (cassette {self.directory})")
+            self._count("live")
+            return adapter.send(request, **kwargs)
+        self._count("replayed")
+        file, status, reason, headers, offset, length, compressed = entry
+        body = self._restore(self._read(file, offset, length, compressed), base, refs)
+        return _response(request, status, reason, headers, body)
+
+    def _key(self, request, base, refs):
+        """'METHOD /normalized/path?query body-digest'; fills refs with the run IDs found in order"""
+        path = self._normalize(request.path_url.encode(), base, refs).decode()
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+        if body is None or body == b"":
+            digest = "-"
+        elif not isinstance(body, bytes):
+            digest = "stream"  # file object / generator: cannot be read without consuming it
+        else:
+            boundary = _BOUNDARY.search(request.headers.get("Content-Type", ""))
+            if boundary:
+                body = body.replace(boundary.group(1).encode(), b"{{boundary}}")
+            body = self._normalize(_TIMESTAMP.sub(b"{{ts}}", body), base, refs)
+            digest = hashlib.sha1(body).hexdigest()[:16]
+        return f"{request.method} {path} {digest}"
+
+    def _normalize(self, data, base, refs, new_refs=True):
+        allocator = self.allocator
+
+        def placeholder(match):
+            token = match.group()
+            parts = _split(token)
+            if parts is None or parts[1] != allocator.run_nonce:
+                return token  # not allocated in this run
+            prefix, _, worker, counter = parts
+            name = f":{prefix}" if prefix else ""
+            own = worker == allocator.worker and base is not None and counter >= base
+            if own and not any(base <= start <= counter < end for start, end in self._nested):
+                return f"{{{{n+{counter - base}{name}}}}}".encode()
+            if token in refs:
+                return refs[token]
+            if new_refs:
+                refs[token] = f"{{{{r{len(refs)}}}}}".encode()
+                return refs[token]
+            # only in the response, e.g. the petId of a leased order: relative to an ID of the request
+            for ref, ref_placeholder in refs.items():
+                ref_parts = _split(ref)
+                if ref_parts[2] == worker:
+                    return f"{ref_placeholder.decode()[:-2]}{counter - ref_parts[3]:+d}{name}}}}}".encode()
+            return token
+
+        return _TOKEN.sub(placeholder, data)
+
+    def _restore(self, body, base, refs):
+        values = {placeholder: token for token, placeholder in refs.items()}
+
+        def value(match):
+            anchor, offset, prefix = match.groups()
+            if anchor == b"n":
+                counter = base
+            else:
+                token = values.get(b"{{%s}}" % anchor)
+                if token is None or offset is None:
+                    return token or match.group()
+                counter = _split(token)[3]
+            if counter is None:
+                return match.group()
+            counter += int(offset or 0)
+            if prefix:
+                return self.allocator.username_at(counter, prefix.decode()).encode()
+            return str(self.allocator.id_at(counter)).encode()
+
+        return _PLACEHOLDER.sub(value, body)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    # --- record ---
+
+    def _record(self, key, resp, base, refs):
+        body = self._normalize(resp.content, base, refs, new_refs=False)  # also reads a streamed body
+        headers = {k: v for k, v in resp.headers.items() if k.lower() not in _SKIP_HEADERS}
+        with self._lock:
+            offset, length, compressed = self._store(body)
+            self._index.setdefault(key, []).append([resp.status_code, resp.reason, headers, offset, length,
+                                                    compressed])
+            self.counters["recorded"] += 1
+
+    def _store(self, body):
+        digest = hashlib.sha1(body).digest()
+        stored = self._bodies.get(digest)
+        if stored is not None:
+            return stored  # polls mostly get the same body again
+        compressed = False
+        if len(body) >= _MIN_COMPRESS:
+            packed = zlib.compress(body, 6)
+            if len(packed) < len(body):
+                body, compressed = packed, True
+        if self._bin is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._bin = open(os.path.join(self.directory, f"{self.worker}.bin"), "wb")
+        self._bin.write(body)
+        stored = self._bodies[digest] = (self._size, len(body), compressed)
+        self._size += len(body)
+        return stored
+
+    # --- replay ---
+
+    def _load(self):
+        """Reads the indexes of all workers once (called under the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        for file, path in enumerate(sorted(glob.glob(os.path.join(self.directory, "*.idx.json")))):
+            with open(path, "rb") as f:
+                index = loads(f.read())
+            self._base_url = self._base_url or index.get("base_url")
+            self._maps.append(os.path.join(self.directory, index["bodies"]))
+            for key, responses in index["entries"].items():
+                responses = [(file, *response) for response in responses]
+                self._entries.setdefault(key, []).extend(responses)
+                self._any.setdefault(key.split("|", 1)[1], []).extend(responses)
+
+    def _lookup(self, key, any_scope_key):
+        with self._lock:
+            self._load()
+            for responses, cursor in ((self._entries.get(key), key),
+                                      (self._any.get(any_scope_key), f"*|{any_scope_key}")):
+                if responses:
+                    position = self._cursors.get(cursor, 0)
+                    self._cursors[cursor] = position + 1
+                    return responses[min(position, len(responses) - 1)]
+        return None
+
+    def _read(self, file, offset, length, compressed):
+        with self._lock:
+            source = self._maps[file]
+            if isinstance(source, str):
+                with open(source, "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    source = self._maps[file] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            data = source[offset:offset + length]
+        return zlib.decompress(data) if compressed else data
+
+    # --- end of session ---
+
+    def close(self):
+        """Writes the index of a recording / unmaps the bodies; returns the counters"""
+        with self._lock:
+            if self.mode == "record" and self._index:
+                if self._bin is not None:
+                    self._bin.close()
+                path = os.path.join(self.directory, f"{self.worker}.idx.json")
+                with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                               "base_url": self._base_url, "bodies": f"{self.worker}.bin",
+                               "entries": self._index}, f, separators=(",", ":"))
+                os.replace(f"{path}.tmp", path)
+            for source in self._maps:
+                if isinstance(source, mmap.mmap):
+                    source.close()
+            self._maps = []
+            return dict(self.counters, mode=self.mode)
+
+
+class CassetteAdapter(BaseAdapter):
+    """Mounted on PetStoreClient's session in place of the real adapter, which it wraps"""
+
+    def __init__(self, cassette, adapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request, **kwargs):
+        return self.cassette.send(request, self.adapter, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+
+def _split(token):
+    """Allocated ID or username -> (prefix or None, run_nonce, worker, counter), None otherwise"""
+    if token[:1].isdigit():
+        parts = split_id(int(token))
+        return None if parts is None else (None, *parts)
+    return split_username(token.decode())
+
+
+def _response(request, status, reason, headers, body):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.reason = reason
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.headers["Content-Length"] = str(len(body))
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.raw = io.BytesIO(body)
+    resp.url = request.url
+    resp.request = request
+    resp.elapsed = timedelta(0)
+    resp.from_cassette = True
+    return resp
+
+
+def merge_stats(reports):
+    merged = {}
+    for report in reports:
+        for key, value in report.items():
+            merged[key] = value if key == "mode" else merged.get(key, 0) + value
+    return merged
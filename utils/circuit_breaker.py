@@ -0,0 +1,97 @@
+"""
+Client-level circuit breaker for a dead or failing backend.
+
+closed     - requests go through; consecutive connection errors / 5xx responses are counted
+open       - after `threshold` consecutive failures: every request fails at once with CircuitOpenError
+half-open  - `reset_timeout` seconds after opening, one trial request is let through:
+             success closes the breaker, failure opens it again for another `reset_timeout`
+
+One breaker per PetStoreClient, i.e. per xdist worker.
+"""
+import threading
+import time
+
+import requests
+
+STATES = ("closed", "open", "half-open")
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request while the breaker is open"""
+
+
+class CircuitBreaker:
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.reason = None  # last failure that counted towards opening
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        self.counters = {"trips": 0, "rejected": 0, "recoveries": 0}
+
+    def retry_in(self):
+        """Seconds until a trial request is allowed (0 when closed or due)"""
+        if self.state == "closed":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before(self, method, endpoint):
+        """Called before every request; raises CircuitOpenError if it must not be sent"""
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and self.retry_in() == 0:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._trial_running:
+                self._trial_running = True  # this request is the trial
+                return
+            self.counters["rejected"] += 1
+            raise CircuitOpenError(f"Circuit breaker is {self.state}: {method} {endpoint} not sent. "
+                                   f"Backend looks down ({self.reason}); next trial in {self.retry_in():.0f}s")
+
+    def record_response(self, resp):
+        if resp.status_code >= 500:
+            self.record_failure(f"HTTP {resp.status_code} from {resp.request.method} {resp.request.path_url}")
+        else:
+            self.record_success()
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                self.counters["recoveries"] += 1
+            self.state = "closed"
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self, reason):
+        with self._lock:
+            self._failures += 1
+            self.reason = reason
+            if self.state == "half-open" or self._failures >= self.threshold:
+                self._open()
+
+    def abandon_trial(self):
+        """The request ended without an answer from the backend: let the next one be the trial"""
+        with self._lock:
+            self._trial_running = False
+
+    def trip(self, reason):
+        """Open the breaker right away (e.g. the session health probe failed)"""
+        with self._lock:
+            self.reason = reason
+            self._open()
+
+    def _open(self):
+        if self.state != "open":
+            self.counters["trips"] += 1
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._trial_running = False
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters, state=self.state, reason=self.reason)
@@ -0,0 +1,117 @@
+"""
+Concurrent cleanup of entities created by tests.
+
+Modes:
+    test        - delete at the end of every test, all deletes issued concurrently (default)
+    session     - queue everything and sweep in one parallel batch at session end
+    background  - queue everything; a background thread sweeps the queue every `interval` seconds
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import POOL_MAXSIZE
+
+CLEANUP_MODES = ("test", "session", "background")
+
+_DELETERS = {"pet": "delete_pet", "user": "delete_user", "order": "delete_order"}
+_OK_CODES = (200, 204, 404)  # 404: already gone, nothing to clean
+
+
+class CleanupSweeper:
+
+    def __init__(self, api_client, mode="test", max_workers=None, interval=2.0):
+        if mode not in CLEANUP_MODES:
+            raise ValueError(f"Unknown cleanup mode {mode!r}, expected one of {CLEANUP_MODES}")
+        self.api_client = api_client
+        self.mode = mode
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or POOL_MAXSIZE, thread_name_prefix="cleanup")
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self.stats = {"deleted": 0, "failed": 0, "seconds": 0.0, "failures": []}
+        self._stop = threading.Event()
+        self._thread = None
+        if mode == "background":
+            self._thread = threading.Thread(target=self._run, name="cleanup-sweeper", daemon=True)
+            self._thread.start()
+
+    def submit(self, bag):
+        """
+        Takes a cleanup bag {"pet": [...], "user": [...], "order": [...]}.
+        In "test" mode deletes right away and returns the failures; otherwise queues and returns [].
+        """
+        items = [(kind, entity_id) for kind, ids in bag.items() for entity_id in ids]
+        if self.mode == "test":
+            return self._delete(items)
+        for item in items:
+            self._queue.put(item)
+        return []
+
+    def close(self):
+        """Stop the background thread and sweep whatever is still queued"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._delete(self._drain())
+        self._executor.shutdown(wait=True)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "deleted": self.stats["deleted"],
+                "failed": self.stats["failed"],
+                "seconds": round(self.stats["seconds"], 3),
+                "failures": list(self.stats["failures"]),
+            }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._delete(self._drain())
+
+    def _drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _delete(self, items):
+        if not items:
+            return []
+        started = time.perf_counter()
+        failures = [f for f in self._executor.map(self._delete_one, items) if f]
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats["deleted"] += len(items) - len(failures)
+            self.stats["failed"] += len(failures)
+            self.stats["seconds"] += elapsed
+            self.stats["failures"].extend(failures[:max(0, 100 - len(self.stats["failures"]))])
+        return failures
+
+    def _delete_one(self, item):
+        kind, entity_id = item
+        try:
+            resp = getattr(self.api_client, _DELETERS[kind])(entity_id)
+        except Exception as e:
+            logging.warning(f"Failed to delete {kind} {entity_id}: {e}")
+            return f"{kind} {entity_id}: {e}"
+        if resp.status_code not in _OK_CODES:
+            logging.warning(f"Failed to delete {kind} {entity_id}: HTTP {resp.status_code}")
+            return f"{kind} {entity_id}: HTTP {resp.status_code}"
+        return None
+
+
+def merge_summaries(summaries):
+    merged = {"deleted": 0, "failed": 0, "seconds": 0.0, "failures": []}
+    for summary in summaries:
+        merged["mode"] = summary["mode"]
+        for key in ("deleted", "failed", "seconds"):
+            merged[key] += summary[key]
+        merged["failures"].extend(summary["failures"])
+    merged["seconds"] = round(merged["seconds"], 3)
+    return merged
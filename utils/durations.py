@@ -0,0 +1,93 @@
+"""
+Per-test duration history and duration-aware scheduling.
+
+DurationDB keeps an exponentially weighted average of every test's wall time (setup + call +
+teardown) across runs in a JSON file. It is used to:
+- order tests longest-first, so xdist hands the slow polling-heavy tests out first and the
+  short ones fill the gaps at the end (less tail on a single worker);
+- split the suite into N shards with about equal total duration (greedy longest-first bin
+  packing), one per CI machine. Every machine computes the same split only from the same file:
+  sharded runs never update it, and without a file all tests weigh the same, so the split is
+  round-robin in collection order. fingerprint() identifies the history in the report header.
+"""
+import hashlib
+import heapq
+import json
+import os
+import statistics
+import time
+
+DEFAULT_ESTIMATE = 1.0  # seconds, for tests never seen before when the history is empty
+
+
+class DurationDB:
+
+    def __init__(self, path, alpha=0.3):
+        """:param alpha: weight of the newest run in the moving average"""
+        self.path = path
+        self.alpha = alpha
+        self.tests = {}  # nodeid -> {"avg_s", "last_s", "runs"}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.tests = json.load(f).get("tests", {})
+        known = [entry["avg_s"] for entry in self.tests.values()]
+        self.default = statistics.median(known) if known else DEFAULT_ESTIMATE  # for tests never seen before
+
+    def estimate(self, nodeid):
+        entry = self.tests.get(nodeid)
+        return entry["avg_s"] if entry is not None else self.default
+
+    def fingerprint(self):
+        """Short digest of the averages the shards are balanced by; "none" without history"""
+        if not self.tests:
+            return "none"
+        averages = json.dumps({nodeid: entry["avg_s"] for nodeid, entry in sorted(self.tests.items())})
+        return hashlib.sha256(averages.encode()).hexdigest()[:12]
+
+    def update(self, durations):
+        """Merge {nodeid: seconds} of this run"""
+        for nodeid, seconds in durations.items():
+            entry = self.tests.get(nodeid)
+            if entry is None:
+                self.tests[nodeid] = {"avg_s": round(seconds, 4), "last_s": round(seconds, 4), "runs": 1}
+            else:
+                entry["avg_s"] = round(self.alpha * seconds + (1 - self.alpha) * entry["avg_s"], 4)
+                entry["last_s"] = round(seconds, 4)
+                entry["runs"] += 1
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"updated": time.strftime("%Y-%m-%dT%H:%M:%S"), "tests": dict(sorted(self.tests.items()))},
+                      f, indent=1)
+        os.replace(tmp, self.path)
+
+
+def longest_first(nodeids, estimate):
+    """Stable order by estimated duration, longest first"""
+    return sorted(nodeids, key=lambda nodeid: -estimate(nodeid))
+
+
+def pack(nodeids, bins, estimate):
+    """
+    Greedy longest-first packing into `bins` groups of about equal total duration.
+    Returns a list of (total_s, [nodeids]) in bin order; deterministic for the same input.
+    """
+    groups = [[] for _ in range(bins)]
+    loads = [(0.0, index) for index in range(bins)]
+    for nodeid in longest_first(nodeids, estimate):
+        load, index = heapq.heappop(loads)
+        groups[index].append(nodeid)
+        heapq.heappush(loads, (load + estimate(nodeid), index))
+    totals = {index: load for load, index in loads}
+    return [(round(totals[index], 3), groups[index]) for index in range(bins)]
+
+
+def parse_shard(value):
+    """'2/4' -> (2, 4); shards are numbered from 1"""
+    index, _, total = value.partition("/")
+    index, total = int(index), int(total)
+    if not 1 <= index <= total:
+        raise ValueError(f"Bad shard {value!r}, expected K/N with 1 <= K <= N")
+    return index, total
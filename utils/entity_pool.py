@@ -0,0 +1,102 @@
+"""
+Shared, pre-provisioned entities for read-only tests.
+
+Each pool holds `size` ready-made entities of one kind (pet/order/user), created in bulk and
+confirmed readable once, on the first lease. Tests lease an entity, only read it and release it;
+the least-leased entity is handed out next, so concurrent tests spread over the pool.
+Tests that modify an entity must create a fresh one (make_pet & co.), never lease.
+
+size=0 disables sharing: every lease provisions its own entity.
+"""
+import threading
+
+
+class EntityPool:
+
+    def __init__(self, kind, provision, key="id", size=4):
+        """
+        :param provision: provision(n) -> list of n readable entities (payload dicts)
+        :param key: entity field identifying it for cleanup ("id" or "username")
+        """
+        self.kind = kind
+        self.key = key
+        self.size = size
+        self._provision = provision
+        self._lock = threading.Lock()
+        self._entities = []
+        self._active = []  # concurrent leases per entity
+        self._leases = []  # total leases per entity
+        self._holders = []  # who leased each entity, for tracing a corrupted one back to its tests
+
+    def lease(self, holder=None):
+        """Returns (index, entity copy); call release(index) when done"""
+        with self._lock:
+            if self.size == 0 or not self._entities:
+                self._add(self._provision(self.size or 1))
+                index = len(self._entities) - 1
+            else:
+                index = min(range(len(self._entities)), key=lambda i: (self._active[i], self._leases[i]))
+            self._active[index] += 1
+            self._leases[index] += 1
+            if holder is not None:
+                self._holders[index].append(holder)
+            return index, dict(self._entities[index])
+
+    def release(self, index):
+        with self._lock:
+            self._active[index] -= 1
+
+    def _add(self, entities):
+        for entity in entities:
+            self._entities.append(entity)
+            self._active.append(0)
+            self._leases.append(0)
+            self._holders.append([])
+
+    def holders(self, entity_key):
+        with self._lock:
+            for entity, holders in zip(self._entities, self._holders):
+                if entity[self.key] == entity_key:
+                    return list(holders)
+        return []
+
+    def keys(self):
+        with self._lock:
+            return [entity[self.key] for entity in self._entities]
+
+    def stats(self):
+        with self._lock:
+            leases = sum(self._leases)
+            return {"provisioned": len(self._entities), "leases": leases,
+                    "reused": leases - sum(1 for n in self._leases if n)}
+
+
+class EntityPools:
+    """Pools by kind: pools.lease("user", holder=nodeid)"""
+
+    def __init__(self, pools):
+        self.pools = {pool.kind: pool for pool in pools}
+
+    def lease(self, kind, holder=None):
+        return self.pools[kind].lease(holder)
+
+    def release(self, kind, index):
+        self.pools[kind].release(index)
+
+    def cleanup_bag(self):
+        """{"pet": [...], "order": [...], "user": [...]} for CleanupSweeper.submit"""
+        return {kind: pool.keys() for kind, pool in self.pools.items()}
+
+    def stats(self):
+        stats = {kind: pool.stats() for kind, pool in self.pools.items()}
+        return {kind: s for kind, s in stats.items() if s["leases"]}
+
+
+def merge_stats(reports):
+    merged = {}
+    for report in reports:
+        for kind, stats in report.items():
+            totals = merged.setdefault(kind, {"provisioned": 0, "leases": 0, "reused": 0})
+            for key, value in stats.items():
+                totals[key] += value
+    return merged
@@ -0,0 +1,71 @@
+"""
+HDR-style latency histogram: log-linear buckets with a bounded relative error.
+
+Values are recorded in microseconds. Each power-of-two range is split into
+2**sub_bucket_bits linear sub-buckets, so with the default 7 bits the error of
+any reported percentile is below 1% while memory stays O(number of used buckets).
+"""
+
+
+class LatencyHistogram:
+
+    def __init__(self, sub_bucket_bits=7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+
+    def _index(self, value):
+        if value < (1 << self.sub_bucket_bits):
+            return 0, value
+        exponent = value.bit_length() - self.sub_bucket_bits
+        return exponent, value >> exponent
+
+    def _bucket_value(self, exponent, sub):
+        # highest value that falls into the bucket
+        return ((sub + 1) << exponent) - 1 if exponent else sub
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1_000_000))
+        key = self._index(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.total:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, q):
+        """Value (seconds) at percentile q (0..100)"""
+        if not self.total:
+            return None
+        rank = max(1, -(-q * self.total // 100))  # ceil
+        seen = 0
+        for exponent, sub in sorted(self.counts):
+            seen += self.counts[(exponent, sub)]
+            if seen >= rank:
+                return min(self._bucket_value(exponent, sub), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self):
+        return self.sum / self.total / 1_000_000 if self.total else None
+
+    def to_dict(self):
+        return {
+            "count": self.total,
+            "min_s": None if self.min is None else self.min / 1_000_000,
+            "mean_s": self.mean(),
+            **{f"p{q}_s": self.percentile(q) for q in (50, 90, 95, 99, 99.9)},
+            "max_s": None if self.max is None else self.max / 1_000_000,
+        }
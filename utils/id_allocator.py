@@ -0,0 +1,111 @@
+"""
+Collision-free IDs and usernames for parallel (xdist) runs.
+
+Every run gets a random nonce (generated once by the controller and shared with the workers),
+and every worker owns a disjoint slice of the ID space inside that run:
+
+    id = ID_BASE + (nonce << 28 | worker << 20 | counter)
+
+so two workers of one run, or two runs against the same public server, never hand out the same ID.
+Allocation is a lock-protected counter increment, i.e. O(1).
+"""
+import re
+import secrets
+import threading
+
+ID_BASE = 10_000_000  # keeps IDs clear of small hand-written ones
+NONCE_BITS = 20
+WORKER_BITS = 8
+COUNTER_BITS = 20
+
+_USERNAME = re.compile(r"([A-Za-z0-9]+)_([0-9a-z]+)w(\d+)n([0-9a-z]+)")
+
+
+def new_run_nonce():
+    return secrets.randbelow(1 << NONCE_BITS)
+
+
+def worker_index(worker_id):
+    """'gw3' -> 3, 'master' (no xdist) -> 0"""
+    digits = "".join(ch for ch in str(worker_id) if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+class IdAllocator:
+
+    def __init__(self, run_nonce, worker=0):
+        if not 0 <= run_nonce < (1 << NONCE_BITS):
+            raise ValueError(f"run_nonce must fit in {NONCE_BITS} bits: {run_nonce}")
+        if not 0 <= worker < (1 << WORKER_BITS):
+            raise ValueError(f"worker index must fit in {WORKER_BITS} bits: {worker}")
+        self.run_nonce = run_nonce
+        self.worker = worker
+        self._prefix = ID_BASE + ((run_nonce << (WORKER_BITS + COUNTER_BITS)) | (worker << COUNTER_BITS))
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _next_counter(self, count=1):
+        with self._lock:
+            first = self._counter
+            if first + count > (1 << COUNTER_BITS):
+                raise RuntimeError("ID range of this worker is exhausted")
+            self._counter += count
+        return first
+
+    @property
+    def allocated(self):
+        """How many IDs/usernames this allocator has handed out so far"""
+        return self._counter
+
+    def id_at(self, counter):
+        return self._prefix + _check_counter(counter)
+
+    def username_at(self, counter, prefix="user"):
+        _check_counter(counter)
+        return f"{prefix}_{_base36(self.run_nonce)}w{self.worker}n{_base36(counter)}"
+
+    def next_id(self):
+        return self._prefix + self._next_counter()
+
+    def next_ids(self, count):
+        """A contiguous block of `count` IDs reserved for one test (e.g. bulk creation)"""
+        first = self._prefix + self._next_counter(count)
+        return list(range(first, first + count))
+
+    def next_username(self, prefix="user"):
+        return self.username_at(self._next_counter(), prefix)  # e.g. user_5bx3w2n1a
+
+
+def _check_counter(counter):
+    """A counter outside its bits would run into the next worker's (or run's) IDs"""
+    if not 0 <= counter < (1 << COUNTER_BITS):
+        raise ValueError(f"counter must fit in {COUNTER_BITS} bits: {counter}")
+    return counter
+
+
+def split_id(value):
+    """Allocated ID -> (run_nonce, worker, counter), None if it cannot be one"""
+    value -= ID_BASE
+    if value < 0 or value >= 1 << (NONCE_BITS + WORKER_BITS + COUNTER_BITS):
+        return None
+    worker = (value >> COUNTER_BITS) & ((1 << WORKER_BITS) - 1)
+    return value >> (WORKER_BITS + COUNTER_BITS), worker, value & ((1 << COUNTER_BITS) - 1)
+
+
+def split_username(username):
+    """Allocated username -> (prefix, run_nonce, worker, counter), None if it cannot be one"""
+    match = _USERNAME.fullmatch(username)
+    if match is None:
+        return None
+    prefix, nonce, worker, counter = match.groups()
+    return prefix, int(nonce, 36), int(worker), int(counter, 36)
+
+
+def _base36(value):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        value, rem = divmod(value, 36)
+        out = digits[rem] + out
+        if not value:
+            return out
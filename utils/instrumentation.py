@@ -0,0 +1,157 @@
+"""
+Per-request timing for PetStoreClient.
+
+TimedHTTPAdapter swaps in urllib3 connections that measure DNS resolution and connection
+setup (TCP + TLS) of new connections; PetStoreClient adds TTFB, total time, status and
+bytes and hands every record to its listeners. RequestMetrics is such a listener:
+it keeps the records of the running test and per-endpoint samples for the session summary.
+"""
+import math
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+_local = threading.local()
+
+
+def start_timing():
+    """Starts collecting connection timings of the current thread's request"""
+    _local.timing = timing = {"dns_s": 0.0, "connect_s": 0.0}
+    return timing
+
+
+def stop_timing():
+    _local.timing = None
+
+
+class _TimedConnectionMixin:
+
+    def _new_conn(self):
+        timing = getattr(_local, "timing", None)
+        if timing is None:
+            return super()._new_conn()
+        dns_host = self._dns_host
+        started = time.perf_counter()
+        try:
+            # resolve here to time DNS separately; urllib3 then connects to the IP literals
+            resolved = socket.getaddrinfo(dns_host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            resolved = []  # let urllib3 raise its own NameResolutionError
+        timing["dns_s"] += time.perf_counter() - started
+        addresses = list(dict.fromkeys(sockaddr[0] for *_, sockaddr in resolved)) or [dns_host]
+        try:
+            # every address in turn, like urllib3's create_connection (e.g. IPv4 after an unreachable IPv6)
+            for index, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError:  # NewConnectionError included
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = dns_host
+
+    def connect(self):
+        timing = getattr(_local, "timing", None)
+        started = time.perf_counter()
+        super().connect()
+        if timing is not None:
+            timing["connect_s"] += time.perf_counter() - started - timing["dns_s"]
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report DNS and connect times"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class RequestMetrics:
+    """PetStoreClient listener: per-test records and per-endpoint samples (one instance per xdist worker)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._test_records = []
+        self.samples = defaultdict(list)  # "GET /pet/{petId}" -> [record, ...]
+
+    def __call__(self, record):
+        key = f"{record['method']} {record['endpoint']}"
+        with self._lock:
+            self._test_records.append(record)
+            self.samples[key].append({k: record[k] for k in
+                                      ("status", "bytes_in", "bytes_out", "dns_s", "connect_s", "ttfb_s", "total_s")})
+
+    def drain_test_records(self):
+        with self._lock:
+            records, self._test_records = self._test_records, []
+        return records
+
+    def export(self):
+        """Raw per-endpoint samples, JSON-serializable (merged on the xdist controller)"""
+        with self._lock:
+            return {key: list(values) for key, values in self.samples.items()}
+
+
+def summarize(exports):
+    """Merge export() results of several workers into per-endpoint p50/p95/p99 statistics"""
+    merged = defaultdict(list)
+    for export in exports:
+        for key, values in export.items():
+            merged[key].extend(values)
+
+    summary = {}
+    for key, values in merged.items():
+        totals = sorted(v["total_s"] for v in values)
+        ttfbs = sorted(v["ttfb_s"] for v in values)
+        summary[key] = {
+            "count": len(values),
+            "errors": sum(1 for v in values if v["status"] is None or v["status"] >= 500),
+            "p50_s": round(percentile(totals, 50), 4),
+            "p95_s": round(percentile(totals, 95), 4),
+            "p99_s": round(percentile(totals, 99), 4),
+            "ttfb_p50_s": round(percentile(ttfbs, 50), 4),
+            "dns_total_s": round(sum(v["dns_s"] for v in values), 4),
+            "connect_total_s": round(sum(v["connect_s"] for v in values), 4),
+            "new_connections": sum(1 for v in values if v["connect_s"] > 0),
+            "bytes_in": sum(v["bytes_in"] for v in values),
+            "bytes_out": sum(v["bytes_out"] for v in values),
+        }
+    return summary
+
+
+REQUEST_METRICS = RequestMetrics()
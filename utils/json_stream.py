@@ -0,0 +1,75 @@
+"""
+Incremental parsing of a top-level JSON array.
+
+iter_json_array() takes an iterable of byte chunks (e.g. resp.iter_content()) and yields the
+array elements one by one. Only the unparsed tail of the current chunk and the element being
+decoded are kept in memory, so memory stays bounded regardless of the array size, and the
+caller can stop early.
+"""
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        """Drops the consumed part and appends the next chunk; raises ValueError on unexpected end"""
+        if self.eof:
+            raise ValueError("Truncated JSON array")
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        try:
+            self.text += self._utf8.decode(next(self._chunks))
+        except StopIteration:
+            self.text += self._utf8.decode(b"", final=True)
+            self.eof = True
+
+    def next_char(self):
+        """Next non-whitespace character (reading more chunks if needed)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            self.read_more()
+
+
+def iter_json_array(chunks):
+    buf = _Buffer(chunks)
+    if buf.next_char() != "[":
+        raise ValueError(f"Expected a JSON array, got {buf.text[buf.pos]!r}")
+    buf.pos += 1
+    if buf.next_char() == "]":
+        return
+
+    while True:
+        try:
+            value, end = _decoder.raw_decode(buf.text, buf.pos)
+        except json.JSONDecodeError:
+            # the element is split between chunks
+            buf.read_more()
+            continue
+        if end == len(buf.text) and not buf.eof and not isinstance(value, (dict, list, str)):
+            # a number or literal at the very end of the buffer may continue in the next chunk
+            buf.read_more()
+            continue
+        yield value
+        buf.pos = end
+
+        separator = buf.next_char()
+        buf.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON array, got {separator!r}")
+        buf.next_char()
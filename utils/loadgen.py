@@ -0,0 +1,258 @@
+"""
+Load / soak generator built on PetStoreClient and the payloads used by the functional tests.
+
+Drives a weighted mix of operations either
+    open-loop   (--rate N: N arrivals per second regardless of how fast responses come back;
+                 latency is measured from the scheduled start, so queueing is not hidden), or
+    closed-loop (--concurrency N: N workers, each sends the next request when the previous one returns)
+for --duration seconds, and reports HDR-style latency histograms per operation plus
+per-second throughput and error-rate series.
+
+Examples:
+    python -m utils.loadgen --concurrency 8 --duration 30
+    python -m utils.loadgen --rate 50 --duration 60 --mix "get_pet=5,find_by_status=1,add_pet=1"
+    python -m utils.loadgen --local --concurrency 4 --duration 5      # offline smoke against the stand-in
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import PetStoreClient
+from utils.cleanup import CleanupSweeper
+from utils.histogram import LatencyHistogram
+from utils.id_allocator import IdAllocator, new_run_nonce
+from utils.payloads import DEFAULT_PASSWORD, order_payload, pet_payload, user_payload
+
+DEFAULT_MIX = "add_pet=2,get_pet=5,find_by_status=1,create_order=1,get_inventory=1,login_user=1"
+PET_STATUSES = ("available", "pending", "sold")
+
+
+class LoadContext:
+    """Client plus the entities created so far (read operations pick among them)"""
+
+    def __init__(self, client):
+        self.client = client
+        self.ids = IdAllocator(new_run_nonce())
+        self.pet_ids = deque(maxlen=1000)
+        self.created = {"pet": [], "user": [], "order": []}
+        self.username = self.ids.next_username("load")
+        self._lock = threading.Lock()
+
+    def remember(self, kind, entity_id):
+        with self._lock:
+            self.created[kind].append(entity_id)
+            if kind == "pet":
+                self.pet_ids.append(entity_id)
+
+    def random_pet_id(self):
+        with self._lock:
+            return random.choice(self.pet_ids)
+
+    def setup(self, seed_pets=5):
+        for _ in range(seed_pets):
+            op_add_pet(self)
+        user_id = self.ids.next_id()
+        if self.client.create_user(user_payload(user_id, self.username)).status_code == 200:
+            self.remember("user", self.username)
+
+
+def op_add_pet(ctx):
+    pet_id = ctx.ids.next_id()
+    resp = ctx.client.add_pet(pet_payload(pet_id, status=random.choice(PET_STATUSES)))
+    if resp.status_code == 200:
+        ctx.remember("pet", pet_id)
+    return resp
+
+
+def op_get_pet(ctx):
+    return ctx.client.get_pet(ctx.random_pet_id())
+
+
+def op_find_by_status(ctx):
+    return ctx.client.find_by_status(random.choice(PET_STATUSES))
+
+
+def op_create_order(ctx):
+    order_id = ctx.ids.next_id()
+    resp = ctx.client.create_order(order_payload(order_id, ctx.random_pet_id()))
+    if resp.status_code == 200:
+        ctx.remember("order", order_id)
+    return resp
+
+
+def op_get_inventory(ctx):
+    return ctx.client.get_inventory()
+
+
+def op_login_user(ctx):
+    return ctx.client.login_user(ctx.username, DEFAULT_PASSWORD)
+
+
+OPERATIONS = {
+    "add_pet": op_add_pet,
+    "get_pet": op_get_pet,
+    "find_by_status": op_find_by_status,
+    "create_order": op_create_order,
+    "get_inventory": op_get_inventory,
+    "login_user": op_login_user,
+}
+
+
+def parse_mix(text):
+    """'get_pet=5,add_pet=1' -> [('get_pet', 5.0), ('add_pet', 1.0)]"""
+    mix = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {sorted(OPERATIONS)}")
+        mix.append((name, float(weight or 1)))
+    if not mix:
+        raise ValueError("Operation mix is empty")
+    return mix
+
+
+class LoadResults:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.series = {}  # second -> {"requests": n, "errors": n}
+        self.started = time.monotonic()
+
+    def record(self, operation, latency, ok, finished_at):
+        second = int(finished_at - self.started)
+        with self._lock:
+            self.histograms.setdefault(operation, LatencyHistogram()).record(latency)
+            point = self.series.setdefault(second, {"requests": 0, "errors": 0})
+            point["requests"] += 1
+            point["errors"] += 0 if ok else 1
+
+    def to_dict(self, duration):
+        overall = LatencyHistogram()
+        for histogram in self.histograms.values():
+            overall.merge(histogram)
+        errors = sum(p["errors"] for p in self.series.values())
+        return {
+            "duration_s": duration,
+            "requests": overall.total,
+            "throughput_rps": round(overall.total / duration, 2) if duration else None,
+            "error_rate": round(errors / overall.total, 4) if overall.total else None,
+            "latency": overall.to_dict(),
+            "operations": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+            "series": [
+                {"second": s, "rps": p["requests"], "errors": p["errors"],
+                 "error_rate": round(p["errors"] / p["requests"], 4)}
+                for s, p in sorted(self.series.items())
+            ],
+        }
+
+
+def _execute(ctx, results, operation, scheduled):
+    try:
+        ok = OPERATIONS[operation](ctx).status_code < 400
+    except Exception:
+        ok = False
+    finished = time.monotonic()
+    results.record(operation, finished - scheduled, ok, finished)
+
+
+def run_closed_loop(ctx, mix, concurrency, duration):
+    names, weights = zip(*mix)
+    results = LoadResults()
+    deadline = results.started + duration
+
+    def worker():
+        while time.monotonic() < deadline:
+            _execute(ctx, results, random.choices(names, weights)[0], time.monotonic())
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_open_loop(ctx, mix, rate, duration, max_in_flight):
+    names, weights = zip(*mix)
+    results = LoadResults()
+    interval = 1.0 / rate
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load") as pool:
+        for i in range(int(rate * duration)):
+            scheduled = results.started + i * interval
+            pause = scheduled - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            pool.submit(_execute, ctx, results, random.choices(names, weights)[0], scheduled)
+    return results
+
+
+def print_report(report):
+    print(f"requests={report['requests']} throughput={report['throughput_rps']} rps "
+          f"error_rate={report['error_rate']}")
+    print(f"{'operation':<16}{'count':>8}{'p50, ms':>10}{'p90, ms':>10}{'p99, ms':>10}{'p99.9, ms':>11}{'max, ms':>10}")
+    rows = list(report["operations"].items()) + [("ALL", report["latency"])]
+    for name, h in rows:
+        if not h["count"]:
+            continue
+        print(f"{name:<16}{h['count']:>8}{h['p50_s'] * 1000:>10.1f}{h['p90_s'] * 1000:>10.1f}"
+              f"{h['p99_s'] * 1000:>10.1f}{h['p99.9_s'] * 1000:>11.1f}{h['max_s'] * 1000:>10.1f}")
+    print("second   rps  errors")
+    for point in report["series"]:
+        print(f"{point['second']:>6}{point['rps']:>6}{point['errors']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rate", type=float, help="open-loop: arrivals per second")
+    mode.add_argument("--concurrency", type=int, help="closed-loop: number of concurrent workers (default 4)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds (default 30)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted operations (default {DEFAULT_MIX})")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="open-loop: max concurrent requests")
+    parser.add_argument("--base-url", default=None, help="defaults to BASE_URL from .env")
+    parser.add_argument("--local", action="store_true", help="run against the in-process PetStore stand-in")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--no-cleanup", action="store_true", help="keep created entities")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    server = None
+    base_url = args.base_url
+    if args.local:
+        from utils.local_petstore import LocalPetStore
+        server = LocalPetStore().start()
+        base_url = server.base_url
+
+    workers = args.max_in_flight if args.rate else (args.concurrency or 4)
+    client = PetStoreClient(base_url=base_url, pool_maxsize=workers)
+    try:
+        ctx = LoadContext(client)
+        ctx.setup()
+        if args.rate:
+            results = run_open_loop(ctx, mix, args.rate, args.duration, args.max_in_flight)
+        else:
+            results = run_closed_loop(ctx, mix, args.concurrency or 4, args.duration)
+        report = results.to_dict(round(time.monotonic() - results.started, 3))
+        if not args.no_cleanup:
+            sweeper = CleanupSweeper(client)
+            sweeper.submit(ctx.created)
+            sweeper.close()
+            report["cleanup"] = sweeper.summary()
+    finally:
+        client.close()
+        if server:
+            server.stop()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+In-process stand-in for the Swagger PetStore (v2) used for fast offline runs.
+
+Implements the pet, store and user endpoints that PetStoreClient calls, with the
+same paths, status codes and response shapes as the public server.
+Optional knobs emulate eventual consistency: a write becomes visible to reads
+only after `consistency_delay` (+ random `consistency_jitter`) seconds, so the
+get_with_retry polling paths are still exercised.
+
+Usage:
+    with LocalPetStore(consistency_delay=0.2) as server:
+        client = PetStoreClient(base_url=server.base_url)
+"""
+import email.parser
+import email.policy
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/v2"
+
+
+class _VersionedStore:
+    """Key -> history of (visible_at, value); value None means deleted"""
+
+    def __init__(self, delay=0.0, jitter=0.0):
+        self.delay = delay
+        self.jitter = jitter
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _visible_at(self):
+        return time.monotonic() + self.delay + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def put(self, key, value):
+        with self._lock:
+            history = self._data.setdefault(key, [])
+            history.append((self._visible_at(), value))
+            del history[:-8]  # only the latest versions are ever needed
+
+    def delete(self, key):
+        """Returns False if the key is not visible (nothing to delete)"""
+        if self.get(key) is None:
+            return False
+        self.put(key, None)
+        return True
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            for visible_at, value in reversed(self._data.get(key, ())):
+                if visible_at <= now:
+                    return value
+        return None
+
+    def values(self):
+        with self._lock:
+            keys = list(self._data)
+        return [v for v in (self.get(k) for k in keys) if v is not None]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    routes = [
+        ("GET", r"/pet/findByStatus", "find_by_status"),
+        ("POST", r"/pet/?", "add_pet"),
+        ("PUT", r"/pet/?", "update_pet"),
+        ("GET", r"/pet/(?P<pet_id>-?\d+)", "get_pet"),
+        ("POST", r"/pet/(?P<pet_id>-?\d+)", "update_pet_form"),
+        ("DELETE", r"/pet/(?P<pet_id>-?\d+)", "delete_pet"),
+        ("POST", r"/pet/(?P<pet_id>-?\d+)/uploadImage", "upload_image"),
+        ("GET", r"/store/inventory", "inventory"),
+        ("POST", r"/store/order", "create_order"),
+        ("GET", r"/store/order/(?P<order_id>-?\d+)", "get_order"),
+        ("DELETE", r"/store/order/(?P<order_id>-?\d+)", "delete_order"),
+        ("POST", r"/user/createWith(?:List|Array)", "create_users"),
+        ("GET", r"/user/login", "login"),
+        ("GET", r"/user/logout", "logout"),
+        ("POST", r"/user/?", "create_user"),
+        ("GET", r"/user/(?P<username>[^/]+)", "get_user"),
+        ("PUT", r"/user/(?P<username>[^/]+)", "update_user"),
+        ("DELETE", r"/user/(?P<username>[^/]+)", "delete_user"),
+    ]
+    compiled_routes = [(m, re.compile(p + r"$"), name) for m, p, name in routes]
+
+    def log_message(self, *args):
+        pass
+
+    # --- plumbing ---
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        self.body = self._read_body()
+
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        path_known = False
+        for route_method, pattern, name in self.compiled_routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                path_known = True
+                continue
+            try:
+                status, payload = getattr(self, name)(**match.groupdict())
+            except (ValueError, TypeError, KeyError):
+                status, payload = 400, _message(400, "bad input", "error")
+            return self._send(status, payload)
+        if path_known:
+            return self._send(405, _message(405, "Method Not Allowed", "unknown"))
+        return self._send(404, _message(404, "Not Found", "unknown"))
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+        chunks = []  # streamed upload of unknown size
+        while size := int(self.rfile.readline().split(b";")[0], 16):
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()  # CRLF after the chunk
+        while self.rfile.readline().strip():
+            pass  # trailer
+        return b"".join(chunks)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        etag = None
+        if self.command == "GET" and status == 200:
+            # weak validator so conditional GETs (If-None-Match -> 304) can be exercised offline
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self):
+        return json.loads(self.body or b"null")
+
+    @property
+    def pets(self):
+        return self.server.pets
+
+    @property
+    def orders(self):
+        return self.server.orders
+
+    @property
+    def users(self):
+        return self.server.users
+
+    # --- PET ---
+
+    def add_pet(self):
+        pet = self._json()
+        if not isinstance(pet, dict):
+            return 405, _message(405, "Invalid input", "unknown")
+        pet.setdefault("id", self.server.next_id())
+        pet.setdefault("photoUrls", [])
+        pet.setdefault("tags", [])
+        self.pets.put(int(pet["id"]), pet)
+        return 200, pet
+
+    def update_pet(self):
+        # the public server upserts on PUT as well
+        return self.add_pet()
+
+    def get_pet(self, pet_id):
+        pet = self.pets.get(int(pet_id))
+        if pet is None:
+            return 404, _message(1, "Pet not found", "error")
+        return 200, pet
+
+    def delete_pet(self, pet_id):
+        if not self.pets.delete(int(pet_id)):
+            return 404, _message(404, "Pet not found", "unknown")
+        return 200, _message(200, pet_id)
+
+    def find_by_status(self):
+        statuses = {s for value in self.query.get("status", []) for s in value.split(",")}
+        return 200, [pet for pet in self.pets.values() if pet.get("status") in statuses]
+
+    def update_pet_form(self, pet_id):
+        pet = self.pets.get(int(pet_id))
+        if pet is None:
+            return 404, _message(404, "not found", "unknown")
+        form = {k: v[-1] for k, v in parse_qs(self.body.decode()).items()}
+        updated = dict(pet, **{k: form[k] for k in ("name", "status") if k in form})
+        self.pets.put(int(pet_id), updated)
+        return 200, _message(200, pet_id)
+
+    def upload_image(self, pet_id):
+        content_type = self.headers.get("Content-Type", "")
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + self.body
+        )
+        metadata, filename, size = None, None, 0
+        for part in message.iter_parts():
+            field = part.get_param("name", header="content-disposition")
+            if field == "file":
+                filename = part.get_filename()
+                size = len(part.get_payload(decode=True) or b"")
+            elif field == "additionalMetadata":
+                metadata = part.get_content()
+        if filename is None:
+            return 415, _message(415, "no file", "unknown")
+        return 200, _message(200, f"additionalMetadata: {metadata}\nFile uploaded to ./{filename}, {size} bytes")
+
+    # --- STORE ---
+
+    def inventory(self):
+        counts = {}
+        for pet in self.pets.values():
+            status = pet.get("status") or "unknown"
+            counts[status] = counts.get(status, 0) + 1
+        return 200, counts
+
+    def create_order(self):
+        order = self._json()
+        if not isinstance(order, dict):
+            return 400, _message(400, "Invalid Order", "unknown")
+        order.setdefault("id", self.server.next_id())
+        order.setdefault("complete", False)
+        self.orders.put(int(order["id"]), order)
+        return 200, order
+
+    def get_order(self, order_id):
+        order = self.orders.get(int(order_id))
+        if order is None:
+            return 404, _message(1, "Order not found", "error")
+        return 200, order
+
+    def delete_order(self, order_id):
+        if not self.orders.delete(int(order_id)):
+            return 404, _message(404, "Order Not Found", "unknown")
+        return 200, _message(200, order_id)
+
+    # --- USER ---
+
+    def create_user(self):
+        user = self._json()
+        if not isinstance(user, dict) or not user.get("username"):
+            return 400, _message(400, "Invalid user", "unknown")
+        user.setdefault("id", self.server.next_id())
+        self.users.put(user["username"], user)
+        return 200, _message(200, str(user["id"]))
+
+    def create_users(self):
+        users = self._json()
+        if not isinstance(users, list):
+            return 400, _message(400, "Invalid list", "unknown")
+        for user in users:
+            self.users.put(user["username"], user)
+        return 200, _message(200, "ok")
+
+    def get_user(self, username):
+        user = self.users.get(username)
+        if user is None:
+            return 404, _message(1, "User not found", "error")
+        return 200, user
+
+    def update_user(self, username):
+        if self.users.get(username) is None:
+            return 404, _message(404, "User not found", "unknown")
+        user = self._json()
+        self.users.put(username, user)
+        return 200, _message(200, str(user.get("id")))
+
+    def delete_user(self, username):
+        if not self.users.delete(username):
+            return 404, _message(404, "User not found", "unknown")
+        return 200, _message(200, username)
+
+    def login(self):
+        username = self.query.get("username", [""])[-1]
+        password = self.query.get("password", [""])[-1]
+        user = self.users.get(username)
+        if user is None or user.get("password") != password:
+            return 400, _message(400, "Invalid username/password supplied", "unknown")
+        return 200, _message(200, f"logged in user session:{int(time.time() * 1000)}")
+
+    def logout(self):
+        return 200, _message(200, "ok")
+
+
+def _message(code, message, type_="unknown"):
+    return {"code": code, "type": type_, "message": str(message)}
+
+
+class _PetStoreServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, consistency_delay=0.0, consistency_jitter=0.0):
+        super().__init__(address, _Handler)
+        self.pets = _VersionedStore(consistency_delay, consistency_jitter)
+        self.orders = _VersionedStore(consistency_delay, consistency_jitter)
+        self.users = _VersionedStore(consistency_delay, consistency_jitter)
+        self._ids = iter(range(9_000_000_000, 10_000_000_000))
+        self._ids_lock = threading.Lock()
+
+    def next_id(self):
+        with self._ids_lock:
+            return next(self._ids)
+
+
+class LocalPetStore:
+    """Runs the stand-in server in a background thread on a free port (port=0)"""
+
+    def __init__(self, host="127.0.0.1", port=0, consistency_delay=0.0, consistency_jitter=0.0):
+        self._server = _PetStoreServer((host, port), consistency_delay, consistency_jitter)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-petstore", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,261 @@
+"""
+Compact typed models for PetStore payloads.
+
+- Category, Tag, Pet, Order, User use __slots__ (no per-instance __dict__);
+- to_dict()/to_json() build request payloads, from_dict()/from_json()/from_response() read responses;
+- nested fields of Pet (category, tags) are kept raw and decoded on first access;
+- PetColumns stores a bulk findByStatus result column-wise (ids in an int64 array,
+  repeated strings such as status interned) instead of a list of dicts.
+
+Validation raises ValueError with the offending field name.
+"""
+import json
+from array import array
+
+try:  # optional, noticeably faster on large bodies
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Compact JSON as str"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _check(name, value, types, optional=False):
+    if value is None and optional:
+        return value
+    if isinstance(value, bool) and bool not in types:
+        raise ValueError(f"{name}: expected {'/'.join(t.__name__ for t in types)}, got bool")
+    if not isinstance(value, types):
+        raise ValueError(f"{name}: expected {'/'.join(t.__name__ for t in types)}, got {type(value).__name__}")
+    return value
+
+
+class _Model:
+    __slots__ = ()
+
+    @classmethod
+    def from_json(cls, data):
+        return cls.from_dict(loads(data))
+
+    @classmethod
+    def from_response(cls, resp):
+        return cls.from_json(resp.content)
+
+    def to_json(self):
+        return dumps(self.to_dict())
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Category(_Model):
+    __slots__ = ("id", "name")
+
+    def __init__(self, id=None, name=None):
+        self.id = _check("category.id", id, (int,), optional=True)
+        self.name = _check("category.name", name, (str,), optional=True)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data.get("name"))
+
+    def to_dict(self):
+        return {k: v for k, v in (("id", self.id), ("name", self.name)) if v is not None}
+
+
+class Tag(Category):
+    __slots__ = ()
+
+
+class Pet(_Model):
+    __slots__ = ("id", "name", "status", "photo_urls", "_category", "_tags")
+
+    def __init__(self, id=None, name=None, status=None, photo_urls=(), category=None, tags=()):
+        self.id = _check("pet.id", id, (int,), optional=True)
+        self.name = _check("pet.name", name, (str,), optional=True)
+        self.status = _check("pet.status", status, (str,), optional=True)
+        self.photo_urls = list(photo_urls or ())
+        for url in self.photo_urls:
+            _check("pet.photoUrls[]", url, (str,))
+        self._category = category  # Category, raw dict (decoded lazily) or None
+        self._tags = list(tags or ())  # Tag objects or raw dicts (decoded lazily)
+
+    @property
+    def category(self):
+        if isinstance(self._category, dict):
+            self._category = Category.from_dict(self._category)
+        return self._category
+
+    @category.setter
+    def category(self, value):
+        self._category = value
+
+    @property
+    def tags(self):
+        if any(isinstance(t, dict) for t in self._tags):
+            self._tags = [Tag.from_dict(t) if isinstance(t, dict) else t for t in self._tags]
+        return self._tags
+
+    @tags.setter
+    def tags(self, value):
+        self._tags = list(value)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data.get("name"), data.get("status"), data.get("photoUrls") or (),
+                   data.get("category"), data.get("tags") or ())
+
+    def to_dict(self):
+        data = {"id": self.id}
+        if self._category is not None:
+            data["category"] = self._category if isinstance(self._category, dict) else self._category.to_dict()
+        data["name"] = self.name
+        data["photoUrls"] = list(self.photo_urls)
+        data["tags"] = [t if isinstance(t, dict) else t.to_dict() for t in self._tags]
+        data["status"] = self.status
+        return {k: v for k, v in data.items() if v is not None}
+
+
+class Order(_Model):
+    __slots__ = ("id", "pet_id", "quantity", "ship_date", "status", "complete")
+
+    def __init__(self, id=None, pet_id=None, quantity=1, ship_date=None, status=None, complete=False):
+        self.id = _check("order.id", id, (int,), optional=True)
+        self.pet_id = _check("order.petId", pet_id, (int,), optional=True)
+        self.quantity = _check("order.quantity", quantity, (int,))
+        if quantity < 0:
+            raise ValueError("order.quantity: must not be negative")
+        self.ship_date = _check("order.shipDate", ship_date, (str,), optional=True)
+        self.status = _check("order.status", status, (str,), optional=True)
+        self.complete = _check("order.complete", complete, (bool,))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data.get("petId"), data.get("quantity", 0), data.get("shipDate"),
+                   data.get("status"), data.get("complete", False))
+
+    def to_dict(self):
+        data = {"id": self.id, "petId": self.pet_id, "quantity": self.quantity, "shipDate": self.ship_date,
+                "status": self.status, "complete": self.complete}
+        return {k: v for k, v in data.items() if v is not None}
+
+
+class User(_Model):
+    __slots__ = ("id", "username", "first_name", "last_name", "email", "password", "phone", "user_status")
+
+    def __init__(self, id=None, username=None, first_name=None, last_name=None, email=None, password=None,
+                 phone=None, user_status=0):
+        self.id = _check("user.id", id, (int,), optional=True)
+        self.username = _check("user.username", username, (str,))
+        if not username:
+            raise ValueError("user.username: must not be empty")
+        self.first_name = _check("user.firstName", first_name, (str,), optional=True)
+        self.last_name = _check("user.lastName", last_name, (str,), optional=True)
+        self.email = _check("user.email", email, (str,), optional=True)
+        self.password = _check("user.password", password, (str,), optional=True)
+        self.phone = _check("user.phone", phone, (str,), optional=True)
+        self.user_status = _check("user.userStatus", user_status, (int,))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data.get("username"), data.get("firstName"), data.get("lastName"),
+                   data.get("email"), data.get("password"), data.get("phone"), data.get("userStatus", 0))
+
+    def to_dict(self):
+        data = {"id": self.id, "username": self.username, "firstName": self.first_name,
+                "lastName": self.last_name, "email": self.email, "password": self.password,
+                "phone": self.phone, "userStatus": self.user_status}
+        return {k: v for k, v in data.items() if v is not None}
+
+
+class PetColumns:
+    """
+    Column-wise collection of pets (e.g. a findByStatus result).
+
+    Scalars live in parallel columns; category/tags/photoUrls stay raw (one shared copy per
+    distinct value) and are decoded only when a row is materialized with pets[i]. Build it from a list of dicts or
+    directly from a stream: PetColumns.from_iter(api_client.iter_pets_by_status("sold")).
+    """
+    __slots__ = ("ids", "names", "statuses", "_extras", "_strings")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.names = []
+        self.statuses = []
+        self._extras = []  # (category, tags, photoUrls) raw, or None when all empty
+        self._strings = {}  # interning table for repeated names/statuses/nested values
+
+    @classmethod
+    def from_iter(cls, pets):
+        columns = cls()
+        for pet in pets:
+            if isinstance(pet, dict):  # the public server occasionally returns junk elements
+                columns.append(pet)
+        return columns
+
+    @classmethod
+    def from_json(cls, data):
+        return cls.from_iter(loads(data))
+
+    def _intern(self, value):
+        if value is None:
+            return None
+        return self._strings.setdefault(value, value)
+
+    def append(self, pet):
+        pet_id = pet.get("id")
+        try:
+            self.ids.append(pet_id if pet_id is not None else -1)
+        except (TypeError, OverflowError):
+            # ids outside int64 (junk on the public server): fall back to a plain list
+            self.ids = list(self.ids)
+            self.ids.append(pet_id)
+        self.names.append(self._intern(pet.get("name")))
+        self.statuses.append(self._intern(pet.get("status")))
+        extras = (pet.get("category"), pet.get("tags"), pet.get("photoUrls"))
+        if any(extras):
+            # most pets of a bulk response share category/tags/photoUrls: keep one copy
+            extras = self._strings.setdefault(dumps(extras), extras)
+        else:
+            extras = None
+        self._extras.append(extras)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        category, tags, photo_urls = self._extras[index] or (None, None, None)
+        pet_id = self.ids[index]
+        return Pet(pet_id if pet_id != -1 else None, self.names[index], self.statuses[index],
+                   photo_urls or (), category, tags or ())
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def index_of(self, pet_id):
+        """Row of the pet with pet_id, or -1"""
+        try:
+            return self.ids.index(pet_id)
+        except ValueError:
+            return -1
+
+    def count_by_status(self):
+        counts = {}
+        for status in self.statuses:
+            counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,134 @@
+"""
+Streaming multipart/form-data bodies for uploads (POST /pet/{petId}/uploadImage).
+
+MultipartBody is handed to requests as `data=`: it is iterated chunk by chunk while the request
+is sent, so an image is never copied into one big body in memory. The file part may come from
+- bytes / bytearray / memoryview: sent as memoryview slices, no copies;
+- a path: read in chunks; files of MMAP_THRESHOLD bytes and more are memory-mapped;
+- a binary file object: read in chunks from its current position;
+- any iterable of bytes (e.g. a generator): sent as it is produced.
+When the total size is known it is sent as Content-Length, otherwise the body goes out with
+Transfer-Encoding: chunked. Nothing is opened until the body is iterated, and every iteration
+starts from the beginning again (except for generators), so a body can be re-sent.
+"""
+import mmap
+import os
+import secrets
+
+CHUNK_SIZE = 256 * 1024
+MMAP_THRESHOLD = 8 * 1024 * 1024
+
+
+class MultipartBody:
+
+    def __init__(self, source, field="file", filename=None, content_type="application/octet-stream", fields=None,
+                 chunk_size=CHUNK_SIZE):
+        """
+        :param source: bytes-like object, path, binary file object or iterable of bytes
+        :param fields: extra text fields sent before the file, e.g. {"additionalMetadata": "..."}
+        """
+        self.source = source
+        self.chunk_size = chunk_size
+        self.boundary = secrets.token_hex(16)
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._start = _tell(source) if _is_file(source) else 0  # a file object is sent from where it stands
+        filename = filename or _default_filename(source)
+        head = b"".join(
+            f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode()
+            for name, value in (fields or {}).items() if value is not None
+        )
+        self._head = head + (f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; "
+                             f"filename=\"{filename}\"\r\nContent-Type: {content_type}\r\n\r\n").encode()
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+        size = _source_size(source, self._start)
+        self.length = None if size is None else len(self._head) + size + len(self._tail)
+
+    def __len__(self):
+        # requests sends Content-Length when len() is known; 0 means unknown -> chunked transfer
+        return self.length or 0
+
+    def __bool__(self):
+        return True  # an unknown length must not make the body look empty (requests does `data or {}`)
+
+    def __iter__(self):
+        yield self._head
+        yield from self._file_chunks()
+        yield self._tail
+
+    def _file_chunks(self):
+        source, size = self.source, self.chunk_size
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source).cast("B")
+            for offset in range(0, len(view), size):
+                yield view[offset:offset + size]
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from _read_file(f, size)
+        elif _is_file(source):
+            if self._start is not None and source.seekable():
+                source.seek(self._start)  # rewind for a re-send
+            yield from _read_file(source, size)
+        else:
+            for chunk in source:
+                if chunk:
+                    yield chunk
+
+    def __repr__(self):
+        return f"<MultipartBody {self.length if self.length is not None else 'chunked'} bytes>"
+
+
+def _read_file(f, size):
+    position = _tell(f)
+    if position is not None and _has_fileno(f) and os.fstat(f.fileno()).st_size - position >= MMAP_THRESHOLD:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)  # aggressive read-ahead
+            # bytes slices, not memoryviews: an exported view would keep the map from closing
+            for offset in range(position, len(mapped), size):
+                yield mapped[offset:offset + size]
+        return
+    while chunk := f.read(size):
+        yield chunk
+
+
+def _is_file(source):
+    return hasattr(source, "read")
+
+
+def _tell(f):
+    try:
+        return f.tell()
+    except (AttributeError, OSError):
+        return None  # pipe, socket file
+
+
+def _has_fileno(f):
+    try:
+        f.fileno()
+        return True
+    except (AttributeError, OSError, ValueError):
+        return False  # e.g. io.BytesIO
+
+
+def _source_size(source, start):
+    """Bytes the file part will have, None if unknown (iterables, non-seekable files)"""
+    if isinstance(source, (bytes, bytearray)):
+        return len(source)
+    if isinstance(source, memoryview):
+        return source.nbytes
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if _is_file(source) and start is not None:
+        if _has_fileno(source):
+            return os.fstat(source.fileno()).st_size - start
+        if hasattr(source, "getbuffer"):
+            with source.getbuffer() as buffer:
+                return buffer.nbytes - start
+    return None
+
+
+def _default_filename(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    name = getattr(source, "name", None)
+    return os.path.basename(name) if isinstance(name, str) else "image.jpg"
@@ -0,0 +1,31 @@
+"""
+Request payloads shared by the fixtures in conftest.py and the load generator.
+
+Built through utils.models, so every payload is validated on one path.
+"""
+from datetime import datetime, timezone
+
+from utils.models import Category, Order, Pet, Tag, User
+
+DEFAULT_PASSWORD = "p@ssw0rd!"
+
+_CATS = Category(1, "cats")
+_CUTE = Tag(1, "cute")
+
+
+def pet_payload(pet_id, status="available", name="Chupa"):
+    return Pet(pet_id, name, status, ["https://example.com/cat.jpg"], _CATS, [_CUTE]).to_dict()
+
+
+def order_payload(order_id, pet_id, status="placed", complete=True, quantity=1):
+    return Order(order_id, pet_id, quantity, now_iso(), status, complete).to_dict()
+
+
+def user_payload(id, username, userStatus=0):
+    return User(id, username, "Test", "User", f"{username}@example.com", DEFAULT_PASSWORD, "+1000000000",
+                userStatus).to_dict()
+
+
+def now_iso():
+    """Returns the current date and time in ISO 8601 (UTC)"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
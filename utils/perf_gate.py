@@ -0,0 +1,97 @@
+"""
+Performance regression gate.
+
+Every run stores per-endpoint latency (from utils.instrumentation) and per-test durations;
+a stored baseline is compared against the current run with a relative tolerance.
+Small samples and sub-`floor_s` differences are ignored to keep the gate from flapping. A test's
+duration is a single sample per run, so tests get a coarser floor of their own (`test_floor_s`):
+a 30 ms test that takes 45 ms is jitter, not a regression.
+"""
+import json
+import os
+import time
+import uuid
+
+METRICS = ("p50_s", "p95_s")
+
+
+def build_results(http_summary, test_durations):
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "endpoints": {
+            endpoint: {"count": data["count"], **{m: data[m] for m in METRICS}}
+            for endpoint, data in http_summary.items()
+        },
+        "tests": {nodeid: round(duration, 4) for nodeid, duration in test_durations.items()},
+    }
+
+
+def save(path, results):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline, current, tolerance=0.3, min_samples=5, floor_s=0.005, test_floor_s=0.1):
+    """
+    :return: list of regressions, e.g.
+             {"kind": "endpoint", "name": "GET /store/inventory", "metric": "p95_s",
+              "baseline": 0.120, "current": 0.160, "change": 0.333}
+    """
+    regressions = []
+
+    def check(kind, name, metric, old, new, floor):
+        if old is None or new is None or new - old < floor:
+            return
+        change = (new - old) / old if old else float("inf")
+        if change > tolerance:
+            regressions.append({"kind": kind, "name": name, "metric": metric,
+                                "baseline": old, "current": new, "change": round(change, 3)})
+
+    for endpoint, now in current.get("endpoints", {}).items():
+        before = baseline.get("endpoints", {}).get(endpoint)
+        if not before or min(before["count"], now["count"]) < min_samples:
+            continue
+        for metric in METRICS:
+            check("endpoint", endpoint, metric, before.get(metric), now.get(metric), floor_s)
+
+    for nodeid, duration in current.get("tests", {}).items():
+        check("test", nodeid, "duration_s", baseline.get("tests", {}).get(nodeid), duration, test_floor_s)
+
+    return sorted(regressions, key=lambda r: -r["change"])
+
+
+def format_regression(r):
+    return (f"{r['kind']} {r['name']} {r['metric']}: {r['baseline'] * 1000:.1f} ms -> "
+            f"{r['current'] * 1000:.1f} ms (+{r['change'] * 100:.0f}%)")
+
+
+def write_allure_result(alluredir, regressions, tolerance, failed):
+    """Adds a synthetic 'Performance regression gate' test with the regressions attached to allure-results"""
+    os.makedirs(alluredir, exist_ok=True)
+    now = int(time.time() * 1000)
+    attachment = f"{uuid.uuid4()}-attachment.json"
+    with open(os.path.join(alluredir, attachment), "w", encoding="utf-8") as f:
+        json.dump(regressions, f, indent=2)
+    result = {
+        "uuid": str(uuid.uuid4()),
+        "historyId": "performance-regression-gate",
+        "name": "Performance regression gate",
+        "fullName": "perf_gate#performance_regression_gate",
+        "status": ("failed" if failed else "broken") if regressions else "passed",
+        "statusDetails": {
+            "message": f"{len(regressions)} regression(s) over +{tolerance * 100:.0f}%",
+            "trace": "\n".join(format_regression(r) for r in regressions),
+        },
+        "start": now,
+        "stop": now,
+        "labels": [{"name": "feature", "value": "Performance"}, {"name": "suite", "value": "Performance"}],
+        "attachments": [{"name": "Regressions", "source": attachment, "type": "application/json"}],
+    }
+    with open(os.path.join(alluredir, f"{result['uuid']}-result.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f)
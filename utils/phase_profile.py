@@ -0,0 +1,138 @@
+"""
+--phase-profile: where the wall time of every test goes.
+
+For the running test PhaseProfiler adds up named spans:
+- setup / call / teardown: the pytest phases (their sum is the test's wall time);
+- fixture:<name>: setup of a fixture (its own code up to `yield`, dependencies excluded); a session
+  fixture counts for the test that happened to set it up;
+- make_pet, make_orders, ...: calls of the make_* factories (create + wait until readable), from a
+  fixture or from the test body;
+- cleanup: teardown of the cleanup fixture (deleting what the test created);
+- http: time in HTTP calls (a sum: concurrent calls overlap);
+- sleep: time slept in consistency waits (get_with_retry, wait_until, ...).
+Spans overlap (fixture:pet_id contains its make_pet call, which contains http and sleep), so they
+rank the costs rather than partition the wall time. Per process (xdist worker) the totals of every
+span and the slowest tests are exported; merge_exports() combines them for the session report.
+"""
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ("setup", "call", "teardown")
+MIN_SPAN_S = 0.001  # shorter spans are left out of the per-test breakdown and the report
+
+
+class PhaseProfiler:
+
+    def __init__(self, slowest=10):
+        self.enabled = False
+        self.slowest = slowest
+        self.totals = {}  # span -> {"total_s", "tests", "max_s", "max_test"}
+        self.wall_s = 0.0
+        self.tests = 0
+        self._slowest_tests = []  # [(wall_s, nodeid, spans)], the `slowest` longest tests
+        self._current = None
+        self._lock = threading.Lock()
+
+    def start_test(self):
+        if self.enabled:
+            self._current = {}
+
+    def add(self, name, seconds):
+        if self._current is None:
+            return
+        with self._lock:
+            current = self._current
+            if current is not None:
+                current[name] = current.get(name, 0.0) + seconds
+
+    @contextmanager
+    def span(self, name):
+        if self._current is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed(self, name):
+        """Decorator: calls of the function (sync or async) count as span `name`"""
+
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name):
+                        return await fn(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def finish_test(self, nodeid, phases):
+        """
+        :param phases: {"setup": s, "call": s, "teardown": s} of the test
+        :return: the test's breakdown, None when not profiling
+        """
+        with self._lock:
+            spans, self._current = self._current, None
+        if spans is None:
+            return None
+        spans.update(phases)
+        wall = sum(phases.values())
+        self.tests += 1
+        self.wall_s += wall
+        for name, seconds in spans.items():
+            entry = self.totals.setdefault(name, {"total_s": 0.0, "tests": 0, "max_s": 0.0, "max_test": None})
+            entry["total_s"] += seconds
+            entry["tests"] += 1
+            if entry["max_test"] is None or seconds > entry["max_s"]:
+                entry["max_s"], entry["max_test"] = seconds, nodeid
+        spans = {name: round(seconds, 4) for name, seconds in sorted(spans.items(), key=lambda item: -item[1])
+                 if seconds >= MIN_SPAN_S or name in phases}
+        self._slowest_tests.append((round(wall, 4), nodeid, spans))
+        self._slowest_tests.sort(key=lambda test: -test[0])
+        del self._slowest_tests[self.slowest:]
+        return {"wall_s": round(wall, 4), "spans": spans}
+
+    def export(self):
+        return {
+            "tests": self.tests,
+            "wall_s": round(self.wall_s, 4),
+            "totals": {name: {**entry, "total_s": round(entry["total_s"], 4), "max_s": round(entry["max_s"], 4)}
+                       for name, entry in self.totals.items()},
+            "slowest": [{"nodeid": nodeid, "wall_s": wall, "spans": spans}
+                        for wall, nodeid, spans in self._slowest_tests],
+        }
+
+
+def merge_exports(exports, slowest=10):
+    """Combine per-worker exports; spans ranked by total time"""
+    merged = {"tests": 0, "wall_s": 0.0, "totals": {}, "slowest": []}
+    for export in exports:
+        merged["tests"] += export["tests"]
+        merged["wall_s"] += export["wall_s"]
+        merged["slowest"].extend(export["slowest"])
+        for name, entry in export["totals"].items():
+            total = merged["totals"].setdefault(name, {"total_s": 0.0, "tests": 0, "max_s": 0.0, "max_test": None})
+            total["total_s"] += entry["total_s"]
+            total["tests"] += entry["tests"]
+            if total["max_test"] is None or entry["max_s"] > total["max_s"]:
+                total["max_s"], total["max_test"] = entry["max_s"], entry["max_test"]
+    merged["totals"] = dict(sorted(merged["totals"].items(), key=lambda item: -item[1]["total_s"]))
+    merged["slowest"] = sorted(merged["slowest"], key=lambda test: -test["wall_s"])[:slowest]
+    return merged
+
+
+PROFILER = PhaseProfiler()  # one per process (i.e. per xdist worker)
@@ -0,0 +1,249 @@
+"""
+Request rate limiter and max-in-flight governor shared by all xdist workers on the machine.
+
+Requests are split into endpoint classes:
+    write - any non-GET call
+    poll  - GETs issued by the waiting engine (get_with_retry / wait_until / wait_all)
+    read  - all other GETs
+and every class can have its own limit "RATE[/s][:MAX_IN_FLIGHT]", e.g.
+    --rate-limit "write=10/s:4,read=50/s,poll=20/s:8"
+
+- rate: token bucket (capacity = one second of traffic) kept in a small state file and
+  updated under an exclusive flock, so all processes using the same directory share it;
+- max in flight: one lock file per slot, taken with a non-blocking flock. The OS drops the
+  locks of a crashed worker, so slots never leak. A request is in flight until its response is
+  read; for a streamed response (stream=True) the client holds the slot until it is closed.
+
+Waiting for a token or a slot counts against the test's time budget (utils/budget.py): when the
+wait would outlast it, BudgetExceeded is raised instead of sending late.
+
+Without fcntl (Windows) the limits apply per process only.
+Time spent waiting for a token or a slot is counted per class (see stats()).
+"""
+import contextvars
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.budget import current_budget
+
+try:
+    import fcntl
+except ImportError:  # Windows: limits are per process
+    fcntl = None
+
+ENDPOINT_CLASSES = ("write", "read", "poll")
+
+_STATE = struct.Struct("dd")  # tokens, last refill (epoch seconds)
+_polling = contextvars.ContextVar("petstore_polling", default=False)
+
+
+def parse_limits(spec):
+    """'write=10/s:4,read=50' -> {"write": (10.0, 4), "read": (50.0, None)}; rate 0 = no rate limit"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINT_CLASSES or not value:
+            raise ValueError(f"Bad rate limit {item!r}, expected CLASS=RATE[/s][:MAX_IN_FLIGHT], "
+                             f"CLASS one of {ENDPOINT_CLASSES}")
+        rate, _, in_flight = value.partition(":")
+        rate = float(rate.strip().removesuffix("/s") or 0)
+        limits[name] = (rate, int(in_flight) if in_flight else None)
+    return limits
+
+
+@contextmanager
+def polling():
+    """Marks GETs made inside the block (in this thread / async task) as the `poll` class"""
+    token = _polling.set(True)
+    try:
+        yield
+    finally:
+        _polling.reset(token)
+
+
+def endpoint_class(method):
+    if method != "GET":
+        return "write"
+    return "poll" if _polling.get() else "read"
+
+
+def _check_budget(budget, wait, what):
+    """Raise BudgetExceeded if waiting `wait` more seconds would outlast the test's budget"""
+    remaining = budget.remaining() if budget is not None else None
+    if remaining is not None and wait >= remaining:
+        budget.exceeded(what)
+
+
+def _lock(fd, blocking=True):
+    """Exclusive flock; returns False if non-blocking and already taken by another process"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class _TokenBucket:
+
+    def __init__(self, path, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Takes a token; returns 0, or the seconds to wait before trying again"""
+        with self._lock:
+            _lock(self._fd)
+            try:
+                raw = os.pread(self._fd, _STATE.size, 0)
+                now = time.time()  # wall clock: comparable between processes
+                tokens, updated = _STATE.unpack(raw) if len(raw) == _STATE.size else (self.capacity, now)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                os.pwrite(self._fd, _STATE.pack(tokens, now), 0)
+                return wait
+            finally:
+                _unlock(self._fd)
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _Slots:
+
+    def __init__(self, directory, name, size):
+        self._fds = [os.open(os.path.join(directory, f"{name}.slot{i}"), os.O_RDWR | os.O_CREAT, 0o644)
+                     for i in range(size)]
+        self._held = set()  # flock is per open file, so threads of one process are tracked here
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            for index, fd in enumerate(self._fds):
+                if index not in self._held and _lock(fd, blocking=False):
+                    self._held.add(index)
+                    return index
+        return None
+
+    def release(self, index):
+        with self._lock:
+            _unlock(self._fds[index])
+            self._held.discard(index)
+
+    def close(self):
+        for fd in self._fds:
+            os.close(fd)
+
+
+class _Release:
+    """Releases an in-flight slot once, however often it is called"""
+
+    def __init__(self, slots=None, index=None):
+        self._slots = slots
+        self._index = index
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            slots, self._slots = self._slots, None
+        if slots is not None:
+            slots.release(self._index)
+
+
+class RateLimiter:
+
+    def __init__(self, limits, directory):
+        """
+        :param limits: {class: (rate_per_s, max_in_flight)}, see parse_limits()
+        :param directory: shared state; every process using the same directory shares the limits
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.limits = dict(limits)
+        self._buckets = {name: _TokenBucket(os.path.join(directory, f"{name}.bucket"), rate)
+                         for name, (rate, _) in self.limits.items() if rate > 0}
+        self._slots = {name: _Slots(directory, name, in_flight)
+                       for name, (_, in_flight) in self.limits.items() if in_flight}
+        self._stats_lock = threading.Lock()
+        self._stats = {name: {"requests": 0, "throttled": 0, "throttled_s": 0.0, "max_wait_s": 0.0}
+                       for name in self.limits}
+
+    def acquire(self, method):
+        """
+        Blocks until the request of `method` may be sent; returns a callable that releases its
+        in-flight slot (idempotent). Raises BudgetExceeded if the test's budget runs out first.
+        """
+        name = endpoint_class(method)
+        if name not in self.limits:
+            return _Release()
+
+        budget = current_budget()
+        started = time.perf_counter()
+        bucket = self._buckets.get(name)
+        if bucket is not None:
+            while (wait := bucket.take()) > 0:
+                _check_budget(budget, wait, f"{method} waiting for a {name} token of the rate limiter")
+                time.sleep(wait)
+        slots = self._slots.get(name)
+        index = None
+        if slots is not None:
+            backoff = 0.001
+            while (index := slots.try_acquire()) is None:
+                _check_budget(budget, backoff, f"{method} waiting for a {name} in-flight slot")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 0.02)
+        self._record(name, time.perf_counter() - started)
+        return _Release(slots, index) if index is not None else _Release()
+
+    @contextmanager
+    def slot(self, method):
+        """acquire() for a block: the in-flight slot is held until the block ends"""
+        release = self.acquire(method)
+        try:
+            yield
+        finally:
+            release()
+
+    def _record(self, name, waited):
+        with self._stats_lock:
+            stats = self._stats[name]
+            stats["requests"] += 1
+            if waited > 0.001:  # below that it is just the bookkeeping
+                stats["throttled"] += 1
+                stats["throttled_s"] += waited
+                stats["max_wait_s"] = max(stats["max_wait_s"], waited)
+
+    def stats(self):
+        with self._stats_lock:
+            return {name: {k: round(v, 4) if isinstance(v, float) else v for k, v in s.items()}
+                    for name, s in self._stats.items() if s["requests"]}
+
+    def close(self):
+        for item in (*self._buckets.values(), *self._slots.values()):
+            item.close()
+
+
+def merge_stats(reports):
+    merged = {}
+    for report in reports:
+        for name, stats in report.items():
+            totals = merged.setdefault(name, {"requests": 0, "throttled": 0, "throttled_s": 0.0, "max_wait_s": 0.0})
+            for key in ("requests", "throttled", "throttled_s"):
+                totals[key] += stats[key]
+            totals["max_wait_s"] = max(totals["max_wait_s"], stats["max_wait_s"])
+    return merged
@@ -0,0 +1,122 @@
+"""
+Opt-in read cache for idempotent GETs of PetStoreClient.
+
+- per-endpoint TTL (only endpoints listed in `ttls` are cached);
+- bounded LRU;
+- after the TTL expires the entry is revalidated: with If-None-Match when the server sent
+  an ETag (304 -> cached response is reused), otherwise by a content hash of the fresh body
+  (same hash -> the cached response object is kept);
+- any write to a resource family invalidates the cached reads of that family.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# slow-changing, large payloads; single-entity GETs are polled for freshness and never cached by default
+DEFAULT_TTLS = {
+    "/store/inventory": 5.0,
+    "/pet/findByStatus": 5.0,
+}
+
+# write endpoint prefix -> cached endpoint prefixes it makes stale
+INVALIDATES = {
+    "/pet": ("/pet", "/store/inventory"),  # inventory is computed from pet statuses
+    "/store": ("/store",),
+    "/user": ("/user",),
+}
+
+
+class _Entry:
+    __slots__ = ("endpoint", "response", "etag", "digest", "expires")
+
+    def __init__(self, endpoint, response, ttl):
+        self.endpoint = endpoint
+        self.response = response
+        self.etag = response.headers.get("ETag")
+        self.digest = hashlib.sha1(response.content).hexdigest()
+        self.expires = time.monotonic() + ttl
+
+
+class ReadCache:
+
+    def __init__(self, ttls=None, max_entries=256):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "invalidations": 0, "evictions": 0}
+
+    def cacheable(self, endpoint):
+        return self.enabled and endpoint in self.ttls
+
+    def get(self, endpoint, key, send):
+        """
+        :param send: send(extra_headers) -> requests.Response, performs the real GET
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.expires > time.monotonic():
+                    self.counters["hits"] += 1
+                    return entry.response
+
+        headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
+        resp = send(headers)
+        ttl = self.ttls[endpoint]
+        with self._lock:
+            if entry is not None and (resp.status_code == 304 or
+                                      (resp.status_code == 200 and
+                                       hashlib.sha1(resp.content).hexdigest() == entry.digest)):
+                self.counters["revalidated"] += 1
+                entry.expires = time.monotonic() + ttl
+                self._entries[key] = entry
+                return entry.response
+            self.counters["misses"] += 1
+            if resp.status_code == 200:
+                self._entries[key] = _Entry(endpoint, resp, ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.counters["evictions"] += 1
+            else:
+                self._entries.pop(key, None)
+        return resp
+
+    def invalidate(self, endpoint):
+        """Drop cached reads made stale by a write to `endpoint`"""
+        family = "/" + endpoint.split("/")[1]
+        prefixes = INVALIDATES.get(family, (family,))
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e.endpoint.startswith(prefixes)]
+            for key in stale:
+                del self._entries[key]
+            self.counters["invalidations"] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def bypass(self):
+        """Context manager: reads inside go to the server (for tests that verify freshness)"""
+        return _Bypass(self)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
+
+
+class _Bypass:
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.previous = None
+
+    def __enter__(self):
+        self.previous, self.cache.enabled = self.cache.enabled, False
+        return self.cache
+
+    def __exit__(self, *exc):
+        self.cache.enabled = self.previous
@@ -0,0 +1,22 @@
+"""
+.env loading, once per run.
+
+The first process that needs settings (the pytest controller, or a plain run) reads the .env
+file of the project into os.environ (variables already set win) and marks the environment as
+loaded. xdist workers, load generator and benchmark child processes inherit that environment and
+skip python-dotenv altogether: no import, no file search, no parsing.
+"""
+import os
+
+ENV_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+LOADED_FLAG = "PETSTORE_ENV_LOADED"
+
+
+def load_env():
+    if os.environ.get(LOADED_FLAG):
+        return
+    if os.path.exists(ENV_FILE):
+        from dotenv import load_dotenv  # deferred: only the first process of a run needs it
+
+        load_dotenv(ENV_FILE)
+    os.environ[LOADED_FLAG] = "1"
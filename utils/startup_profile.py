@@ -0,0 +1,160 @@
+"""
+--startup-profile: where the start of a run goes, in the controller and in every xdist worker.
+
+- "interpreter + pytest + plugins": from process start (Linux /proc) until conftest starts loading;
+- "conftest imports": the imports at the top of conftest;
+- "collection": the whole collection phase, and per test module (importing it + building items);
+- imports: self and cumulative time of the modules imported directly by conftest, the test
+  modules and fixtures (their own dependencies count into the cumulative time).
+
+Imports are timed by wrapping builtins.__import__, which has to happen before conftest imports
+anything else: conftest calls install_if_requested() first thing. The controller sees the option
+in sys.argv (or PYTEST_ADDOPTS) and passes ENV_FLAG on to its workers through the environment.
+"""
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+ENV_FLAG = "PETSTORE_STARTUP_PROFILE"
+OPTION = "--startup-profile"
+
+
+def _since_process_start():
+    """Seconds since this process started, None where /proc is not available"""
+    try:
+        with open("/proc/self/stat") as f:
+            started_ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+class StartupProfile:
+
+    def __init__(self):
+        self.phases = {}  # phase -> seconds, in order
+        self.modules = {}  # directly imported module -> [self_s, cumulative_s]
+        self.collection = {}  # test module nodeid -> seconds
+        self.imports_profiled = False
+        self._original_import = None
+        self._stack = []  # time spent in nested first imports, one slot per import in progress
+        self._thread = None
+        self._marks = {}
+
+    def install(self):
+        if self._original_import is not None:
+            return
+        process_s = _since_process_start()
+        if process_s is not None:
+            self.phases["interpreter + pytest + plugins"] = round(process_s, 4)
+        self._original_import = builtins.__import__
+        self._thread = threading.get_ident()
+        builtins.__import__ = self._import
+        self.imports_profiled = True
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.get_ident() != self._thread:
+            return self._original_import(name, globals, locals, fromlist, level)  # e.g. background writers
+        fullname = name
+        if level:
+            try:
+                fullname = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        new = fullname not in sys.modules
+        if not new and fromlist and hasattr(sys.modules[fullname], "__path__"):
+            # `from package import submodule`: a submodule that is not an attribute yet is imported by this call
+            package = sys.modules[fullname]
+            submodule = next((item for item in fromlist
+                              if isinstance(item, str) and item != "*" and not hasattr(package, item)), None)
+            if submodule is not None:
+                new, fullname = True, f"{fullname}.{submodule}"
+        if not new:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - started
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            if not self._stack and fullname in sys.modules:
+                entry = self.modules.setdefault(fullname, [0.0, 0.0])
+                entry[0] += cumulative - nested
+                entry[1] += cumulative
+
+    def start(self, phase):
+        self._marks[phase] = time.perf_counter()
+
+    def stop(self, phase):
+        started = self._marks.pop(phase, None)
+        if started is not None:
+            self.phases[phase] = round(time.perf_counter() - started, 4)
+
+    def add_collection(self, nodeid, seconds):
+        self.collection[nodeid] = round(self.collection.get(nodeid, 0.0) + seconds, 4)
+
+    def export(self, worker, top=None):
+        modules = sorted(self.modules.items(), key=lambda item: -item[1][1])[:top]
+        return {
+            "worker": worker,
+            "phases": self.phases,
+            "imports_profiled": self.imports_profiled,
+            "imports": {name: {"self_s": round(s, 5), "cumulative_s": round(c, 5)} for name, (s, c) in modules},
+            "collection": self.collection,
+        }
+
+
+PROFILE = StartupProfile()  # one per process
+
+
+def requested():
+    return (OPTION in sys.argv or OPTION in os.environ.get("PYTEST_ADDOPTS", "").split()
+            or bool(os.environ.get(ENV_FLAG)))
+
+
+def install_if_requested():
+    if requested():
+        PROFILE.install()
+        PROFILE.start("conftest imports")
+
+
+def summarize(reports, top=15):
+    """
+    Merge per-process exports: phases per process, imports and collection per module averaged
+    over the processes that did the work
+    """
+    imports, collection = {}, {}
+    for report in reports:
+        for name, entry in report["imports"].items():
+            merged = imports.setdefault(name, {"processes": 0, "self_s": 0.0, "cumulative_s": 0.0})
+            merged["processes"] += 1
+            merged["self_s"] += entry["self_s"]
+            merged["cumulative_s"] += entry["cumulative_s"]
+        for nodeid, seconds in report["collection"].items():
+            merged = collection.setdefault(nodeid, {"processes": 0, "seconds": 0.0})
+            merged["processes"] += 1
+            merged["seconds"] += seconds
+    for merged in imports.values():
+        merged["self_s"] /= merged["processes"]
+        merged["cumulative_s"] /= merged["processes"]
+    for merged in collection.values():
+        merged["seconds"] /= merged["processes"]
+    return {
+        "phases": {report["worker"]: report["phases"] for report in reports},
+        "imports": dict(sorted(imports.items(), key=lambda item: -item[1]["cumulative_s"])[:top]),
+        "collection": dict(sorted(collection.items(), key=lambda item: -item[1]["seconds"])),
+        "imports_profiled": any(report["imports_profiled"] for report in reports),
+    }
@@ -0,0 +1,117 @@
+"""
+Bulk user provisioning through POST /user/createWithList.
+
+UserBatcher buffers users and flushes them in createWithList calls of `batch_size` users
+(batches are sent concurrently), then confirms readability of all of them together through
+the `wait_readable` callback (one wait_all round in conftest). Each batch call is recorded in
+BATCH_LOG, so latency per batch size can be compared across a run (see the "user batches"
+terminal section and benchmarks/bench_user_batches.py).
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.api_client import POOL_MAXSIZE
+from utils.instrumentation import percentile
+from utils.payloads import user_payload
+
+
+class BatchLog:
+    """Per-batch latency records of createWithList calls (one instance per xdist worker)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def record(self, size, seconds, status):
+        with self._lock:
+            self.records.append({"size": size, "seconds": seconds, "status": status})
+
+    def export(self):
+        with self._lock:
+            return list(self.records)
+
+
+BATCH_LOG = BatchLog()
+
+
+class UserBatcher:
+
+    def __init__(self, api_client, batch_size=50, wait_readable=None, max_workers=None, log=BATCH_LOG):
+        """:param wait_readable: wait_readable(usernames), called after every flush"""
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        self.api_client = api_client
+        self.batch_size = batch_size
+        self.wait_readable = wait_readable
+        self.max_workers = max_workers or POOL_MAXSIZE
+        self.log = log
+        self.batches = []  # records of the batches flushed by this batcher
+        self._pending = []
+
+    def add(self, id, username, userStatus=0):
+        """Buffer one user; returns its username (the user exists only after flush())"""
+        self._pending.append(user_payload(id, username, userStatus))
+        return username
+
+    def add_payloads(self, payloads):
+        self._pending.extend(payloads)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        """
+        Send all buffered users in createWithList batches and wait until they are readable.
+        Returns their usernames; raises RuntimeError if a batch was rejected.
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, min(len(batches), self.max_workers))) as pool:
+            # carry context variables (the test's budget) over to the worker threads
+            futures = [pool.submit(contextvars.copy_context().run, self._send, batch) for batch in batches]
+            results = [future.result() for future in futures]
+
+        failed = [record for record in results if record["status"] not in (200, 201)]
+        if failed:
+            raise RuntimeError(f"createWithList failed for {len(failed)} of {len(batches)} batches: {failed}")
+        usernames = [user["username"] for user in pending]
+        if self.wait_readable is not None:
+            self.wait_readable(usernames)
+        return usernames
+
+    def _send(self, batch):
+        started = time.perf_counter()
+        status = None
+        try:
+            status = self.api_client.create_users_with_list(batch).status_code
+        finally:
+            seconds = time.perf_counter() - started
+            record = {"size": len(batch), "seconds": round(seconds, 4), "status": status}
+            self.batches.append(record)
+            self.log.record(len(batch), seconds, status)
+        return record
+
+
+def summarize_batches(exports):
+    """Merge BatchLog exports of several workers: batch size -> calls, errors, p50/p95 and per-user ms"""
+    by_size = defaultdict(list)
+    for export in exports:
+        for record in export:
+            by_size[record["size"]].append(record)
+
+    summary = {}
+    for size, records in sorted(by_size.items()):
+        seconds = sorted(r["seconds"] for r in records)
+        summary[size] = {
+            "calls": len(records),
+            "errors": sum(1 for r in records if r["status"] not in (200, 201)),
+            "p50_s": round(percentile(seconds, 50), 4),
+            "p95_s": round(percentile(seconds, 95), 4),
+            "per_user_ms": round(sum(seconds) / (size * len(records)) * 1000, 2),
+        }
+    return summary
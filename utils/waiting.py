@@ -0,0 +1,321 @@
+"""
+Waiting engine for eventual consistency checks (used by get_with_retry).
+
+Polls immediately, then backs off exponentially with jitter until an overall deadline.
+Every wait brackets the endpoint's time-to-consistency: it was reached after the last failed poll
+and by the first successful one. Later waits on the same endpoint sleep about that long before the
+second poll instead of starting from scratch; a poll on either side of the estimate narrows the
+bracket, so the estimate moves down as well as up.
+A wait never outlives the test's time budget (utils/budget.py): when the budget deadline
+cuts it short, BudgetExceeded is raised.
+Responses replayed from a cassette (utils/cassette.py) have no server behind them, so the wait does
+not sleep between their polls; the deadline still moves as if it had, so an incomplete recording
+ends the wait after the usual schedule instead of spinning.
+"""
+import asyncio
+import contextvars
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from utils.api_client import POOL_MAXSIZE
+from utils.budget import wait_deadline
+from utils.cassette import replayed
+from utils.rate_limit import polling
+
+WAIT_TIMEOUT = 15.0  # same worst case as the old 30 x 0.5s
+
+
+@dataclass(frozen=True)
+class WaitPolicy:
+    timeout: float = WAIT_TIMEOUT  # overall deadline, seconds
+    initial_delay: float = 0.05  # first sleep when nothing is known about the endpoint
+    factor: float = 2.0  # exponential backoff multiplier
+    max_delay: float = 2.0  # cap for a single sleep
+    jitter: float = 0.2  # +/- fraction applied to each sleep
+    max_polls: int = None  # optional hard cap on number of polls
+
+    def delays(self, hint=None):
+        """
+        Infinite schedule of sleeps between polls (the first poll is never delayed). A hint replaces
+        the first sleep; a poll that is still too early is followed by the usual backoff from the start,
+        the entity is usually only moments away then.
+        """
+        if hint:
+            yield self._jittered(min(hint, self.max_delay))
+        delay = self.initial_delay
+        while True:
+            yield self._jittered(delay)
+            delay = min(delay * self.factor, self.max_delay)
+
+    def _jittered(self, delay):
+        spread = delay * self.jitter
+        return max(0.0, delay + random.uniform(-spread, spread))
+
+
+DEFAULT_POLICY = WaitPolicy()
+
+
+class WaitStats:
+    """Per-endpoint time-to-consistency and waiting totals (one instance per xdist worker)"""
+
+    def __init__(self, window=50):
+        self._window = window
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self._events = deque(maxlen=1000)
+
+    def _entry(self, endpoint):
+        return self.endpoints.setdefault(endpoint, {
+            "waits": 0, "polls": 0, "timeouts": 0, "slept": 0.0, "elapsed": 0.0,
+            "samples": deque(maxlen=self._window),
+        })
+
+    def _estimate(self, samples):
+        """
+        Time-to-consistency from (low, high) brackets: the middle of what the newest ones have in
+        common, back to the first older one that contradicts them (the delay changed since then).
+        0.0 when most waits resolved on the first poll, None without samples.
+        """
+        if not samples:
+            return None
+        slow = [(low, high) for low, high in samples if high > 0]
+        if not slow or len(slow) * 2 < len(samples):
+            return 0.0
+        low, high = slow[-1]
+        for older_low, older_high in reversed(slow[:-1]):
+            if max(low, older_low) >= min(high, older_high):
+                break
+            low, high = max(low, older_low), min(high, older_high)
+        return (low + high) / 2
+
+    def hint(self, endpoint):
+        """Estimated time-to-consistency for the endpoint (None if unknown or immediate)"""
+        with self._lock:
+            entry = self.endpoints.get(endpoint)
+            samples = list(entry["samples"]) if entry else []
+        # most waits resolve on the first poll -> keep the fast path, don't learn a sleep
+        return self._estimate(samples) or None
+
+    def record(self, endpoint, ok, polls, slept, elapsed, bracket=None):
+        """
+        :param elapsed: seconds from the start of the wait until its last poll returned
+        :param bracket: (low, high) seconds from the start of the wait until the last failed and the first
+                        successful poll started; None when the first poll succeeded
+        """
+        with self._lock:
+            entry = self._entry(endpoint)
+            entry["waits"] += 1
+            entry["polls"] += polls
+            entry["slept"] += slept
+            entry["elapsed"] += elapsed
+            if ok:
+                # resolved on the first poll: consistent right away, whatever the fetch took
+                entry["samples"].append(bracket or (0.0, 0.0))
+            else:
+                entry["timeouts"] += 1
+            self._events.append({"endpoint": endpoint, "ok": ok, "polls": polls,
+                                 "slept_s": round(slept, 3), "elapsed_s": round(elapsed, 3)})
+
+    def drain_events(self):
+        """Individual waits recorded since the previous call (used for per-test attachments)"""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def snapshot(self):
+        """Plain-JSON view of the stats, suitable for attachments and merging across workers"""
+        with self._lock:
+            result = {}
+            for endpoint, entry in self.endpoints.items():
+                estimate = self._estimate(list(entry["samples"]))
+                result[endpoint] = {
+                    "waits": entry["waits"],
+                    "polls": entry["polls"],
+                    "timeouts": entry["timeouts"],
+                    "slept_s": round(entry["slept"], 3),
+                    "elapsed_s": round(entry["elapsed"], 3),
+                    "ttc_s": round(estimate, 3) if estimate is not None else None,
+                    "ttc_max_s": round(max(high for _, high in entry["samples"]), 3) if entry["samples"] else None,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self._events.clear()
+
+
+def merge_snapshots(snapshots):
+    """Merge snapshot() dicts from several workers (the estimates are approximated by max)"""
+    merged = {}
+    for snapshot in snapshots:
+        for endpoint, data in snapshot.items():
+            total = merged.setdefault(endpoint, {"waits": 0, "polls": 0, "timeouts": 0, "slept_s": 0.0,
+                                                 "elapsed_s": 0.0, "ttc_s": None, "ttc_max_s": None})
+            for key in ("waits", "polls", "timeouts", "slept_s", "elapsed_s"):
+                total[key] = round(total[key] + data[key], 3)
+            for key in ("ttc_s", "ttc_max_s"):
+                if data[key] is not None:
+                    total[key] = max(total[key] or 0.0, data[key])
+    return merged
+
+
+WAIT_STATS = WaitStats()
+
+
+def _next_pause(delays, hint, polls, waited):
+    """Next sleep; with a hint the second poll starts `hint` seconds after the wait started"""
+    delay = next(delays)
+    if polls == 1 and hint:
+        delay -= waited  # the first poll took part of it
+    return max(0.0, delay)
+
+
+def wait_until(fetch, is_done, endpoint, policy=None, stats=None):
+    """
+    Calls fetch() until is_done(result) or the deadline passes; returns the last result.
+    """
+    policy = policy or DEFAULT_POLICY
+    stats = stats or WAIT_STATS
+    started = time.monotonic()
+    deadline, budget = wait_deadline(started, policy.timeout)
+    polls, slept, last_miss = 0, 0.0, None
+    hint = stats.hint(endpoint)
+    delays = policy.delays(hint)
+    while True:
+        polled = time.monotonic() - started
+        with polling():
+            result = fetch()
+        polls += 1
+        ok = is_done(result)
+        now = time.monotonic()
+        if ok or now >= deadline or (policy.max_polls and polls >= policy.max_polls):
+            bracket = (last_miss, polled) if last_miss is not None else None
+            stats.record(endpoint, ok, polls, slept, now - started, bracket)
+            if not ok and budget is not None and now >= deadline:
+                budget.exceeded(f"waiting for {endpoint} ({polls} polls)")
+            return result
+        last_miss = polled
+        pause = min(_next_pause(delays, hint, polls, now - started), deadline - now)
+        if budget is not None and now + pause >= deadline:
+            # the next poll would start after the test budget ran out
+            stats.record(endpoint, False, polls, slept, now - started)
+            budget.exceeded(f"waiting for {endpoint} ({polls} polls)")
+        if replayed(result):
+            deadline -= pause
+            continue
+        time.sleep(pause)
+        slept += pause
+
+
+def wait_all(conditions, policy=None, stats=None, max_workers=None):
+    """
+    Batch version of wait_until for many entities at once.
+
+    :param conditions: iterable of (getter, entity_id, predicate[, endpoint]) tuples;
+                       predicate(resp) -> True when the entity reached the desired state
+    :return: list with the last response for every condition (same order)
+
+    All still-pending conditions are polled together in rounds (concurrently, bounded by the
+    connection pool), so waiting for N entities costs about as much as waiting for the slowest one.
+    """
+    conditions = [tuple(c) if len(c) == 4 else (*c, getattr(c[0], "__name__", str(c[0]))) for c in conditions]
+    policy = policy or DEFAULT_POLICY
+    stats = stats or WAIT_STATS
+    results = [None] * len(conditions)
+    pending = list(range(len(conditions)))
+    if not pending:
+        return results
+
+    started = time.monotonic()
+    deadline, budget = wait_deadline(started, policy.timeout)
+    hints = [h for h in (stats.hint(c[3]) for c in conditions) if h]
+    hint = min(hints) if hints else None
+    delays = policy.delays(hint)
+    rounds, slept, last_miss = 0, 0.0, None  # last_miss: when the previous round (all still pending) started
+
+    # sleeps are shared by the whole batch: each condition is charged its share, so totals stay real
+    share = 1.0 / len(conditions)
+
+    def poll(index):
+        getter, entity_id = conditions[index][:2]
+        with polling():
+            return getter(entity_id)
+
+    with ThreadPoolExecutor(max_workers=min(len(pending), max_workers or POOL_MAXSIZE)) as pool:
+        while True:
+            # each poll runs in a copy of this context: the test's budget and the polling flag apply there too
+            polled = time.monotonic() - started
+            futures = [pool.submit(contextvars.copy_context().run, poll, index) for index in pending]
+            responses = [future.result() for future in futures]
+            rounds += 1
+            now = time.monotonic()
+            still_pending = []
+            for index, resp in zip(pending, responses):
+                results[index] = resp
+                if conditions[index][2](resp):
+                    stats.record(conditions[index][3], True, rounds, slept * share, now - started,
+                                 (last_miss, polled) if last_miss is not None else None)
+                else:
+                    still_pending.append(index)
+            pending = still_pending
+            if not pending:
+                return results
+            last_miss = polled
+            if now >= deadline or (policy.max_polls and rounds >= policy.max_polls):
+                for index in pending:
+                    stats.record(conditions[index][3], False, rounds, slept * share, now - started)
+                if budget is not None and now >= deadline:
+                    budget.exceeded(f"waiting for {len(pending)} of {len(conditions)} entities ({rounds} rounds)")
+                return results
+            pause = min(_next_pause(delays, hint, rounds, now - started), deadline - now)
+            if budget is not None and now + pause >= deadline:
+                for index in pending:
+                    stats.record(conditions[index][3], False, rounds, slept * share, now - started)
+                budget.exceeded(f"waiting for {len(pending)} of {len(conditions)} entities ({rounds} rounds)")
+            if all(replayed(results[index]) for index in pending):
+                deadline -= pause
+                continue
+            time.sleep(pause)
+            slept += pause
+
+
+async def wait_until_async(fetch, is_done, endpoint, policy=None, stats=None):
+    """Async version of wait_until: fetch is a coroutine function, sleeps via asyncio.sleep"""
+    policy = policy or DEFAULT_POLICY
+    stats = stats or WAIT_STATS
+    started = time.monotonic()
+    deadline, budget = wait_deadline(started, policy.timeout)
+    polls, slept, last_miss = 0, 0.0, None
+    hint = stats.hint(endpoint)
+    delays = policy.delays(hint)
+    while True:
+        polled = time.monotonic() - started
+        with polling():
+            result = await fetch()
+        polls += 1
+        ok = is_done(result)
+        now = time.monotonic()
+        if ok or now >= deadline or (policy.max_polls and polls >= policy.max_polls):
+            bracket = (last_miss, polled) if last_miss is not None else None
+            stats.record(endpoint, ok, polls, slept, now - started, bracket)
+            if not ok and budget is not None and now >= deadline:
+                budget.exceeded(f"waiting for {endpoint} ({polls} polls)")
+            return result
+        last_miss = polled
+        pause = min(_next_pause(delays, hint, polls, now - started), deadline - now)
+        if budget is not None and now + pause >= deadline:
+            stats.record(endpoint, False, polls, slept, now - started)
+            budget.exceeded(f"waiting for {endpoint} ({polls} polls)")
+        if replayed(result):
+            deadline -= pause
+            await asyncio.sleep(0)
+            continue
+        await asyncio.sleep(pause)
+        slept += pause